@@ -1,211 +1,480 @@
-from flask import Flask, render_template, request, redirect, url_for, session, jsonify, send_file
-import mysql.connector
-from mysql.connector import pooling, Error
+from flask import (Flask, render_template, request, redirect, url_for, session, jsonify, send_file,
+                   Response, stream_with_context)
+from mysql.connector import Error
 from flask_cors import CORS
 from datetime import datetime, timedelta
-import pytz
 import os
+import time
 import qrcode
 import uuid
 import io
-import secrets
-from openpyxl import Workbook
+import base64
+import csv
+import itertools
+import tempfile
+import json
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils import get_column_letter
+
+from assets import AssetManifest
+from broker import create_broker
+from cache import LocalBackend, TokenCache, create_backend
+from database import (
+    get_current_time_wib, to_epoch_wib, db_pool, db_cursor,
+    get_guru_by_username, update_guru_password, get_siswa_by_username, update_siswa_password, get_siswa_by_id,
+    new_sesi_token, parse_sesi_token, start_sesi, end_sesi, rotate_sesi_token, get_sesi_aktif, verify_token,
+    CHECKIN_HADIR, CHECKIN_SUDAH_ABSEN, CHECKIN_EXPIRED, CHECKIN_INVALID, call_checkin,
+    fetch_riwayat_siswa,
+    ABSENSI_PAGE_SIZE, ABSENSI_MAX_PAGE_SIZE, bulan_range, absensi_filter_clause, get_absensi_page,
+    get_rekap, rollup_rekap,
+)
+from metrics import Metrics
+from passwords import HasherBusy, PasswordHasher
+from response_cache import ResponseCache
+from sessions import ServerSideSessionInterface
+from signed_token import SignedTokenSigner
+from siswa_import import ImportFormatError, iter_csv_rows, iter_siswa_records, iter_xlsx_rows
+from token_sweeper import TokenSweeper
+from write_behind import AbsenWriteBehind
 
 # ========================================
-# TIMEZONE CONFIGURATION - WIB
+# DATABASE (LAPISAN AKSES DATA: database.py)
 # ========================================
-WIB = pytz.timezone('Asia/Jakarta')
 
-def get_current_time_wib():
-    """Fungsi untuk mendapatkan waktu sekarang dalam timezone WIB"""
-    return datetime.now(WIB)
+# Statement SQL yang lebih lama dari ini (detik) dicatat sebagai query lambat; 0 = nonaktif
+SLOW_QUERY_SECONDS = float(os.environ.get('SLOW_QUERY_SECONDS', '0.5'))
+
+# Histogram latency request, query DB, dan render template (GET /metrics)
+metrics = Metrics(slow_query_seconds=SLOW_QUERY_SECONDS)
+db_pool.on_query = metrics.observe_query
 
 # ========================================
-# DATABASE CONFIGURATION & FUNCTIONS
+# CACHE TOKEN QR
 # ========================================
 
-DB_CONFIG = {
-    'host': 'absesgo.mysql.pythonanywhere-services.com',
-    'user': 'absesgo',
-    'password': 'passwordapa',
-    'database': 'absesgo$absensi_qr'
-}
+# Kosong = cache lokal per proses; isi redis://... untuk cache bersama antar worker
+TOKEN_CACHE_URL = os.environ.get('TOKEN_CACHE_URL', '')
+TOKEN_CACHE_NEGATIVE_TTL = int(os.environ.get('TOKEN_CACHE_NEGATIVE_TTL', '60'))
 
-def connect_db():
-    """Fungsi untuk membuat koneksi database"""
-    return mysql.connector.connect(**DB_CONFIG)
+token_cache = TokenCache(create_backend(TOKEN_CACHE_URL), negative_ttl=TOKEN_CACHE_NEGATIVE_TTL)
 
-def get_db_connection():
-    """Fungsi alternatif untuk koneksi database (untuk API CRUD)"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
-    except Error as e:
-        print(f"Error connecting to MySQL: {e}")
-        return None
+# db = token acak di qr_token (default); signed = token HMAC stateless yang dirotasi cepat
+QR_TOKEN_MODE = os.environ.get('QR_TOKEN_MODE', 'db')
+# Mode signed: QR diganti dashboard setiap ROTATE detik, token masih diterima GRACE detik setelahnya
+SIGNED_TOKEN_ROTATE_SECONDS = int(os.environ.get('SIGNED_TOKEN_ROTATE_SECONDS', '15'))
+SIGNED_TOKEN_GRACE_SECONDS = int(os.environ.get('SIGNED_TOKEN_GRACE_SECONDS', '10'))
+
+qr_signer = SignedTokenSigner(os.environ.get('SECRET_KEY', 'random_secret_key'))
 
 # ========================================
-# DATABASE FUNCTIONS - GURU
+# LIVE PUSH ABSENSI (SSE)
 # ========================================
 
-def get_guru_by_username(username):
-    """Ambil data guru berdasarkan username"""
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT * FROM guru WHERE username=%s LIMIT 1", (username,))
-    r = cur.fetchone()
-    cur.close()
-    conn.close()
-    return r
+# Kosong = broker in-process; isi redis://... agar check-in di worker lain ikut terkirim
+LIVE_BROKER_URL = os.environ.get('LIVE_BROKER_URL', '')
+LIVE_KEEPALIVE_SECONDS = 15
+
+live_broker = create_broker(LIVE_BROKER_URL)
+
+# Idempotensi /scan_token: scan ulang token yang sama oleh siswa yang sama dijawab dari memori
+SCAN_IDEMPOTENCY_TTL = int(os.environ.get('SCAN_IDEMPOTENCY_TTL', '300'))
+scan_results = create_backend(TOKEN_CACHE_URL)
+
+# Antrean scan offline (POST /scan_token/batch): jumlah scan per request dan
+# kelonggaran (detik) setelah token bertanda tangan kadaluarsa, dihitung dari jam server saat
+# scan diterima (token mode db tetap harus belum kadaluarsa menurut sp_checkin)
+SCAN_BATCH_MAX_ITEMS = int(os.environ.get('SCAN_BATCH_MAX_ITEMS', '20'))
+SCAN_BATCH_GRACE_SECONDS = int(os.environ.get('SCAN_BATCH_GRACE_SECONDS', '30'))
 
 # ========================================
-# DATABASE FUNCTIONS - SISWA
+# CACHE RESPONS API (ETAG)
 # ========================================
 
-def get_siswa_by_username(username):
-    """Ambil data siswa berdasarkan username"""
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT * FROM siswa WHERE username=%s LIMIT 1", (username,))
-    r = cur.fetchone()
-    cur.close()
-    conn.close()
-    return r
+# GET /api/absensi & /api/siswa di-cache per versi data; versi diganti setiap ada perubahan
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', '256'))
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', '3600'))
 
-def get_siswa_by_id(id_siswa):
-    """Ambil data siswa berdasarkan ID"""
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT * FROM siswa WHERE id_siswa=%s LIMIT 1", (id_siswa,))
-    r = cur.fetchone()
-    cur.close()
-    conn.close()
-    return r
+response_cache = ResponseCache(create_backend(TOKEN_CACHE_URL), max_entries=RESPONSE_CACHE_SIZE,
+                               ttl=RESPONSE_CACHE_TTL)
 
 # ========================================
-# DATABASE FUNCTIONS - QR TOKEN
+# PASSWORD HASHING
 # ========================================
 
-def insert_qr_token(token, expires_dt):
-    """Insert token QR baru ke database"""
-    conn = connect_db()
-    cur = conn.cursor()
-    waktu_buat_wib = get_current_time_wib()
-    cur.execute(
-        "INSERT INTO qr_token (token, waktu_buat, waktu_expired, status) VALUES (%s, %s, %s, 'aktif')",
-        (token, waktu_buat_wib, expires_dt)
-    )
-    conn.commit()
-    cur.close()
-    conn.close()
-
-def verify_token(token):
-    """Verifikasi token QR, mengembalikan baris token jika aktif"""
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT * FROM qr_token WHERE token=%s AND status='aktif' LIMIT 1", (token,))
-    row = cur.fetchone()
-    cur.close()
-    conn.close()
-    return row
+# Metode hash Werkzeug, mis. 'pbkdf2:sha256:600000' atau 'scrypt:32768:8:1'; ganti untuk menaikkan cost
+# (hash lama otomatis di-hash ulang saat login berikutnya)
+PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:600000')
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(max((os.cpu_count() or 2) // 2, 1))))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get('PASSWORD_HASH_MAX_PENDING', '64'))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', '10'))
+PASSWORD_VERIFY_CACHE_TTL = int(os.environ.get('PASSWORD_VERIFY_CACHE_TTL', '600'))
+
+password_hasher = PasswordHasher(
+    method=PASSWORD_HASH_METHOD,
+    workers=PASSWORD_HASH_WORKERS,
+    max_pending=PASSWORD_HASH_MAX_PENDING,
+    timeout=PASSWORD_HASH_TIMEOUT,
+    cache=create_backend(TOKEN_CACHE_URL),
+    cache_ttl=PASSWORD_VERIFY_CACHE_TTL,
+    secret=os.environ.get('SECRET_KEY', 'random_secret_key'),
+)
+
+# ========================================
+# CACHE PROFIL GURU & SISWA
+# ========================================
+
+# Profil (tanpa password) di-cache saat login; dipakai check-in & dashboard tanpa SELECT ulang
+PROFILE_CACHE_TTL = int(os.environ.get('PROFILE_CACHE_TTL', '43200'))
+profiles = create_backend(TOKEN_CACHE_URL)
+
+def profile_from_row(row):
+    """Baris guru/siswa -> dict profil yang aman di-cache (tanpa password, siap JSON)"""
+    profil = {}
+    for key, value in row.items():
+        if key == 'password':
+            continue
+        if isinstance(value, datetime):
+            value = value.strftime('%Y-%m-%d %H:%M:%S')
+        profil[key] = value
+    return profil
+
+def cache_profile(role, key, row):
+    profil = profile_from_row(row)
+    profiles.set(f"profil:{role}:{key}", profil, PROFILE_CACHE_TTL)
+    return profil
+
+def invalidate_profile(role, key):
+    profiles.delete(f"profil:{role}:{key}")
+
+def get_siswa_profile(id_siswa):
+    """Profil siswa (nis, nama_siswa, kelas, jurusan) dari cache; fallback ke database"""
+    profil = profiles.get(f"profil:siswa:{id_siswa}")
+    if profil is None:
+        siswa = get_siswa_by_id(id_siswa)
+        if siswa is None:
+            return None
+        profil = cache_profile('siswa', id_siswa, siswa)
+    return profil
+
+# ========================================
+# SESI ABSENSI
+# ========================================
+
+def normalize_kelas(value):
+    """Kelas sesi dari input guru; None = semua kelas"""
+    kelas = (value or '').strip()
+    return kelas or None
+
+def active_sesi_id(sess, kelas):
+    """id_sesi aktif guru yang bisa dirotasi, None jika perlu sesi baru (belum ada / kelas berbeda)"""
+    id_sesi = sess.get('id_sesi')
+    if id_sesi is None or sess.get('sesi_kelas') != kelas:
+        return None
+    return id_sesi
+
+def token_sesi_id(token):
+    """id_sesi dari token sesi (acak maupun bertanda tangan), None jika token tanpa sesi"""
+    if qr_signer.is_signed(token):
+        return qr_signer.session_id(token)
+    return parse_sesi_token(token)
+
+def remember_sesi(sess, id_sesi, kelas, token):
+    """Simpan sesi & token aktif guru di session (token lama langsung tidak berlaku di cache)"""
+    old_token = sess.get('active_token')
+    if old_token and old_token != token and not qr_signer.is_signed(old_token):
+        token_cache.invalidate(old_token)
+    sess['id_sesi'] = id_sesi
+    sess['sesi_kelas'] = kelas
+    # Token aktif guru dipakai sebagai scope live push dashboard
+    sess['active_token'] = token
+
+# ========================================
+# VALIDASI TOKEN QR
+# ========================================
 
 def expire_token(token):
     """Expire token QR"""
-    conn = connect_db()
-    cur = conn.cursor()
-    cur.execute("UPDATE qr_token SET status='expired' WHERE token=%s", (token,))
-    conn.commit()
-    cur.close()
-    conn.close()
+    with db_cursor(commit=True) as cur:
+        cur.execute("UPDATE qr_token SET status='expired' WHERE token=%s", (token,))
+    token_cache.invalidate(token)
+
+def remember_token_row(token, row):
+    """Simpan hasil verify_token ke cache; mengembalikan (status, expires_at, kelas)"""
+    if not row:
+        token_cache.put_invalid(token)
+        return TokenCache.INVALID, None, None
+    expires_at = to_epoch_wib(row['waktu_expired'])
+    kelas = row.get('kelas')
+    token_cache.put_active(token, expires_at, kelas)
+    return TokenCache.AKTIF, expires_at, kelas
+
+def signed_token_status(token):
+    """(status, expires_at, kelas) token bertanda tangan, diverifikasi di CPU tanpa cache/database"""
+    payload = qr_signer.verify(token)
+    if payload is None:
+        return TokenCache.INVALID, None, None
+    return TokenCache.AKTIF, payload['expires_at'], payload['kelas']
+
+def lookup_token(token):
+    """
+    Cek status token: token bertanda tangan diverifikasi di CPU, token lain lewat cache
+    dulu dengan fallback ke verify_token saat miss.
+    Mengembalikan (status, expires_at, kelas) dengan status TokenCache.AKTIF / INVALID.
+    """
+    if qr_signer.is_signed(token):
+        return signed_token_status(token)
+    entry = token_cache.get(token)
+    if entry is None:
+        return remember_token_row(token, verify_token(token))
+    return entry['status'], entry['expires_at'], entry.get('kelas')
+
+def token_error_response(status, expires_at, grace=0):
+    """Respons (body, code) jika token tidak boleh dipakai, None jika token aktif (plus grace detik)"""
+    if status != TokenCache.AKTIF:
+        return {'status': 'error', 'message': 'Token tidak valid atau sudah expired'}, 400
+    if time.time() > expires_at + grace:
+        return {'status': 'error', 'message': 'Token sudah kadaluarsa'}, 400
+    return None
+
+def kelas_error_response(kelas, profil):
+    """Respons (body, code) jika token sesi khusus kelas lain, None jika boleh check-in"""
+    if not kelas:
+        return None
+    if profil is None or profil.get('kelas') != kelas:
+        return {'status': 'error', 'message': f'Token ini hanya untuk kelas {kelas}'}, 403
+    return None
+
+def checkin_response(hasil, token, idem_key, expires_at):
+    """Terjemahkan hasil sp_checkin ke respons (body, code) + simpan idempotensi"""
+    if hasil in (CHECKIN_HADIR, CHECKIN_SUDAH_ABSEN):
+        if hasil == CHECKIN_HADIR:
+            body = {'status': 'success', 'message': 'Absensi berhasil tercatat'}
+        else:
+            body = {'status': 'warning', 'message': 'Anda sudah absen hari ini'}
+        scan_results.set(idem_key, body, max(1, min(SCAN_IDEMPOTENCY_TTL, expires_at - time.time())))
+        return body, 200
+
+    # Database menolak token -> cache sudah basi (mis. di-expire worker lain)
+    token_cache.invalidate(token)
+    if hasil == CHECKIN_EXPIRED:
+        return {'status': 'error', 'message': 'Token sudah kadaluarsa'}, 400
+    return {'status': 'error', 'message': 'Token tidak valid atau sudah expired'}, 400
 
 # ========================================
-# DATABASE FUNCTIONS - ABSENSI
+# CHECK-IN ABSENSI
 # ========================================
 
-def insert_absen_by_id(id_siswa, token_qr):
-    """Insert data absensi siswa"""
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
+def insert_absen_by_id(id_siswa, token_qr, profil=None):
+    """
+    Check-in absensi siswa dalam satu round-trip (CALL sp_checkin).
 
-    # Cek duplikat absensi hari ini
-    cur.execute("SELECT id_absen FROM absensi WHERE id_siswa=%s AND DATE(waktu_absen)=CURDATE()", (id_siswa,))
-    if cur.fetchone():
-        cur.close()
-        conn.close()
-        return False
+    Validasi token, cek duplikat harian (UNIQUE id_siswa+tanggal) dan insert
+    dilakukan atomik di database, sehingga double-scan tidak bisa lolos.
+    Check-in baru dipublikasikan ke dashboard guru lewat live_broker.
+    Mengembalikan salah satu CHECKIN_*.
+    """
+    # ✅ GUNAKAN WAKTU WIB
+    row = call_checkin(id_siswa, token_qr, get_current_time_wib(), profil)
+    return checkin_result(row, token_qr, id_siswa)
 
-    # Ambil data siswa (nama, jurusan, kelas)
-    cur.execute("SELECT nama_siswa, jurusan, kelas FROM siswa WHERE id_siswa=%s", (id_siswa,))
-    siswa = cur.fetchone()
-    if not siswa:
-        cur.close()
-        conn.close()
-        return False
+def checkin_result(row, token_qr, id_siswa):
+    """Olah baris hasil sp_checkin: publish check-in baru, kembalikan CHECKIN_*"""
+    if not row:
+        return CHECKIN_INVALID
+    if row['hasil'] == CHECKIN_HADIR:
+        invalidate_riwayat(id_siswa)
+        response_cache.bump('absensi')
+        publish_absen(row, token_qr)
+    return row['hasil']
+
+def enqueue_absen(id_siswa, token_qr):
+    """Check-in lewat antrean write-behind (token sudah divalidasi dari cache)"""
+    if absen_queue.enqueue(id_siswa, token_qr, get_current_time_wib()):
+        return CHECKIN_HADIR
+    return CHECKIN_SUDAH_ABSEN
+
+def check_offline_scan(item, id_siswa):
+    """
+    Validasi satu scan antrean offline {'token'} terhadap masa berlaku token saat scan diterima
+    server (plus SCAN_BATCH_GRACE_SECONDS); jam HP tidak dipakai. Mengembalikan (body, None)
+    jika jawabannya sudah final, atau (None, (token, expires_at, kelas)) jika scan perlu dicatat.
+    """
+    token = item.get('token') if isinstance(item, dict) else None
+    if not isinstance(token, str) or not token:
+        return {'status': 'error', 'message': 'Data scan tidak valid'}, None
 
-    # ✅ GUNAKAN WAKTU WIB
-    waktu_absen_wib = get_current_time_wib()
-    
-    # Insert data absensi
-    cur.execute("""
-        INSERT INTO absensi (id_siswa, waktu_absen, token_qr, status, nama_siswa, jurusan, kelas)
-        VALUES (%s, %s, %s, 'hadir', %s, %s, %s)
-    """, (id_siswa, waktu_absen_wib, token_qr, siswa['nama_siswa'], siswa['jurusan'], siswa['kelas']))
-
-    conn.commit()
-    cur.close()
-    conn.close()
-    return True
-
-def get_absensi_by_id_siswa(id_siswa):
-    """Ambil riwayat absensi berdasarkan ID siswa"""
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("""
-        SELECT a.*, s.nama_siswa, s.nis
-        FROM absensi a
-        JOIN siswa s ON a.id_siswa = s.id_siswa
-        WHERE a.id_siswa=%s
-        ORDER BY a.waktu_absen DESC
-    """, (id_siswa,))
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
-    return rows
+    cached = scan_results.get(f"scan:{id_siswa}:{token}")
+    if cached:
+        return cached, None
 
-def get_all_absensi():
-    """Ambil semua data absensi"""
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("""
-        SELECT a.*, s.nama_siswa, s.nis
-        FROM absensi a
-        JOIN siswa s ON a.id_siswa = s.id_siswa
-        ORDER BY a.waktu_absen DESC
-    """)
-    rows = cur.fetchall()
-    cur.close()
-    conn.close()
+    status, expires_at, kelas = lookup_token(token)
+    error = token_error_response(status, expires_at, SCAN_BATCH_GRACE_SECONDS)
+    if error:
+        return error[0], None
+    return None, (token, expires_at, kelas)
+
+def checkin_batch(id_siswa, tokens, profil=None):
+    """
+    Catat scan antrean offline yang sudah lolos validasi cache lewat jalur yang sama dengan
+    /scan_token (sp_checkin* atau write-behind), dengan waktu server saat diterima.
+    Semua scan jatuh di tanggal yang sama: token dicoba berurutan sampai satu diterima
+    database, scan sisanya mendapat hasil yang sama. Mengembalikan {token: hasil CHECKIN_*}.
+    """
+    hasil = {}
+    for token in tokens:
+        if absen_queue is not None:
+            hasil[token] = enqueue_absen(id_siswa, token)
+        else:
+            hasil[token] = insert_absen_by_id(id_siswa, token, profil)
+        if hasil[token] in (CHECKIN_HADIR, CHECKIN_SUDAH_ABSEN):
+            return {t: hasil.get(t, hasil[token]) for t in tokens}
+    return hasil
+
+def publish_flushed_absen(rows):
+    """Push live untuk baris yang baru di-flush oleh antrean write-behind"""
+    if rows:
+        response_cache.bump('absensi')
+    for row in rows:
+        invalidate_riwayat(row['id_siswa'])
+        publish_absen(row, row['token_qr'])
+
+def publish_absen(row, token_qr):
+    """Kirim check-in baru ke pelanggan live (token aktif guru, sesi, kelas, dan semua)"""
+    waktu_absen = row.get('waktu_absen')
+    if isinstance(waktu_absen, datetime):
+        waktu_absen = waktu_absen.strftime('%Y-%m-%d %H:%M:%S')
+    message = {
+        'id_absen': row.get('id_absen'),
+        'nis': row.get('nis'),
+        'nama_siswa': row.get('nama_siswa'),
+        'kelas': row.get('kelas'),
+        'jurusan': row.get('jurusan'),
+        'waktu_absen': waktu_absen,
+    }
+    id_sesi = token_sesi_id(token_qr)
+    try:
+        live_broker.publish(f"token:{token_qr}", message)
+        if id_sesi is not None:
+            live_broker.publish(f"sesi:{id_sesi}", message)
+        if message['kelas']:
+            live_broker.publish(f"kelas:{message['kelas']}", message)
+        live_broker.publish("semua", message)
+    except Exception as e:
+        # Push live bersifat best-effort, jangan gagalkan check-in
+        print(f"[ERROR] Gagal publish absensi live: {e}")
+
+# Riwayat per siswa di-cache (dihapus saat check-in baru tercatat)
+RIWAYAT_CACHE_TTL = int(os.environ.get('RIWAYAT_CACHE_TTL', '600'))
+riwayat_cache = create_backend(TOKEN_CACHE_URL)
+
+def get_riwayat_siswa(id_siswa):
+    """Riwayat absensi satu siswa, terbaru dulu, dari cache per siswa"""
+    key = f"riwayat:{id_siswa}"
+    rows = riwayat_cache.get(key)
+    if rows is None:
+        rows = fetch_riwayat_siswa(id_siswa)
+        riwayat_cache.set(key, rows, RIWAYAT_CACHE_TTL)
     return rows
 
+def invalidate_riwayat(id_siswa):
+    riwayat_cache.delete(f"riwayat:{id_siswa}")
+
 # ========================================
 # FLASK APPLICATION
 # ========================================
 
 app = Flask(__name__)
 CORS(app)
+metrics.init_app(app)
 
-app.config['SESSION_COOKIE_SECURE'] = True
-app.config['SESSION_COOKIE_SAMESITE'] = 'None'
+# 0 hanya untuk http:// lokal (mis. benchmark.py --url http://...); produksi tetap Secure
+SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE', '1') == '1'
+app.config['SESSION_COOKIE_SECURE'] = SESSION_COOKIE_SECURE
+# SameSite=None wajib Secure; tanpa Secure browser hanya menerima Lax
+app.config['SESSION_COOKIE_SAMESITE'] = 'None' if SESSION_COOKIE_SECURE else 'Lax'
 app.config['SESSION_COOKIE_HTTPONLY'] = True
-app.config['SECRET_KEY'] = 'random_secret_key'
+app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'random_secret_key')
+
+# Session server-side: cookie hanya berisi session id, isi session di cache (in-memory / Redis)
+SESSION_STORE_URL = os.environ.get('SESSION_STORE_URL', TOKEN_CACHE_URL)
+SESSION_TTL = int(os.environ.get('SESSION_TTL', '43200'))
+app.permanent_session_lifetime = timedelta(seconds=SESSION_TTL)
+app.session_interface = ServerSideSessionInterface(create_backend(SESSION_STORE_URL), ttl=SESSION_TTL)
+
+# ========================================
+# ASSET STATIS (CSS/JS BERHASH)
+# ========================================
 
-# Konfigurasi folder untuk menyimpan QR codes (gunakan path absolut)
+# Sumber CSS/JS di static/src, hasil build (nama berhash + .gz) di static/dist
+ASSET_SRC_DIR = os.path.join(app.root_path, 'static', 'src')
+ASSET_DIST_DIR = os.path.join(app.root_path, 'static', 'dist')
+# 1 = build ulang saat start (murah, hasil deterministik); 0 = pakai manifest dari `python assets.py`
+ASSET_BUILD_ON_START = os.environ.get('ASSET_BUILD_ON_START', '1') == '1'
+
+assets = AssetManifest(ASSET_SRC_DIR, ASSET_DIST_DIR)
+try:
+    if ASSET_BUILD_ON_START:
+        assets.build()
+    elif not assets.load():
+        print("[ERROR] Manifest asset tidak ditemukan, CSS/JS dilayani dari static/src")
+except OSError as e:
+    print(f"[ERROR] Build asset gagal, CSS/JS dilayani dari static/src: {e}")
+app.add_template_global(assets.url, 'asset_url')
+
+# Folder QR lama (sebelum QR dirender di memori), hanya untuk file warisan
 OUT_DIR = os.path.join(app.root_path, 'static', 'qrcodes')
-os.makedirs(OUT_DIR, exist_ok=True)
 
 # Token TTL (Time To Live) - 5 menit
 TOKEN_TTL_SECONDS = 300
 
+# Cache LRU gambar QR di memori, entri dibuang saat token expired
+QR_IMAGE_CACHE_SIZE = int(os.environ.get('QR_IMAGE_CACHE_SIZE', '256'))
+qr_images = LocalBackend(max_entries=QR_IMAGE_CACHE_SIZE)
+
+# ========================================
+# SWEEPER TOKEN (LATAR BELAKANG)
+# ========================================
+
+# Interval 0 = sweeper dimatikan
+TOKEN_SWEEPER_INTERVAL = int(os.environ.get('TOKEN_SWEEPER_INTERVAL', '300'))
+TOKEN_SWEEPER_BATCH_SIZE = int(os.environ.get('TOKEN_SWEEPER_BATCH_SIZE', '500'))
+TOKEN_RETENTION_DAYS = int(os.environ.get('TOKEN_RETENTION_DAYS', '30'))
+TOKEN_RETENTION_MODE = os.environ.get('TOKEN_RETENTION_MODE', 'archive')
+
+token_sweeper = TokenSweeper(
+    db_pool,
+    now_fn=get_current_time_wib,
+    batch_size=TOKEN_SWEEPER_BATCH_SIZE,
+    retention_days=TOKEN_RETENTION_DAYS,
+    mode=TOKEN_RETENTION_MODE,
+    interval=TOKEN_SWEEPER_INTERVAL,
+    qr_dir=OUT_DIR,
+)
+token_sweeper.start()
+
+# ========================================
+# WRITE-BEHIND ABSENSI (OPSIONAL)
+# ========================================
+
+# Aktifkan dengan WRITE_BEHIND_ENABLED=1: scan di-ack setelah tercatat di journal lokal,
+# insert ke MySQL dilakukan per batch
+WRITE_BEHIND_ENABLED = os.environ.get('WRITE_BEHIND_ENABLED', '0') == '1'
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', '200'))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.environ.get('WRITE_BEHIND_FLUSH_INTERVAL', '1'))
+WRITE_BEHIND_JOURNAL = os.environ.get('WRITE_BEHIND_JOURNAL',
+                                      os.path.join(app.root_path, 'journal', 'absensi.log'))
+
+absen_queue = None
+if WRITE_BEHIND_ENABLED:
+    absen_queue = AbsenWriteBehind(
+        db_pool,
+        WRITE_BEHIND_JOURNAL,
+        batch_size=WRITE_BEHIND_BATCH_SIZE,
+        flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+        on_flushed=publish_flushed_absen,
+    )
+    absen_queue.start()
+
 # ========================================
 # LAZY IMPORTS (Import saat dibutuhkan)
 # ========================================
@@ -248,13 +517,20 @@ def login_guru():
     password = request.form.get('password')
     guru = get_guru_by_username(username)
 
-    if not guru or guru['password'] != password:
+    try:
+        valid, new_hash = password_hasher.verify(guru['password'], password) if guru else (False, None)
+    except HasherBusy:
+        return "Server sedang sibuk, silakan coba lagi", 503
+    if not valid:
         return "Login gagal: username/password salah", 401
+    if new_hash:
+        update_guru_password(guru['username'], new_hash)
 
     session.clear()
     session['guru'] = guru['username']
     session['nama_guru'] = guru['nama_guru']
     session['role'] = 'guru'
+    cache_profile('guru', guru['username'], guru)
     return redirect(url_for('guru_dashboard'))
 
 @app.route('/guru')
@@ -263,8 +539,44 @@ def guru_dashboard():
     if 'guru' not in session:
         return redirect(url_for('index'))
 
-    absensi = get_all_absensi()
-    return render_template('guru.html', nama=session.get('nama_guru'), absensi=absensi)
+    try:
+        filters = parse_absensi_filters()
+    except ValueError:
+        filters = {}
+    absensi, next_cursor = get_absensi_page(**filters)
+    return render_template('guru.html', nama=session.get('nama_guru'), absensi=absensi,
+                           next_cursor=next_cursor, filters=request.args)
+
+def render_qr_png(token):
+    """Render token menjadi PNG (bytes) di memori, None jika modul qrcode tidak ada"""
+    # Lazy import qrcode
+    qrcode_module = lazy_import_qrcode()
+    if not qrcode_module:
+        return None
+
+    # Generate QR Code
+    qr = qrcode_module.QRCode(
+        version=1,
+        error_correction=qrcode_module.constants.ERROR_CORRECT_L,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(token)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+    bio = io.BytesIO()
+    img.save(bio)
+    return bio.getvalue()
+
+def store_qr_image(png):
+    """Simpan PNG di cache LRU sampai token expired; mengembalikan id gambar"""
+    qr_id = uuid.uuid4().hex
+    qr_images.set(qr_id, png, TOKEN_TTL_SECONDS)
+    return qr_id
+
+def qr_data_uri(png):
+    return 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
 
 @app.route('/generate_token', methods=['POST'])
 def generate_token():
@@ -272,50 +584,56 @@ def generate_token():
         if 'role' not in session or session['role'] != 'guru':
             return jsonify({'status': 'error', 'message': 'Unauthorized'}), 401
 
-        token = secrets.token_urlsafe(32)
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({'status': 'error', 'message': 'JSON tidak valid'}), 400
+        kelas = normalize_kelas(data.get('kelas'))
+
+        # Sesi guru untuk kelas yang sama dirotasi; kelas lain -> sesi lama diakhiri, sesi baru dimulai
+        id_sesi = active_sesi_id(session, kelas)
+        if id_sesi is None:
+            if session.get('id_sesi') is not None:
+                end_sesi(session['id_sesi'], session['guru'])
+            id_sesi = start_sesi(session['guru'], kelas)
         
         # ✅ GUNAKAN WAKTU WIB
         waktu_sekarang_wib = get_current_time_wib()
-        expires_at = waktu_sekarang_wib + timedelta(seconds=TOKEN_TTL_SECONDS)
-
-        # Insert token ke database
-        insert_qr_token(token, expires_at)
 
-        # Lazy import qrcode
-        qrcode_module = lazy_import_qrcode()
-        if not qrcode_module:
+        if QR_TOKEN_MODE == 'signed':
+            # Token bertanda tangan: tidak ada tulis qr_token, diverifikasi di CPU saat scan
+            expires_in = SIGNED_TOKEN_ROTATE_SECONDS + SIGNED_TOKEN_GRACE_SECONDS
+            expires_at = waktu_sekarang_wib + timedelta(seconds=expires_in)
+            token = qr_signer.sign(id_sesi, kelas, expires_at.timestamp())
+            rotate_in = SIGNED_TOKEN_ROTATE_SECONDS
+        else:
+            # Rotasi token sesi di tempat (tanpa baris qr_token baru)
+            expires_in = TOKEN_TTL_SECONDS
+            expires_at = waktu_sekarang_wib + timedelta(seconds=expires_in)
+            token = new_sesi_token(id_sesi)
+            rotate_sesi_token(id_sesi, token, expires_at)
+            token_cache.put_active(token, expires_at.timestamp(), kelas)
+            rotate_in = None
+        remember_sesi(session, id_sesi, kelas, token)
+
+        # Render PNG ke memori (tanpa disk), dilayani lewat serve_qr sampai token expired
+        png = render_qr_png(token)
+        if png is None:
             return jsonify({'status': 'error', 'message': 'QR code module not available'}), 500
+        qr_id = store_qr_image(png)
 
-        # Generate QR Code
-        qr = qrcode_module.QRCode(
-            version=1,
-            error_correction=qrcode_module.constants.ERROR_CORRECT_L,
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(token)
-        qr.make(fit=True)
-
-        img = qr.make_image(fill_color="black", back_color="white")
-
-        # Simpan file ke static/qrcodes (absolute path)
-        timestamp = waktu_sekarang_wib.strftime('%Y%m%d_%H%M%S')
-        filename = f"token_{timestamp}.png"
-        filepath = os.path.join(OUT_DIR, filename)
-
-        os.makedirs(OUT_DIR, exist_ok=True)
-        img.save(filepath)
-
-        print("[DEBUG] Saved QR file:", filepath)
-        print("[DEBUG] Exists?", os.path.exists(filepath), "Readable?", os.access(filepath, os.R_OK))
-
-        qr_url = url_for('static', filename=f'qrcodes/{filename}')
+        qr_url = url_for('serve_qr', filename=f'{qr_id}.png')
+        # Data URI inline: dashboard tidak perlu request kedua (aman untuk multi-worker)
+        qr_data = qr_data_uri(png)
 
         return jsonify({
             'status': 'success',
             'token': token,
+            'id_sesi': id_sesi,
+            'kelas': kelas,
             'qr_url': qr_url,
-            'expires_in': TOKEN_TTL_SECONDS
+            'qr_data': qr_data,
+            'expires_in': expires_in,
+            'rotate_in': rotate_in
         })
 
     except Exception as e:
@@ -326,25 +644,56 @@ def generate_token():
         print("=" * 80)
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/sesi', methods=['GET'])
+def api_sesi_aktif():
+    """API daftar sesi absensi yang sedang berjalan (semua guru/kelas)"""
+    if 'guru' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    try:
+        return jsonify({
+            'success': True,
+            'data': get_sesi_aktif(),
+            'id_sesi': session.get('id_sesi'),
+        }), 200
+    except Error as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+@app.route('/api/sesi/selesai', methods=['POST'])
+def api_sesi_selesai():
+    """Akhiri sesi absensi guru yang sedang aktif (token QR-nya langsung tidak berlaku)"""
+    if 'guru' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    id_sesi = session.get('id_sesi')
+    if id_sesi is None:
+        return jsonify({'success': False, 'message': 'Tidak ada sesi aktif'}), 400
+    try:
+        end_sesi(id_sesi, session['guru'])
+    except Error as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+    if session.get('active_token'):
+        token_cache.invalidate(session['active_token'])
+    for key in ('id_sesi', 'sesi_kelas', 'active_token'):
+        session.pop(key, None)
+    return jsonify({'success': True, 'message': 'Sesi absensi diakhiri'}), 200
+
 @app.route('/qrcodes/<filename>')
 def serve_qr(filename):
-    filepath = os.path.join(OUT_DIR, filename)
+    """Layani gambar QR dari cache memori"""
+    qr_id = filename[:-len('.png')] if filename.endswith('.png') else filename
+    png = qr_images.get(qr_id)
 
-    # Cek apakah file ada
-    if not os.path.exists(filepath):
-        print(f"[ERROR] File not found: {filepath}")
+    if png is None:
         return "QR Code not found", 404
 
-    # Cek apakah bisa dibaca
-    if not os.access(filepath, os.R_OK):
-        print(f"[ERROR] Permission denied: {filepath}")
-        return "Access denied", 403
+    return send_file(io.BytesIO(png), mimetype='image/png', max_age=TOKEN_TTL_SECONDS)
 
-    try:
-        return send_file(filepath, mimetype='image/png')
-    except Exception as e:
-        print(f"[ERROR] Failed to serve QR: {e}")
-        return "Internal Server Error", 500
+@app.route('/assets/<filename>')
+def serve_asset(filename):
+    """Layani CSS/JS berhash (immutable, pre-kompresi gzip)"""
+    response = assets.response(filename)
+    if response is None:
+        return "Asset not found", 404
+    return response
 
 # ========================================
 # ROUTES - SISWA
@@ -357,13 +706,20 @@ def login_siswa():
     password = request.form.get('password')
     siswa = get_siswa_by_username(username)
 
-    if not siswa or siswa['password'] != password:
+    try:
+        valid, new_hash = password_hasher.verify(siswa['password'], password) if siswa else (False, None)
+    except HasherBusy:
+        return "Server sedang sibuk, silakan coba lagi", 503
+    if not valid:
         return "Login gagal: username/password salah", 401
+    if new_hash:
+        update_siswa_password(siswa['id_siswa'], new_hash)
 
     session.clear()
     session['id_siswa'] = siswa['id_siswa']
     session['username'] = siswa['username']
     session['nama_siswa'] = siswa['nama_siswa']
+    cache_profile('siswa', siswa['id_siswa'], siswa)
     return redirect(url_for('siswa_dashboard'))
 
 @app.route('/siswa')
@@ -373,8 +729,25 @@ def siswa_dashboard():
         return redirect(url_for('index'))
 
     id_s = session['id_siswa']
-    history = get_absensi_by_id_siswa(id_s)
-    return render_template('siswa.html', nama=session.get('nama_siswa'), history=history)
+    history = get_riwayat_siswa(id_s)
+    return render_template('siswa.html', id_siswa=id_s, nama=session.get('nama_siswa'), history=history)
+
+@app.route('/api/riwayat', methods=['GET'])
+def api_riwayat_siswa():
+    """API riwayat absensi siswa yang login; ?since=<id_absen> hanya mengembalikan baris yang lebih baru"""
+    if 'id_siswa' not in session:
+        return jsonify({'success': False, 'message': 'Siswa belum login'}), 401
+
+    try:
+        since = int(request.args.get('since') or 0)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Parameter since tidak valid'}), 400
+
+    rows = get_riwayat_siswa(session['id_siswa'])
+    if since:
+        rows = [row for row in rows if row['id_absen'] > since]
+    latest = rows[0]['id_absen'] if rows else (since or None)
+    return jsonify({'success': True, 'data': rows, 'since': latest}), 200
 
 @app.route('/scan_token', methods=['POST'])
 def scan_token():
@@ -383,156 +756,413 @@ def scan_token():
         return jsonify({'status': 'error', 'message': 'Siswa belum login'}), 401
 
     data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({'status': 'error', 'message': 'JSON tidak valid'}), 400
     token = data.get('token')
 
     if not token:
         return jsonify({'status': 'error', 'message': 'Token kosong'}), 400
-
-    # Verifikasi token
-    row = verify_token(token)
-    if not row:
-        return jsonify({'status': 'error', 'message': 'Token tidak valid atau sudah expired'}), 400
-
-    # ✅ CEK WAKTU KADALUARSA DENGAN WIB
-    waktu_sekarang_wib = get_current_time_wib()
-    
-    # Konversi waktu_expired dari database ke WIB jika belum
-    waktu_expired = row['waktu_expired']
-    if waktu_expired.tzinfo is None:
-        waktu_expired = WIB.localize(waktu_expired)
-    
-    if waktu_sekarang_wib > waktu_expired:
-        return jsonify({'status': 'error', 'message': 'Token sudah kadaluarsa'}), 400
-
-    # Insert absensi
-    success = insert_absen_by_id(session['id_siswa'], token)
-    if success:
-        return jsonify({'status': 'success', 'message': 'Absensi berhasil tercatat'})
+    if not isinstance(token, str):
+        return jsonify({'status': 'error', 'message': 'Token tidak valid'}), 400
+
+    # Scan berulang (token sama, siswa sama) -> jawab dari memori tanpa ke database
+    idem_key = f"scan:{session['id_siswa']}:{token}"
+    cached = scan_results.get(idem_key)
+    if cached:
+        return jsonify(cached)
+
+    # Validasi token dari cache (tanpa query saat hit)
+    status, expires_at, kelas = lookup_token(token)
+    error = token_error_response(status, expires_at)
+    if error:
+        return jsonify(error[0]), error[1]
+
+    # Sesi khusus kelas: kelas siswa dicek dari profil (cache, fallback database)
+    profil = get_siswa_profile(session['id_siswa']) if kelas else profiles.get(f"profil:siswa:{session['id_siswa']}")
+    error = kelas_error_response(kelas, profil)
+    if error:
+        return jsonify(error[0]), error[1]
+
+    # Validasi token + insert absensi dalam satu round-trip (atau antre di write-behind)
+    if absen_queue is not None:
+        hasil = enqueue_absen(session['id_siswa'], token)
     else:
-        return jsonify({'status': 'warning', 'message': 'Anda sudah absen hari ini'})
+        hasil = insert_absen_by_id(session['id_siswa'], token, profil)
+    body, code = checkin_response(hasil, token, idem_key, expires_at)
+    return jsonify(body), code
+
+@app.route('/scan_token/batch', methods=['POST'])
+def scan_token_batch():
+    """
+    Kirim ulang antrean scan offline siswa: {scans: [{token}]}.
+    Token harus masih berlaku saat request diterima (plus SCAN_BATCH_GRACE_SECONDS) dan
+    waktu absen memakai jam server. Hasil per scan (urutan sama dengan scans) bersifat final;
+    gagal 5xx berarti kirim ulang.
+    """
+    if 'id_siswa' not in session:
+        return jsonify({'status': 'error', 'message': 'Siswa belum login'}), 401
+
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'status': 'error', 'message': 'JSON tidak valid'}), 400
+    scans = data.get('scans')
+    if not isinstance(scans, list) or not scans:
+        return jsonify({'status': 'error', 'message': 'Daftar scan kosong'}), 400
+    if len(scans) > SCAN_BATCH_MAX_ITEMS:
+        return jsonify({'status': 'error', 'message': f'Maksimal {SCAN_BATCH_MAX_ITEMS} scan per request'}), 400
+
+    id_siswa = session['id_siswa']
+    results = [None] * len(scans)
+    valid = []
+    profil = profiles.get(f"profil:siswa:{id_siswa}")
+    for idx, item in enumerate(scans):
+        body, scan = check_offline_scan(item, id_siswa)
+        if body is None:
+            token, expires_at, kelas = scan
+            if kelas and profil is None:
+                profil = get_siswa_profile(id_siswa)
+            error = kelas_error_response(kelas, profil)
+            if error:
+                body = error[0]
+            else:
+                valid.append((idx, token, expires_at))
+        results[idx] = body
+
+    if valid:
+        try:
+            hasil = checkin_batch(id_siswa, list(dict.fromkeys(scan[1] for scan in valid)), profil)
+        except Error as e:
+            print(f"[ERROR] Check-in batch: {e}")
+            return jsonify({'status': 'error', 'message': 'Server sibuk, scan akan dikirim ulang'}), 503
+        for idx, token, expires_at in valid:
+            results[idx] = checkin_response(hasil[token], token, f"scan:{id_siswa}:{token}", expires_at)[0]
+
+    return jsonify({'status': 'success', 'results': results}), 200
 
 
 # ========================================
 # API - ABSENSI
 # ========================================
+def parse_tanggal_arg(name):
+    """Ambil query param tanggal (YYYY-MM-DD) sebagai date, None jika kosong"""
+    value = request.args.get(name, '')
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def parse_absensi_filters():
+    """Filter absensi dari query string (dipakai API, dashboard & export); ValueError jika format salah"""
+    filters = {
+        'kelas': request.args.get('kelas') or None,
+        'jurusan': request.args.get('jurusan') or None,
+        'dari': parse_tanggal_arg('dari'),
+        'sampai': parse_tanggal_arg('sampai'),
+        'bulan': request.args.get('bulan') or None,
+    }
+    if filters['bulan']:
+        # Validasi format bulan lebih awal
+        bulan_range(filters['bulan'])
+    return filters
+
 @app.route('/api/absensi', methods=['GET'])
+@response_cache.cached('absensi', 'siswa')
 def api_get_absensi():
-    """API data absensi"""
+    """API data absensi (per halaman, filter: kelas, jurusan, bulan, dari, sampai, cursor, limit)"""
     try:
-        data = get_all_absensi()
+        try:
+            limit = min(max(int(request.args.get('limit', ABSENSI_PAGE_SIZE)), 1), ABSENSI_MAX_PAGE_SIZE)
+            data, next_cursor = get_absensi_page(
+                limit=limit,
+                cursor=request.args.get('cursor') or None,
+                **parse_absensi_filters()
+            )
+        except ValueError as e:
+            return jsonify({'success': False, 'message': f'Parameter tidak valid: {e}'}), 400
 
         for row in data:
             if isinstance(row.get('waktu_absen'), datetime):
                 row['waktu_absen'] = row['waktu_absen'].strftime('%Y-%m-%d %H:%M:%S')
 
-        return jsonify({'success': True, 'data': data}), 200
+        return jsonify({'success': True, 'data': data, 'next_cursor': next_cursor}), 200
 
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
+def live_channel(sess, kelas=None, scope=None):
+    """Channel live push untuk dashboard: kelas, sesi/token aktif guru (scope=token), atau semua"""
+    if kelas:
+        return f"kelas:{kelas}"
+    if scope == 'token' and sess.get('id_sesi') is not None:
+        # Channel sesi tidak berubah saat token dirotasi
+        return f"sesi:{sess['id_sesi']}"
+    if scope == 'token' and sess.get('active_token'):
+        return f"token:{sess['active_token']}"
+    return "semua"
+
+@app.route('/api/absensi/stream', methods=['GET'])
+def api_absensi_stream():
+    """
+    Server-Sent Events: hanya baris absensi baru (delta).
+    Scope: ?kelas=..., atau sesi/token aktif guru (?scope=token), default semua.
+    """
+    if 'guru' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    channel = live_channel(session, request.args.get('kelas'), request.args.get('scope'))
+
+    def generate():
+        sub = live_broker.subscribe(channel)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                message = sub.get(timeout=LIVE_KEEPALIVE_SECONDS)
+                if message is None:
+                    # Keepalive agar proxy tidak memutus koneksi yang diam
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: absen\ndata: {json.dumps(message)}\n\n"
+        finally:
+            live_broker.unsubscribe(sub)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# ========================================
+# API - REKAP
+# ========================================
+
+@app.route('/api/rekap', methods=['GET'])
+def api_get_rekap():
+    """API rekap kehadiran bulanan (filter: bulan, kelas, jurusan, group=kelas|hari)"""
+    if 'guru' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    try:
+        bulan = request.args.get('bulan') or get_current_time_wib().strftime('%Y-%m')
+        awal, akhir = bulan_range(bulan)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Parameter tidak valid: {e}'}), 400
+
+    group = request.args.get('group', 'kelas')
+    if group not in ('kelas', 'hari'):
+        return jsonify({'success': False, 'message': "group harus 'kelas' atau 'hari'"}), 400
+
+    try:
+        data = get_rekap(awal.date(), akhir.date(), group=group,
+                         kelas=request.args.get('kelas') or None,
+                         jurusan=request.args.get('jurusan') or None)
+
+        for row in data:
+            if row.get('tanggal') is not None:
+                row['tanggal'] = row['tanggal'].strftime('%Y-%m-%d')
+            for key in ('jumlah_hadir', 'jumlah_siswa', 'persen_hadir'):
+                if row.get(key) is not None:
+                    row[key] = float(row[key]) if key == 'persen_hadir' else int(row[key])
+
+        return jsonify({'success': True, 'bulan': awal.strftime('%Y-%m'), 'group': group, 'data': data}), 200
+
+    except Error as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
+@app.route('/api/rekap/rollup', methods=['POST'])
+def api_rollup_rekap():
+    """API hitung ulang rekap satu tanggal (default: hari ini)"""
+    if 'guru' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    try:
+        tanggal = parse_tanggal_arg('tanggal') or get_current_time_wib().date()
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Parameter tidak valid: {e}'}), 400
+
+    try:
+        rollup_rekap(tanggal)
+        return jsonify({'success': True, 'message': f'Rekap {tanggal} dihitung ulang'}), 200
+    except Error as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'}), 500
+
 # ========================================
 # EXPORT EXCEL
 # ========================================
 
+# Ukuran chunk fetch dari cursor unbuffered & jumlah baris sampel untuk lebar kolom
+EXPORT_FETCH_SIZE = int(os.environ.get('EXPORT_FETCH_SIZE', '1000'))
+EXPORT_WIDTH_SAMPLE = 200
+EXPORT_HEADERS = ['ID Absen', 'NIS', 'Nama Siswa', 'Kelas', 'Jurusan', 'Waktu Absen', 'Status']
+
+def iter_query_rows(query, params):
+    """Stream baris query per chunk dari cursor unbuffered (memori konstan)"""
+    with db_cursor() as cur:
+        cur.execute(query, params)
+        try:
+            while True:
+                chunk = cur.fetchmany(EXPORT_FETCH_SIZE)
+                if not chunk:
+                    break
+                yield from chunk
+        finally:
+            # Habiskan sisa hasil jika stream diputus agar koneksi bersih saat kembali ke pool
+            while cur.fetchmany(EXPORT_FETCH_SIZE):
+                pass
+
+def iter_export_rows(query, params):
+    """Stream baris export absensi yang sudah diformat"""
+    for id_absen, nis, nama_siswa, kelas, jurusan, waktu_absen, status in iter_query_rows(query, params):
+        # Format waktu
+        if isinstance(waktu_absen, datetime):
+            waktu_absen = waktu_absen.strftime('%Y-%m-%d %H:%M:%S')
+        else:
+            waktu_absen = str(waktu_absen)
+        yield [id_absen, nis or '', nama_siswa or '', kelas or '', jurusan or '',
+               waktu_absen, status or 'hadir']
+
+def write_export_xlsx(rows, fileobj, headers=EXPORT_HEADERS, title="Riwayat Absensi"):
+    """Tulis baris export ke workbook write-only (tidak menyimpan sheet di memori)"""
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(title)
+
+    # Lebar kolom dari sampel baris pertama, bukan scan penuh
+    sample = list(itertools.islice(rows, EXPORT_WIDTH_SAMPLE))
+    for idx, header in enumerate(headers):
+        length = max([len(header)] + [len(str(row[idx])) for row in sample])
+        ws.column_dimensions[get_column_letter(idx + 1)].width = min(length + 2, 50)
+
+    ws.append(headers)
+    for row in itertools.chain(sample, rows):
+        ws.append(row)
+
+    wb.save(fileobj)
+
+def iter_export_csv(rows, headers=EXPORT_HEADERS):
+    """Stream CSV per potongan ~64KB"""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    # BOM agar Excel membaca UTF-8 dengan benar
+    buf.write('\ufeff')
+    writer.writerow(headers)
+    for row in rows:
+        writer.writerow(row)
+        if buf.tell() >= 65536:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate(0)
+    yield buf.getvalue()
+
 @app.route('/export_absensi', methods=['GET'])
 def export_absensi():
-    """Export riwayat absensi ke file Excel (.xlsx) """
+    """Export riwayat absensi ke file Excel (.xlsx) atau CSV (?format=csv)"""
     if 'guru' not in session:
         return redirect(url_for('index'))
 
     # Ambil parameter filter
-    kelas = request.args.get('kelas', '')
-    jurusan = request.args.get('jurusan', '')
-    bulan = request.args.get('bulan', '')
-
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
+    try:
+        filters = parse_absensi_filters()
+    except ValueError as e:
+        return f"Parameter tidak valid: {e}", 400
+    export_format = request.args.get('format', 'xlsx')
 
     # Query yang sama dengan API filter
     query = """
-        SELECT a.*, s.nis, s.nama_siswa, s.kelas, s.jurusan
+        SELECT a.id_absen, s.nis, a.nama_siswa, a.kelas, a.jurusan, a.waktu_absen, a.status
         FROM absensi a
         JOIN siswa s ON a.id_siswa = s.id_siswa
         WHERE 1=1
     """
-    params = []
+    where, params = absensi_filter_clause(**filters)
+    for predicate in where:
+        query += " AND " + predicate
 
-    query += " ORDER BY a.waktu_absen DESC"
+    query += " ORDER BY a.waktu_absen DESC, a.id_absen DESC"
 
-    cur.execute(query, params)
-    absensi_list = cur.fetchall()
-    cur.close()
-    conn.close()
-
-    # Buat workbook Excel
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Riwayat Absensi"
-
-    headers = ['ID Absen', 'NIS', 'Nama Siswa', 'Kelas', 'Jurusan', 'Waktu Absen', 'Status']
-    ws.append(headers)
-
-    for item in absensi_list:
-        # Format waktu
-        waktu_absen = item.get('waktu_absen')
-        if isinstance(waktu_absen, datetime):
-            waktu_absen = waktu_absen.strftime('%Y-%m-%d %H:%M:%S')
-        else:
-            waktu_absen = str(waktu_absen)
+    rows = iter_export_rows(query, params)
 
-        ws.append([
-            item.get('id_absen', ''),
-            item.get('nis', ''),
-            item.get('nama_siswa', ''),
-            item.get('kelas', ''),
-            item.get('jurusan', ''),
-            waktu_absen,
-            item.get('status', 'hadir')
-        ])
-
-    # Auto-adjust column width
-    for column_cells in ws.columns:
-        length = max(len(str(cell.value)) for cell in column_cells)
-        ws.column_dimensions[column_cells[0].column_letter].width = min(length + 2, 50)
+    # ✅ GUNAKAN WAKTU WIB UNTUK FILENAME
+    filename = f"absensi{get_current_time_wib().strftime('%Y%m%d%H%M%S')}"
 
-    bio = io.BytesIO()
-    wb.save(bio)
-    bio.seek(0)
+    if export_format == 'csv':
+        return Response(
+            stream_with_context(iter_export_csv(rows)),
+            mimetype='text/csv; charset=utf-8',
+            headers={'Content-Disposition': f'attachment; filename={filename}.csv'}
+        )
 
-    # ✅ GUNAKAN WAKTU WIB UNTUK FILENAME
-    filename = f"absensi{get_current_time_wib().strftime('%Y%m%d%H%M%S')}.xlsx"
+    # Workbook ditulis ke file sementara lalu di-stream dari disk
+    tmp = tempfile.TemporaryFile()
+    try:
+        write_export_xlsx(rows, tmp)
+    except Exception:
+        rows.close()
+        tmp.close()
+        raise
+    tmp.seek(0)
 
     return send_file(
-        bio,
+        tmp,
         as_attachment=True,
-        download_name=filename,
+        download_name=f"{filename}.xlsx",
         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
     )
+
 # ========================================
 # API CRUD - SISWA
 # ========================================
 
+# Kolom siswa yang dikirim ke klien (tanpa password)
+SISWA_COLUMNS = "id_siswa, username, nis, nama_siswa, jurusan, kelas"
+SISWA_EXPORT_HEADERS = ['ID Siswa', 'Username', 'NIS', 'Nama Siswa', 'Jurusan', 'Kelas']
+SISWA_PAGE_SIZE = int(os.environ.get('SISWA_PAGE_SIZE', '100'))
+SISWA_MAX_PAGE_SIZE = 1000
+SISWA_IMPORT_BATCH_SIZE = int(os.environ.get('SISWA_IMPORT_BATCH_SIZE', '500'))
+# Jumlah maksimum error per baris yang dikirim di response import
+SISWA_IMPORT_MAX_ERRORS = 200
+
+def siswa_filter_clause(kelas=None, jurusan=None):
+    where, params = [], []
+    if kelas:
+        where.append("kelas = %s")
+        params.append(kelas)
+    if jurusan:
+        where.append("jurusan = %s")
+        params.append(jurusan)
+    return where, params
+
 @app.route('/api/siswa', methods=['GET'])
+@response_cache.cached('siswa')
 def api_get_siswa():
-    """API GET - Ambil semua data siswa"""
+    """API GET - Data siswa per halaman (keyset id_siswa; filter: kelas, jurusan, cursor, limit)"""
     try:
-        connection = get_db_connection()
-        if connection is None:
-            return jsonify({
-                'success': False,
-                'message': 'Koneksi database gagal'
-            }), 500
-
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM siswa ORDER BY id_siswa ASC")
-        data = cursor.fetchall()
-
-        cursor.close()
-        connection.close()
+        try:
+            limit = min(max(int(request.args.get('limit', SISWA_PAGE_SIZE)), 1), SISWA_MAX_PAGE_SIZE)
+            cursor_id = int(request.args.get('cursor') or 0)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': f'Parameter tidak valid: {e}'}), 400
+
+        where, params = siswa_filter_clause(request.args.get('kelas'), request.args.get('jurusan'))
+        if cursor_id:
+            where.append("id_siswa > %s")
+            params.append(cursor_id)
+        query = f"SELECT {SISWA_COLUMNS} FROM siswa"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY id_siswa ASC LIMIT %s"
+        params.append(limit + 1)
+
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute(query, params)
+            data = cursor.fetchall()
+
+        next_cursor = None
+        if len(data) > limit:
+            data = data[:limit]
+            next_cursor = str(data[-1]['id_siswa'])
 
         return jsonify({
             'success': True,
-            'data': data
+            'data': data,
+            'next_cursor': next_cursor
         }), 200
 
     except Error as e:
@@ -561,27 +1191,16 @@ def api_add_siswa():
                 'message': 'Data tidak lengkap. Username, password, NIS, dan nama siswa wajib diisi.'
             }), 400
 
-        connection = get_db_connection()
-        if connection is None:
-            return jsonify({
-                'success': False,
-                'message': 'Koneksi database gagal'
-            }), 500
-
-        cursor = connection.cursor()
         query = """
             INSERT INTO siswa (username, password, nis, nama_siswa, jurusan, kelas)
             VALUES (%s, %s, %s, %s, %s, %s)
         """
-        values = (username, password, nis, nama_siswa, jurusan, kelas)
-
-        cursor.execute(query, values)
-        connection.commit()
+        values = (username, password_hasher.hash(password), nis, nama_siswa, jurusan, kelas)
 
-        last_id = cursor.lastrowid
-
-        cursor.close()
-        connection.close()
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(query, values)
+            last_id = cursor.lastrowid
+        response_cache.bump('siswa')
 
         return jsonify({
             'success': True,
@@ -589,29 +1208,186 @@ def api_add_siswa():
             'id': last_id
         }), 201
 
+    except HasherBusy:
+        return jsonify({'success': False, 'message': 'Server sedang sibuk, silakan coba lagi'}), 503
     except Error as e:
         return jsonify({
             'success': False,
             'message': f'Error: {str(e)}'
         }), 500
 
+def upsert_siswa_batch(cur, batch, dry_run=False):
+    """
+    Upsert satu batch import dengan satu INSERT multi-baris (ON DUPLICATE KEY username).
+    Baris tanpa password hanya boleh memperbarui siswa yang sudah ada (password lama dipertahankan).
+    Mengembalikan (id_siswa yang tersentuh, daftar error per baris).
+    """
+    errors = []
+    tanpa_password = [record['username'] for _, record in batch if not record['password']]
+    existing = set()
+    if tanpa_password:
+        marks = ", ".join(["%s"] * len(tanpa_password))
+        cur.execute(f"SELECT username FROM siswa WHERE username IN ({marks})", tanpa_password)
+        existing = {row[0] for row in cur.fetchall()}
+
+    records = []
+    for line_no, record in batch:
+        if not record['password'] and record['username'] not in existing:
+            errors.append({'baris': line_no, 'message': 'Password wajib untuk siswa baru'})
+            continue
+        records.append(record)
+    if not records:
+        return [], errors
+
+    # Hash di worker pool (semua worker); dry run tidak perlu menghitung KDF
+    passwords = [r['password'] for r in records if r['password']]
+    hashes = iter(['-'] * len(passwords) if dry_run else password_hasher.hash_many(passwords))
+
+    params = []
+    for r in records:
+        params.extend([r['username'], next(hashes) if r['password'] else '', r['nis'],
+                       r['nama_siswa'], r['jurusan'], r['kelas']])
+    values_sql = ", ".join(["(%s, %s, %s, %s, %s, %s)"] * len(records))
+    cur.execute(f"""
+        INSERT INTO siswa (username, password, nis, nama_siswa, jurusan, kelas)
+        VALUES {values_sql}
+        ON DUPLICATE KEY UPDATE
+            password = IF(VALUES(password) = '', password, VALUES(password)),
+            nis = VALUES(nis),
+            nama_siswa = VALUES(nama_siswa),
+            jurusan = VALUES(jurusan),
+            kelas = VALUES(kelas)
+    """, params)
+
+    usernames = [r['username'] for r in records]
+    marks = ", ".join(["%s"] * len(usernames))
+    cur.execute(f"SELECT id_siswa FROM siswa WHERE username IN ({marks})", usernames)
+    return [row[0] for row in cur.fetchall()], errors
+
+@app.route('/api/siswa/import', methods=['POST'])
+def api_import_siswa():
+    """
+    API POST - Import siswa massal dari CSV/XLSX (field 'file').
+    Kolom: username, password, nis, nama/nama_siswa, jurusan, kelas (kolom Role opsional).
+    Baris valid di-upsert per batch dalam satu transaksi; baris tidak valid dilaporkan per nomor baris.
+    ?dry_run=1 hanya memvalidasi (transaksi di-rollback).
+    """
+    if 'guru' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    upload = request.files.get('file')
+    if upload is None or not upload.filename:
+        return jsonify({'success': False, 'message': 'File CSV/XLSX wajib diunggah (field "file")'}), 400
+
+    ext = os.path.splitext(upload.filename)[1].lower()
+    if ext == '.csv':
+        rows = iter_csv_rows(upload.stream)
+    elif ext in ('.xlsx', '.xlsm'):
+        rows = iter_xlsx_rows(upload.stream, load_workbook)
+    else:
+        return jsonify({'success': False, 'message': 'Format file harus .csv atau .xlsx'}), 400
+
+    dry_run = request.args.get('dry_run') == '1'
+    errors = []
+    jumlah_error = 0
+    id_siswa_list = []
+
+    try:
+        with db_pool.connection() as conn:
+            cur = conn.cursor()
+            try:
+                batch = []
+                for line_no, record, error in iter_siswa_records(rows):
+                    if error:
+                        errors.append({'baris': line_no, 'message': error})
+                        continue
+                    batch.append((line_no, record))
+                    if len(batch) >= SISWA_IMPORT_BATCH_SIZE:
+                        ids, batch_errors = upsert_siswa_batch(cur, batch, dry_run)
+                        id_siswa_list.extend(ids)
+                        errors.extend(batch_errors)
+                        batch = []
+                    if len(errors) > SISWA_IMPORT_MAX_ERRORS:
+                        jumlah_error += len(errors) - SISWA_IMPORT_MAX_ERRORS
+                        del errors[SISWA_IMPORT_MAX_ERRORS:]
+                if batch:
+                    ids, batch_errors = upsert_siswa_batch(cur, batch, dry_run)
+                    id_siswa_list.extend(ids)
+                    errors.extend(batch_errors)
+
+                if dry_run:
+                    conn.rollback()
+                else:
+                    conn.commit()
+            finally:
+                cur.close()
+    except ImportFormatError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Error as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)} (tidak ada data yang disimpan)'}), 500
+
+    jumlah_error += len(errors)
+    if not dry_run and id_siswa_list:
+        for id_siswa in id_siswa_list:
+            invalidate_profile('siswa', id_siswa)
+        response_cache.bump('siswa')
+        # Jumlah siswa per kelas berubah: hitung ulang rekap hari ini
+        rollup_rekap(get_current_time_wib().date())
+
+    return jsonify({
+        'success': True,
+        'message': f"{len(id_siswa_list)} siswa {'valid' if dry_run else 'diimport'}, {jumlah_error} baris error",
+        'dry_run': dry_run,
+        'diproses': len(id_siswa_list),
+        'jumlah_error': jumlah_error,
+        'errors': errors[:SISWA_IMPORT_MAX_ERRORS]
+    }), 200
+
+@app.route('/api/siswa/export', methods=['GET'])
+def api_export_siswa():
+    """API GET - Export data siswa (tanpa password) ke XLSX atau CSV (?format=csv), filter kelas/jurusan"""
+    if 'guru' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+
+    where, params = siswa_filter_clause(request.args.get('kelas'), request.args.get('jurusan'))
+    query = f"SELECT {SISWA_COLUMNS} FROM siswa"
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY id_siswa ASC"
+
+    rows = ([v if v is not None else '' for v in row] for row in iter_query_rows(query, params))
+    filename = f"siswa{get_current_time_wib().strftime('%Y%m%d%H%M%S')}"
+
+    if request.args.get('format') == 'csv':
+        return Response(
+            stream_with_context(iter_export_csv(rows, SISWA_EXPORT_HEADERS)),
+            mimetype='text/csv; charset=utf-8',
+            headers={'Content-Disposition': f'attachment; filename={filename}.csv'}
+        )
+
+    tmp = tempfile.TemporaryFile()
+    try:
+        write_export_xlsx(rows, tmp, SISWA_EXPORT_HEADERS, "Data Siswa")
+    except Exception:
+        rows.close()
+        tmp.close()
+        raise
+    tmp.seek(0)
+
+    return send_file(
+        tmp,
+        as_attachment=True,
+        download_name=f"{filename}.xlsx",
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
 @app.route('/api/siswa/<int:id_siswa>', methods=['GET'])
 def api_get_siswa_by_id(id_siswa):
     """API GET - Ambil satu data siswa berdasarkan ID"""
     try:
-        connection = get_db_connection()
-        if connection is None:
-            return jsonify({
-                'success': False,
-                'message': 'Koneksi database gagal'
-            }), 500
-
-        cursor = connection.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM siswa WHERE id_siswa=%s", (id_siswa,))
-        data = cursor.fetchone()
-
-        cursor.close()
-        connection.close()
+        with db_cursor(dictionary=True) as cursor:
+            cursor.execute(f"SELECT {SISWA_COLUMNS} FROM siswa WHERE id_siswa=%s", (id_siswa,))
+            data = cursor.fetchone()
 
         if data is None:
             return jsonify({
@@ -643,47 +1419,48 @@ def api_update_siswa(id_siswa):
         jurusan = data.get('jurusan', '')
         kelas = data.get('kelas', '')
 
-        # Validasi data
-        if not username or not password or not nis or not nama_siswa:
+        # Validasi data (password boleh kosong = tidak diubah)
+        if not username or not nis or not nama_siswa:
             return jsonify({
                 'success': False,
-                'message': 'Data tidak lengkap. Username, password, NIS, dan nama siswa wajib diisi.'
+                'message': 'Data tidak lengkap. Username, NIS, dan nama siswa wajib diisi.'
             }), 400
 
-        connection = get_db_connection()
-        if connection is None:
-            return jsonify({
-                'success': False,
-                'message': 'Koneksi database gagal'
-            }), 500
+        if password:
+            query = """
+                UPDATE siswa
+                SET username=%s, password=%s, nis=%s, nama_siswa=%s, jurusan=%s, kelas=%s
+                WHERE id_siswa=%s
+            """
+            values = (username, password_hasher.hash(password), nis, nama_siswa, jurusan, kelas, id_siswa)
+        else:
+            query = """
+                UPDATE siswa
+                SET username=%s, nis=%s, nama_siswa=%s, jurusan=%s, kelas=%s
+                WHERE id_siswa=%s
+            """
+            values = (username, nis, nama_siswa, jurusan, kelas, id_siswa)
 
-        cursor = connection.cursor()
-        query = """
-            UPDATE siswa
-            SET username=%s, password=%s, nis=%s, nama_siswa=%s, jurusan=%s, kelas=%s
-            WHERE id_siswa=%s
-        """
-        values = (username, password, nis, nama_siswa, jurusan, kelas, id_siswa)
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(query, values)
+            affected = cursor.rowcount
 
-        cursor.execute(query, values)
-        connection.commit()
+        invalidate_profile('siswa', id_siswa)
+        response_cache.bump('siswa')
 
-        if cursor.rowcount == 0:
-            cursor.close()
-            connection.close()
+        if affected == 0:
             return jsonify({
                 'success': False,
                 'message': 'Siswa tidak ditemukan'
             }), 404
 
-        cursor.close()
-        connection.close()
-
         return jsonify({
             'success': True,
             'message': 'Data siswa berhasil diupdate'
         }), 200
 
+    except HasherBusy:
+        return jsonify({'success': False, 'message': 'Server sedang sibuk, silakan coba lagi'}), 503
     except Error as e:
         return jsonify({
             'success': False,
@@ -694,30 +1471,21 @@ def api_update_siswa(id_siswa):
 def api_delete_siswa(id_siswa):
     """API DELETE - Hapus siswa"""
     try:
-        connection = get_db_connection()
-        if connection is None:
-            return jsonify({
-                'success': False,
-                'message': 'Koneksi database gagal'
-            }), 500
-
-        cursor = connection.cursor()
         query = "DELETE FROM siswa WHERE id_siswa=%s"
 
-        cursor.execute(query, (id_siswa,))
-        connection.commit()
+        with db_cursor(commit=True) as cursor:
+            cursor.execute(query, (id_siswa,))
+            affected = cursor.rowcount
 
-        if cursor.rowcount == 0:
-            cursor.close()
-            connection.close()
+        invalidate_profile('siswa', id_siswa)
+        response_cache.bump('siswa')
+
+        if affected == 0:
             return jsonify({
                 'success': False,
                 'message': 'Siswa tidak ditemukan'
             }), 404
 
-        cursor.close()
-        connection.close()
-
         return jsonify({
             'success': True,
             'message': 'Siswa berhasil dihapus'
@@ -729,6 +1497,40 @@ def api_delete_siswa(id_siswa):
             'message': f'Error: {str(e)}'
         }), 500
 
+# ========================================
+# API - STATISTIK POOL DATABASE & SWEEPER
+# ========================================
+
+@app.route('/api/db_pool', methods=['GET'])
+def api_db_pool_stats():
+    """API statistik pool koneksi database"""
+    if 'guru' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    return jsonify({'success': True, 'data': db_pool.stats()}), 200
+
+@app.route('/api/response_cache', methods=['GET'])
+def api_response_cache_stats():
+    """API statistik cache respons (304, hit, miss)"""
+    if 'guru' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    return jsonify({'success': True, 'data': response_cache.stats()}), 200
+
+@app.route('/api/write_behind', methods=['GET'])
+def api_write_behind_stats():
+    """API statistik antrean write-behind absensi"""
+    if 'guru' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    if absen_queue is None:
+        return jsonify({'success': True, 'data': {'enabled': False}}), 200
+    return jsonify({'success': True, 'data': dict(absen_queue.stats(), enabled=True)}), 200
+
+@app.route('/api/token_sweeper', methods=['GET'])
+def api_token_sweeper_stats():
+    """API statistik sweeper token"""
+    if 'guru' not in session:
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 401
+    return jsonify({'success': True, 'data': token_sweeper.stats()}), 200
+
 # ========================================
 # LOGOUT
 # ========================================
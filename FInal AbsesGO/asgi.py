@@ -0,0 +1,405 @@
+# asgi.py
+"""
+Mode serving ASGI untuk produksi.
+
+/scan_token dan /generate_token dilayani handler async (driver aiomysql + pool async),
+/api/absensi/stream (SSE) dilayani langsung di event loop tanpa menahan thread,
+semua route lain diteruskan ke aplikasi Flask yang sama lewat thread pool WSGI (a2wsgi).
+Pemanggilan yang bisa blocking (cache/Redis, broker, journal write-behind) dijalankan di executor.
+
+Menjalankan:
+    uvicorn asgi:application --host 0.0.0.0 --port 5000 --workers 4
+"""
+import asyncio
+import functools
+import json
+import os
+import time
+from datetime import timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+import aiomysql
+from a2wsgi import WSGIMiddleware
+
+import app as flask_app
+from database import (
+    DB_CONFIG, get_current_time_wib, checkin_call, verify_token_query,
+    ROTATE_SESI_TOKEN_SQL, INSERT_SESI_TOKEN_SQL, new_sesi_token,
+)
+from app import (
+    app, TOKEN_TTL_SECONDS, QR_TOKEN_MODE, SIGNED_TOKEN_ROTATE_SECONDS, SIGNED_TOKEN_GRACE_SECONDS,
+    qr_signer, signed_token_status, enqueue_absen, metrics, token_cache, scan_results, profiles,
+    remember_token_row, token_error_response, checkin_response, checkin_result,
+    render_qr_png, store_qr_image, qr_data_uri, kelas_error_response, get_siswa_profile,
+    normalize_kelas, active_sesi_id, remember_sesi, live_broker, live_channel, LIVE_KEEPALIVE_SECONDS,
+)
+
+# Ukuran pool async per worker
+ASYNC_DB_POOL_MIN = int(os.environ.get('ASYNC_DB_POOL_MIN', '1'))
+ASYNC_DB_POOL_MAX = int(os.environ.get('ASYNC_DB_POOL_MAX', '20'))
+# Jumlah thread per worker untuk route Flask (request Flask berjalan paralel di thread ini)
+WSGI_THREADS = int(os.environ.get('WSGI_THREADS', '16'))
+
+wsgi_app = WSGIMiddleware(app, workers=WSGI_THREADS)
+db_pool = None
+
+async def run_blocking(func, *args):
+    """Jalankan fungsi sinkron (cache/Redis, broker, journal) di thread pool, bukan di event loop"""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
+# ========================================
+# DATABASE ASYNC
+# ========================================
+
+async def create_db_pool():
+    # autocommit: koneksi kembali ke pool tanpa transaksi terbuka (aiomysql menutup koneksi
+    # yang masih di dalam transaksi saat release); sp_checkin* mengatur transaksinya sendiri
+    return await aiomysql.create_pool(
+        minsize=ASYNC_DB_POOL_MIN,
+        maxsize=ASYNC_DB_POOL_MAX,
+        host=DB_CONFIG['host'],
+        user=DB_CONFIG['user'],
+        password=DB_CONFIG['password'],
+        db=DB_CONFIG['database'],
+        autocommit=True,
+    )
+
+async def verify_token(token):
+    """Versi async verify_token (hanya dipanggil saat cache token miss)"""
+    async with db_pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(*verify_token_query(token))
+            return await cur.fetchone()
+
+async def start_sesi(guru, kelas):
+    """Versi async start_sesi"""
+    async with db_pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "INSERT INTO sesi_absensi (guru, kelas, waktu_mulai, status) VALUES (%s, %s, %s, 'aktif')",
+                (guru, kelas, get_current_time_wib())
+            )
+            id_sesi = cur.lastrowid
+        await conn.commit()
+    return id_sesi
+
+async def end_sesi(id_sesi, guru):
+    """Versi async end_sesi"""
+    async with db_pool.acquire() as conn:
+        await conn.begin()
+        async with conn.cursor() as cur:
+            await cur.execute(
+                "UPDATE sesi_absensi SET status='selesai', waktu_selesai=%s "
+                "WHERE id_sesi=%s AND guru=%s AND status='aktif'",
+                (get_current_time_wib(), id_sesi, guru)
+            )
+            await cur.execute("UPDATE qr_token SET status='expired' WHERE id_sesi=%s", (id_sesi,))
+        await conn.commit()
+
+async def rotate_sesi_token(id_sesi, token, expires_dt):
+    """Versi async rotate_sesi_token"""
+    waktu_buat_wib = get_current_time_wib()
+    async with db_pool.acquire() as conn:
+        await conn.begin()
+        async with conn.cursor() as cur:
+            await cur.execute(ROTATE_SESI_TOKEN_SQL, (token, waktu_buat_wib, expires_dt, id_sesi))
+            if cur.rowcount == 0:
+                await cur.execute(INSERT_SESI_TOKEN_SQL, (id_sesi, token, waktu_buat_wib, expires_dt))
+        await conn.commit()
+
+async def insert_absen_by_id(id_siswa, token_qr, profil=None):
+    """Versi async insert_absen_by_id: satu CALL sp_checkin / sp_checkin_profil"""
+    row = None
+    query, params = checkin_call(id_siswa, token_qr, get_current_time_wib(), profil)
+    async with db_pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(query, params)
+            row = await cur.fetchone()
+            # Habiskan result set sisa dari CALL
+            while await cur.nextset():
+                pass
+    # Publish live, hapus cache riwayat & bump versi respons (Redis/broker) di thread pool
+    return await run_blocking(checkin_result, row, token_qr, id_siswa)
+
+# ========================================
+# SESSION (SERVER-SIDE, SAMA DENGAN FLASK)
+# ========================================
+
+session_interface = app.session_interface
+SESSION_COOKIE_NAME = app.config['SESSION_COOKIE_NAME']
+
+def load_session(scope):
+    """Muat session server-side dari cookie session id pada header request"""
+    for name, value in scope.get('headers', []):
+        if name == b'cookie':
+            cookie = SimpleCookie()
+            cookie.load(value.decode('latin-1'))
+            if SESSION_COOKIE_NAME in cookie:
+                return session_interface.load(cookie[SESSION_COOKIE_NAME].value)
+    return session_interface.load(None)
+
+def session_cookie_header(session):
+    """Simpan session lalu buat header Set-Cookie dengan atribut yang sama seperti konfigurasi Flask"""
+    parts = [f"{SESSION_COOKIE_NAME}={session_interface.store(session)}", "Path=/"]
+    if app.config['SESSION_COOKIE_HTTPONLY']:
+        parts.append("HttpOnly")
+    if app.config['SESSION_COOKIE_SECURE']:
+        parts.append("Secure")
+    if app.config['SESSION_COOKIE_SAMESITE']:
+        parts.append(f"SameSite={app.config['SESSION_COOKIE_SAMESITE']}")
+    return "; ".join(parts)
+
+# ========================================
+# HELPER ASGI
+# ========================================
+
+async def read_body(receive):
+    body = b''
+    more = True
+    while more:
+        message = await receive()
+        body += message.get('body', b'')
+        more = message.get('more_body', False)
+    return body
+
+async def read_json(receive):
+    """Body JSON request sebagai dict; None jika bukan JSON objek"""
+    try:
+        data = json.loads(await read_body(receive) or b'{}')
+    except ValueError:
+        return None
+    return data if isinstance(data, dict) else None
+
+async def send_json(send, body, status=200, headers=None):
+    payload = json.dumps(body).encode('utf-8')
+    raw_headers = [
+        (b'content-type', b'application/json'),
+        (b'content-length', str(len(payload)).encode('ascii')),
+    ]
+    for name, value in (headers or []):
+        raw_headers.append((name.encode('latin-1'), value.encode('latin-1')))
+    await send({'type': 'http.response.start', 'status': status, 'headers': raw_headers})
+    await send({'type': 'http.response.body', 'body': payload})
+
+# ========================================
+# HANDLER ASYNC
+# ========================================
+
+async def scan_token(scope, receive, send):
+    """Proses scan token QR untuk absensi (async)"""
+    session = await run_blocking(load_session, scope)
+    if 'id_siswa' not in session:
+        return await send_json(send, {'status': 'error', 'message': 'Siswa belum login'}, 401)
+
+    data = await read_json(receive)
+    if data is None:
+        return await send_json(send, {'status': 'error', 'message': 'JSON tidak valid'}, 400)
+    token = data.get('token')
+
+    if not token:
+        return await send_json(send, {'status': 'error', 'message': 'Token kosong'}, 400)
+    if not isinstance(token, str):
+        return await send_json(send, {'status': 'error', 'message': 'Token tidak valid'}, 400)
+
+    # Scan berulang (token sama, siswa sama) -> jawab dari memori tanpa ke database
+    idem_key = f"scan:{session['id_siswa']}:{token}"
+    cached = await run_blocking(scan_results.get, idem_key)
+    if cached:
+        return await send_json(send, cached)
+
+    # Validasi token: bertanda tangan di CPU, selain itu dari cache (tanpa query saat hit)
+    if qr_signer.is_signed(token):
+        status, expires_at, kelas = signed_token_status(token)
+    else:
+        entry = await run_blocking(token_cache.get, token)
+        if entry is None:
+            status, expires_at, kelas = await run_blocking(remember_token_row, token, await verify_token(token))
+        else:
+            status, expires_at, kelas = entry['status'], entry['expires_at'], entry.get('kelas')
+    error = token_error_response(status, expires_at)
+    if error:
+        return await send_json(send, *error)
+
+    # Sesi khusus kelas: kelas siswa dicek dari profil (cache, fallback database di thread pool)
+    profil = await run_blocking(profiles.get, f"profil:siswa:{session['id_siswa']}")
+    if kelas and profil is None:
+        profil = await run_blocking(get_siswa_profile, session['id_siswa'])
+    error = kelas_error_response(kelas, profil)
+    if error:
+        return await send_json(send, *error)
+
+    # Validasi token + insert absensi dalam satu round-trip (atau antre di write-behind)
+    if flask_app.absen_queue is not None:
+        # Dedupe harian (bisa query DB) + fsync journal: jangan di event loop
+        hasil = await run_blocking(enqueue_absen, session['id_siswa'], token)
+    else:
+        hasil = await insert_absen_by_id(session['id_siswa'], token, profil)
+    body, code = await run_blocking(checkin_response, hasil, token, idem_key, expires_at)
+    await send_json(send, body, code)
+
+async def generate_token(scope, receive, send):
+    """Generate token QR baru (async)"""
+    session = await run_blocking(load_session, scope)
+    if session.get('role') != 'guru':
+        return await send_json(send, {'status': 'error', 'message': 'Unauthorized'}, 401)
+
+    data = await read_json(receive)
+    if data is None:
+        return await send_json(send, {'status': 'error', 'message': 'JSON tidak valid'}, 400)
+
+    try:
+        kelas = normalize_kelas(data.get('kelas'))
+
+        # Sesi guru untuk kelas yang sama dirotasi; kelas lain -> sesi lama diakhiri, sesi baru dimulai
+        id_sesi = active_sesi_id(session, kelas)
+        if id_sesi is None:
+            if session.get('id_sesi') is not None:
+                await end_sesi(session['id_sesi'], session['guru'])
+            id_sesi = await start_sesi(session['guru'], kelas)
+
+        # ✅ GUNAKAN WAKTU WIB
+        if QR_TOKEN_MODE == 'signed':
+            # Token bertanda tangan: tidak ada tulis qr_token
+            expires_in = SIGNED_TOKEN_ROTATE_SECONDS + SIGNED_TOKEN_GRACE_SECONDS
+            expires_at = get_current_time_wib() + timedelta(seconds=expires_in)
+            token = qr_signer.sign(id_sesi, kelas, expires_at.timestamp())
+            rotate_in = SIGNED_TOKEN_ROTATE_SECONDS
+        else:
+            expires_in = TOKEN_TTL_SECONDS
+            expires_at = get_current_time_wib() + timedelta(seconds=expires_in)
+            token = new_sesi_token(id_sesi)
+            rotate_in = None
+
+        # Render QR (CPU) di thread pool agar event loop tidak tertahan
+        loop = asyncio.get_running_loop()
+        png_future = loop.run_in_executor(None, render_qr_png, token)
+        if rotate_in is None:
+            # Rotasi token sesi di tempat
+            await rotate_sesi_token(id_sesi, token, expires_at)
+            await run_blocking(token_cache.put_active, token, expires_at.timestamp(), kelas)
+        png = await png_future
+        if png is None:
+            return await send_json(send, {'status': 'error', 'message': 'QR code module not available'}, 500)
+        qr_id = store_qr_image(png)
+
+        remember_sesi(session, id_sesi, kelas, token)
+        set_cookie = await run_blocking(session_cookie_header, session)
+
+        root_path = scope.get('root_path', '')
+        await send_json(send, {
+            'status': 'success',
+            'token': token,
+            'id_sesi': id_sesi,
+            'kelas': kelas,
+            'qr_url': f"{root_path}/qrcodes/{qr_id}.png",
+            'qr_data': qr_data_uri(png),
+            'expires_in': expires_in,
+            'rotate_in': rotate_in
+        }, headers=[('set-cookie', set_cookie)])
+
+    except Exception as e:
+        import traceback
+        print("=" * 80)
+        print("ERROR in /generate_token (async):")
+        print(traceback.format_exc())
+        print("=" * 80)
+        await send_json(send, {'status': 'error', 'message': str(e)}, 500)
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+async def absensi_stream(scope, receive, send):
+    """
+    Server-Sent Events absensi baru (sama dengan route Flask /api/absensi/stream).
+    Menunggu pesan di event loop: pelanggan dibangunkan broker lewat call_soon_threadsafe,
+    sehingga koneksi SSE yang terbuka lama tidak memakan thread.
+    """
+    session = await run_blocking(load_session, scope)
+    if 'guru' not in session:
+        return await send_json(send, {'success': False, 'message': 'Unauthorized'}, 401)
+
+    args = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    channel = live_channel(session, (args.get('kelas') or [None])[0], (args.get('scope') or [None])[0])
+
+    loop = asyncio.get_running_loop()
+    wakeup = asyncio.Event()
+    sub = await run_blocking(functools.partial(
+        live_broker.subscribe, channel, on_message=lambda: loop.call_soon_threadsafe(wakeup.set)))
+    disconnect = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        await send({'type': 'http.response.start', 'status': 200, 'headers': [
+            (b'content-type', b'text/event-stream; charset=utf-8'),
+            (b'cache-control', b'no-cache'),
+            (b'x-accel-buffering', b'no'),
+        ]})
+        await send({'type': 'http.response.body', 'body': b'retry: 3000\n\n', 'more_body': True})
+        while True:
+            wakeup.clear()
+            message = sub.get_nowait()
+            if message is not None:
+                chunk = f"event: absen\ndata: {json.dumps(message)}\n\n"
+                await send({'type': 'http.response.body', 'body': chunk.encode('utf-8'), 'more_body': True})
+                continue
+            waiter = asyncio.ensure_future(wakeup.wait())
+            done, _ = await asyncio.wait({waiter, disconnect}, timeout=LIVE_KEEPALIVE_SECONDS,
+                                         return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+            if disconnect in done:
+                return
+            if not done:
+                # Keepalive agar proxy tidak memutus koneksi yang diam
+                await send({'type': 'http.response.body', 'body': b': keepalive\n\n', 'more_body': True})
+    finally:
+        disconnect.cancel()
+        live_broker.unsubscribe(sub)
+
+ASYNC_ROUTES = {
+    ('POST', '/scan_token'): scan_token,
+    ('POST', '/generate_token'): generate_token,
+    ('GET', '/api/absensi/stream'): absensi_stream,
+}
+
+# ========================================
+# APLIKASI ASGI
+# ========================================
+
+async def application(scope, receive, send):
+    global db_pool
+
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                db_pool = await create_db_pool()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if db_pool is not None:
+                    db_pool.close()
+                    await db_pool.wait_closed()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] == 'http':
+        handler = ASYNC_ROUTES.get((scope['method'], scope['path']))
+        if handler is not None:
+            if db_pool is None:
+                db_pool = await create_db_pool()
+
+            # Handler async tidak lewat hook Flask: catat durasi request di sini
+            started = time.perf_counter()
+            response = {'status': 500}
+
+            async def timed_send(message):
+                if message['type'] == 'http.response.start':
+                    response['status'] = message['status']
+                await send(message)
+
+            try:
+                return await handler(scope, receive, timed_send)
+            finally:
+                metrics.observe_request(scope['path'], scope['method'], response['status'],
+                                        time.perf_counter() - started)
+
+    await wsgi_app(scope, receive, send)
@@ -0,0 +1,125 @@
+# assets.py
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+
+from flask import current_app, request, url_for
+
+# Panjang hash isi file di nama asset (guru.3f9a1c2b7d.js)
+HASH_LENGTH = 10
+# Asset berhash tidak pernah berubah isinya: cache browser/CDN 1 tahun tanpa revalidasi
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+MANIFEST_NAME = 'manifest.json'
+COMPRESS_EXTENSIONS = ('.css', '.js')
+
+
+def _write_atomic(path, data):
+    # Tulis ke file sementara lalu rename: worker lain tidak pernah membaca file setengah jadi
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def build_assets(src_dir, dist_dir, compress_level=9):
+    """
+    Salin setiap file di src_dir ke dist_dir dengan hash isi di namanya,
+    plus versi .gz (pre-kompresi), lalu tulis manifest {nama asli: nama berhash}.
+    File versi lama dibiarkan agar halaman yang masih terbuka tetap bisa memuatnya.
+    """
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = {}
+    for name in sorted(os.listdir(src_dir)):
+        src_path = os.path.join(src_dir, name)
+        if not os.path.isfile(src_path):
+            continue
+        with open(src_path, 'rb') as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        hashed = f"{stem}.{hashlib.sha256(data).hexdigest()[:HASH_LENGTH]}{ext}"
+        manifest[name] = hashed
+
+        dist_path = os.path.join(dist_dir, hashed)
+        if not os.path.exists(dist_path):
+            _write_atomic(dist_path, data)
+        if ext in COMPRESS_EXTENSIONS and not os.path.exists(dist_path + '.gz'):
+            # mtime=0: hasil gzip deterministik untuk isi yang sama
+            _write_atomic(dist_path + '.gz', gzip.compress(data, compress_level, mtime=0))
+
+    _write_atomic(os.path.join(dist_dir, MANIFEST_NAME),
+                  json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+    return manifest
+
+
+class AssetManifest:
+    """
+    Asset statis (CSS/JS) dengan nama berhash isi & cache immutable.
+
+    - asset_url('guru.js') di template -> /assets/guru.<hash>.js sesuai manifest build;
+      isi berubah = nama berubah, jadi browser cukup mengunduh sekali per versi
+    - file .gz hasil build dikirim apa adanya ke klien yang menerima gzip (tanpa kompresi per request)
+    - tanpa manifest (belum di-build) asset dilayani dari folder sumber lewat /static tanpa cache panjang
+    """
+
+    def __init__(self, src_dir, dist_dir):
+        self.src_dir = src_dir
+        self.dist_dir = dist_dir
+        self.manifest = {}
+        self.files = set()
+
+    def build(self):
+        self.manifest = build_assets(self.src_dir, self.dist_dir)
+        self.files = set(self.manifest.values())
+        return self.manifest
+
+    def load(self):
+        """Baca manifest hasil build sebelumnya, False jika belum ada"""
+        try:
+            with open(os.path.join(self.dist_dir, MANIFEST_NAME), encoding='utf-8') as f:
+                self.manifest = json.load(f)
+        except (OSError, ValueError):
+            self.manifest = {}
+        self.files = set(self.manifest.values())
+        return bool(self.manifest)
+
+    def url(self, name):
+        """URL asset untuk template (Jinja global asset_url)"""
+        hashed = self.manifest.get(name)
+        if hashed is None:
+            src_folder = os.path.relpath(self.src_dir, current_app.static_folder).replace(os.sep, '/')
+            return url_for('static', filename=f"{src_folder}/{name}")
+        return url_for('serve_asset', filename=hashed)
+
+    def response(self, filename):
+        """Respons file berhash (gzip jika diterima klien), None jika bukan asset hasil build"""
+        if filename not in self.files:
+            return None
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        path = os.path.join(self.dist_dir, filename)
+        gz_path = path + '.gz'
+        use_gzip = request.accept_encodings['gzip'] and os.path.exists(gz_path)
+        try:
+            with open(gz_path if use_gzip else path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        response = current_app.response_class(data, mimetype=mimetype)
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+        response.vary.add('Accept-Encoding')
+        # Nama file sudah mengandung hash isi, dipakai juga sebagai ETag
+        response.set_etag(filename, weak=True)
+        return response
+
+
+if __name__ == '__main__':
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    src = os.path.join(base_dir, 'static', 'src')
+    dist = os.path.join(base_dir, 'static', 'dist')
+    result = build_assets(src, dist)
+    for original, hashed in result.items():
+        print(f"{original} -> {hashed}")
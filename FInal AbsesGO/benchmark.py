@@ -0,0 +1,370 @@
+# benchmark.py
+"""
+Benchmark beban check-in serentak satu sekolah.
+
+Menyemai N kelas x M siswa (prefix 'bench_') ke database MySQL yang dipakai app,
+lalu menjalankan alur asli:
+    login_siswa (plaintext -> hash, hash, cache) -> login_guru + generate_token -> badai /scan_token serentak
+    -> scan ulang (idempotensi) -> /api/absensi -> /export_absensi (csv & xlsx)
+Laporan per fase: p50/p95/p99 latency, throughput, dan query DB per request
+(selisih counter 'Questions' MySQL, jadi pakai database lokal yang tidak dipakai klien lain).
+
+Contoh:
+    DB_HOST=127.0.0.1 DB_USER=root DB_PASSWORD=root DB_NAME=absensi_bench \\
+        python benchmark.py --kelas 30 --siswa 36 --concurrency 100
+
+    # Terhadap server yang sudah jalan (mis. uvicorn asgi:application), database sama.
+    # Lewat http:// server harus dijalankan dengan SESSION_COOKIE_SECURE=0 (cookie Secure tidak dikirim):
+    SESSION_COOKIE_SECURE=0 uvicorn asgi:application --port 5000
+    python benchmark.py --url http://127.0.0.1:5000
+
+Respons di luar status yang diharapkan (termasuk redirect ke halaman login) dihitung error;
+jika ada error, benchmark keluar dengan status 1 setelah laporan dicetak.
+"""
+import argparse
+import http.cookiejar
+import json
+import math
+import os
+import queue
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Jangan jalankan sweeper di proses benchmark
+os.environ.setdefault('TOKEN_SWEEPER_INTERVAL', '0')
+
+import app as absesgo  # noqa: E402
+
+PREFIX = 'bench_'
+JURUSAN = 'BENCH'
+PASSWORD = 'bench123'
+# Redirect ke path ini berarti session tidak terbawa (dilempar ke halaman login)
+LOGIN_PATHS = ('/',)
+
+# ========================================
+# KLIEN (IN-PROCESS / HTTP)
+# ========================================
+
+class FlaskClient:
+    """Klien in-process lewat Flask test client (cookie session per klien)"""
+
+    def __init__(self):
+        self.client = absesgo.app.test_client()
+
+    def request(self, method, path, form=None, json_body=None):
+        """(status, body, location redirect atau None)"""
+        resp = self.client.open(path, method=method, data=form, json=json_body)
+        body = resp.get_data()
+        resp.close()
+        return resp.status_code, body, resp.headers.get('Location')
+
+
+class HttpClient:
+    """Klien HTTP ke server yang sudah berjalan (cookie jar per klien)"""
+
+    class _NoRedirect(urllib.request.HTTPRedirectHandler):
+        def redirect_request(self, *args, **kwargs):
+            return None
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(self.cookies),
+            self._NoRedirect(),
+        )
+
+    def check_session_cookie(self):
+        """Hentikan benchmark jika cookie session Secure tidak akan pernah dikirim (server http://)"""
+        if self.base_url.startswith('http://') and any(c.secure for c in self.cookies):
+            raise SystemExit("Cookie session ber-atribut Secure tidak dikirim lewat http://; "
+                             "jalankan server dengan SESSION_COOKIE_SECURE=0 atau pakai https://")
+
+    def request(self, method, path, form=None, json_body=None):
+        headers = {}
+        data = None
+        if form is not None:
+            data = urllib.parse.urlencode(form).encode('utf-8')
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif json_body is not None:
+            data = json.dumps(json_body).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        req = urllib.request.Request(self.base_url + path, data=data, headers=headers, method=method)
+        try:
+            with self.opener.open(req, timeout=60) as resp:
+                return resp.status, resp.read(), resp.headers.get('Location')
+        except urllib.error.HTTPError as e:
+            return e.code, e.read(), e.headers.get('Location')
+
+# ========================================
+# DATA BENCHMARK
+# ========================================
+
+def cleanup():
+    """Hapus semua data benchmark (siswa, absensi, rekap, sesi + token, guru)"""
+    with absesgo.db_cursor(commit=True) as cur:
+        cur.execute(
+            "DELETE a FROM absensi a JOIN siswa s ON a.id_siswa = s.id_siswa WHERE s.username LIKE %s",
+            (PREFIX + '%',)
+        )
+        cur.execute("DELETE FROM rekap_harian WHERE jurusan = %s", (JURUSAN,))
+        cur.execute("DELETE FROM siswa WHERE username LIKE %s", (PREFIX + '%',))
+        cur.execute(
+            "DELETE t FROM qr_token t JOIN sesi_absensi s ON t.id_sesi = s.id_sesi WHERE s.guru = %s",
+            (PREFIX + 'guru',)
+        )
+        cur.execute("DELETE FROM sesi_absensi WHERE guru = %s", (PREFIX + 'guru',))
+        cur.execute("DELETE FROM guru WHERE username = %s", (PREFIX + 'guru',))
+
+def seed(jumlah_kelas, siswa_per_kelas, riwayat_hari):
+    """Semai guru + siswa benchmark, opsional dengan riwayat absensi beberapa hari ke belakang"""
+    siswa = []
+    for k in range(jumlah_kelas):
+        for m in range(siswa_per_kelas):
+            username = f"{PREFIX}{k:03d}_{m:03d}"
+            siswa.append((username, PASSWORD, f"B{k:03d}{m:03d}", f"Siswa Bench {k}-{m}",
+                          JURUSAN, f"BENCH-{k:03d}"))
+
+    with absesgo.db_cursor(commit=True) as cur:
+        cur.execute(
+            "INSERT INTO guru (username, password, nama_guru) VALUES (%s, %s, %s)",
+            (PREFIX + 'guru', PASSWORD, 'Guru Bench')
+        )
+        for i in range(0, len(siswa), 1000):
+            cur.executemany(
+                "INSERT INTO siswa (username, password, nis, nama_siswa, jurusan, kelas) "
+                "VALUES (%s, %s, %s, %s, %s, %s)",
+                siswa[i:i + 1000]
+            )
+        if riwayat_hari:
+            hari_ini = absesgo.get_current_time_wib().replace(hour=7, minute=0, second=0, microsecond=0)
+            for hari in range(1, riwayat_hari + 1):
+                cur.execute("""
+                    INSERT INTO absensi (id_siswa, waktu_absen, token_qr, status, nama_siswa, jurusan, kelas)
+                    SELECT id_siswa, %s, 'bench', 'hadir', nama_siswa, jurusan, kelas
+                    FROM siswa WHERE username LIKE %s
+                """, (hari_ini - absesgo.timedelta(days=hari), PREFIX + '%'))
+    return [s[0] for s in siswa]
+
+def count_questions():
+    """Counter global 'Questions' MySQL (statement yang dikirim klien ke server)"""
+    with absesgo.db_cursor() as cur:
+        cur.execute("SHOW GLOBAL STATUS LIKE 'Questions'")
+        return int(cur.fetchone()[1])
+
+# ========================================
+# PENGUKURAN
+# ========================================
+
+def percentile(sorted_values, p):
+    """Persentil nearest-rank dari list yang sudah terurut"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(math.ceil(p / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[rank]
+
+def response_error(status, location, expected):
+    """Alasan respons dianggap gagal, None jika sesuai harapan"""
+    if status not in expected:
+        return status
+    if location and urllib.parse.urlsplit(location).path in LOGIN_PATHS:
+        return f"{status} -> login"
+    return None
+
+def run_phase(name, calls, concurrency, expected):
+    """
+    Jalankan calls (list callable -> (status, body, location)) dengan thread pool.
+    Semua worker dilepas bersamaan (barrier) untuk meniru burst.
+    Status di luar expected atau redirect ke halaman login dihitung error.
+    """
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    workers = max(min(concurrency, len(calls)), 1)
+    barrier = threading.Barrier(workers)
+    started = threading.local()
+
+    def timed(call):
+        if not getattr(started, 'done', False):
+            started.done = True
+            try:
+                barrier.wait(timeout=30)
+            except threading.BrokenBarrierError:
+                pass
+        t0 = time.perf_counter()
+        try:
+            status, _, location = call()
+            error = response_error(status, location, expected)
+        except Exception as e:
+            error = repr(e)
+        elapsed = time.perf_counter() - t0
+        with lock:
+            latencies.append(elapsed)
+            if error is not None:
+                errors.append(error)
+
+    q0 = count_questions()
+    wall0 = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(timed, calls))
+    wall = time.perf_counter() - wall0
+    # SHOW STATUS kedua milik benchmark sendiri ikut terhitung
+    queries = count_questions() - q0 - 1
+
+    latencies.sort()
+    result = {
+        'phase': name,
+        'requests': len(calls),
+        'errors': len(errors),
+        'concurrency': workers,
+        'throughput_rps': round(len(calls) / wall, 1) if wall else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        'queries_per_request': round(queries / len(calls), 2) if calls else 0.0,
+    }
+    if errors:
+        result['error_samples'] = sorted({str(e) for e in errors})[:5]
+    return result
+
+def print_report(results):
+    header = f"{'fase':<22}{'req':>7}{'err':>6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'q/req':>8}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['phase']:<22}{r['requests']:>7}{r['errors']:>6}{r['throughput_rps']:>10}"
+              f"{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}{r['queries_per_request']:>8}")
+        for sample in r.get('error_samples', []):
+            print(f"    ! {sample}")
+
+# ========================================
+# SKENARIO
+# ========================================
+
+def run(args):
+    make_client = (lambda: HttpClient(args.url)) if args.url else FlaskClient
+
+    cleanup()
+    usernames = seed(args.kelas, args.siswa, args.riwayat_hari)
+    print(f"Seed: {args.kelas} kelas x {args.siswa} siswa = {len(usernames)} siswa, "
+          f"riwayat {args.riwayat_hari} hari")
+
+    results = []
+    clients = [make_client() for _ in usernames]
+    guru = make_client()
+
+    def login_phase(name, login_clients):
+        return run_phase(name, [
+            (lambda c=c, u=u: c.request('POST', '/login_siswa', form={'username': u, 'password': PASSWORD}))
+            for c, u in zip(login_clients, usernames)
+        ], args.concurrency, {302})
+
+    # 1. Login siswa (jam 07:00): password seed masih plaintext -> verifikasi + hash ulang
+    #    lalu login ulang terhadap hash (cache verifikasi dingin, lalu hangat)
+    if not args.url:
+        print(f"Password hasher: {absesgo.password_hasher.stats()}")
+    results.append(login_phase('login_siswa (migrasi)', [make_client() for _ in usernames]))
+    results.append(login_phase('login_siswa (hash)', [make_client() for _ in usernames]))
+    results.append(login_phase('login_siswa (cache)', clients))
+
+    # 2. Guru login + generate token
+    status, _, location = guru.request('POST', '/login_guru',
+                                       form={'username': PREFIX + 'guru', 'password': PASSWORD})
+    if response_error(status, location, {302}) is not None:
+        raise SystemExit(f"Login guru benchmark gagal (HTTP {status} -> {location})")
+    if args.url:
+        guru.check_session_cookie()
+    tokens = []
+
+    def generate():
+        status, body, location = guru.request('POST', '/generate_token')
+        if status == 200:
+            tokens.append(json.loads(body)['token'])
+        return status, body, location
+
+    results.append(run_phase('generate_token', [generate] * args.token_rounds, 1, {200}))
+    if not tokens:
+        raise SystemExit("generate_token tidak menghasilkan token")
+    token = tokens[-1]
+
+    # 3. Badai scan: semua siswa scan token yang sama serentak
+    results.append(run_phase('scan_token', [
+        (lambda c=c: c.request('POST', '/scan_token', json_body={'token': token}))
+        for c in clients
+    ], args.concurrency, {200}))
+    if not args.url and absesgo.absen_queue is not None:
+        absesgo.absen_queue.flush()
+
+    # 4. Scan ulang (kamera masih melihat QR yang sama)
+    results.append(run_phase('scan_token (ulang)', [
+        (lambda c=c: c.request('POST', '/scan_token', json_body={'token': token}))
+        for c in clients
+    ], args.concurrency, {200}))
+
+    # 5. Dashboard guru: /api/absensi (halaman pertama + filter kelas), satu klien per request paralel
+    guru_clients = queue.Queue()
+    for _ in range(max(min(args.concurrency, args.api_rounds * 2), 1)):
+        client = make_client()
+        client.request('POST', '/login_guru', form={'username': PREFIX + 'guru', 'password': PASSWORD})
+        guru_clients.put(client)
+
+    def as_guru(path):
+        client = guru_clients.get()
+        try:
+            return client.request('GET', path)
+        finally:
+            guru_clients.put(client)
+
+    api_calls = []
+    for i in range(args.api_rounds):
+        api_calls.append(lambda: as_guru('/api/absensi'))
+        query = urllib.parse.urlencode({'kelas': f"BENCH-{i % args.kelas:03d}", 'jurusan': JURUSAN})
+        api_calls.append(lambda query=query: as_guru('/api/absensi?' + query))
+    results.append(run_phase('api_absensi', api_calls, args.concurrency, {200}))
+
+    # 6. Export penuh
+    for fmt in ('csv', 'xlsx'):
+        results.append(run_phase(f'export_absensi ({fmt})', [
+            (lambda: guru.request('GET', f'/export_absensi?format={fmt}'))
+        ] * args.export_rounds, 1, {200}))
+
+    if not args.keep:
+        cleanup()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark beban check-in AbsesGO')
+    parser.add_argument('--kelas', type=int, default=10, help='jumlah kelas (default 10)')
+    parser.add_argument('--siswa', type=int, default=36, help='siswa per kelas (default 36)')
+    parser.add_argument('--concurrency', type=int, default=50, help='request paralel (default 50)')
+    parser.add_argument('--riwayat-hari', type=int, default=20,
+                        help='hari riwayat absensi yang disemai untuk export/API (default 20)')
+    parser.add_argument('--token-rounds', type=int, default=20, help='jumlah generate_token (default 20)')
+    parser.add_argument('--api-rounds', type=int, default=100, help='pasangan request /api/absensi (default 100)')
+    parser.add_argument('--export-rounds', type=int, default=3, help='export per format (default 3)')
+    parser.add_argument('--url', help='base URL server yang sudah berjalan; default in-process test client')
+    parser.add_argument('--json', help='simpan hasil ke file JSON (untuk dibandingkan antar versi)')
+    parser.add_argument('--keep', action='store_true', help='jangan hapus data benchmark setelah selesai')
+    args = parser.parse_args()
+
+    results = run(args)
+    print()
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+        print(f"\nHasil disimpan ke {args.json}")
+
+    failed = [r['phase'] for r in results if r['errors']]
+    if failed:
+        # Throughput fase yang gagal tidak bermakna
+        raise SystemExit(f"\nBenchmark GAGAL: ada request error di fase {', '.join(failed)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+# broker.py
+import json
+import queue
+import threading
+
+
+class Subscription:
+    """Antrean pesan untuk satu pelanggan (mis. satu koneksi SSE dashboard guru)"""
+
+    def __init__(self, channels, maxsize=100, on_message=None):
+        self.channels = tuple(channels)
+        self._queue = queue.Queue(maxsize=maxsize)
+        # Dipanggil (dari thread publisher) setiap ada pesan, mis. membangunkan event loop ASGI
+        self.on_message = on_message
+
+    def put(self, message):
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            # Pelanggan lambat: pesan dibuang, dashboard tetap bisa refresh manual
+            return
+        if self.on_message is not None:
+            self.on_message()
+
+    def get(self, timeout=None):
+        """Ambil pesan berikutnya, None jika timeout"""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_nowait(self):
+        """Ambil pesan tanpa menunggu, None jika kosong"""
+        try:
+            return self._queue.get_nowait()
+        except queue.Empty:
+            return None
+
+
+class LocalBroker:
+    """Broker publish/subscribe in-process per channel"""
+
+    def __init__(self, queue_size=100):
+        self.queue_size = queue_size
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, *channels, on_message=None):
+        sub = Subscription(channels, maxsize=self.queue_size, on_message=on_message)
+        with self._lock:
+            for channel in channels:
+                self._subscribers.setdefault(channel, set()).add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            for channel in sub.channels:
+                subs = self._subscribers.get(channel)
+                if subs is not None:
+                    subs.discard(sub)
+                    if not subs:
+                        del self._subscribers[channel]
+
+    def _deliver(self, channel, message):
+        with self._lock:
+            subs = list(self._subscribers.get(channel, ()))
+        for sub in subs:
+            sub.put(message)
+
+    def publish(self, channel, message):
+        self._deliver(channel, message)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len({sub for subs in self._subscribers.values() for sub in subs})
+
+
+class RedisBroker(LocalBroker):
+    """
+    Broker antar worker lewat Redis pub/sub.
+    Publish dikirim ke Redis; satu thread listener per proses meneruskan pesan ke pelanggan lokal.
+    """
+
+    def __init__(self, client, prefix='absesgo:live:', queue_size=100):
+        super().__init__(queue_size=queue_size)
+        self.client = client
+        self.prefix = prefix
+        self._listener = None
+        self._listener_lock = threading.Lock()
+
+    def _ensure_listener(self):
+        with self._listener_lock:
+            if self._listener is None:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(**{self.prefix + '*': self._on_message})
+                self._listener = pubsub.run_in_thread(sleep_time=1, daemon=True)
+
+    def _on_message(self, message):
+        channel = message['channel']
+        if isinstance(channel, bytes):
+            channel = channel.decode('utf-8')
+        self._deliver(channel[len(self.prefix):], json.loads(message['data']))
+
+    def subscribe(self, *channels, on_message=None):
+        self._ensure_listener()
+        return super().subscribe(*channels, on_message=on_message)
+
+    def publish(self, channel, message):
+        self.client.publish(self.prefix + channel, json.dumps(message))
+
+
+def create_broker(url=None, queue_size=100):
+    """
+    Buat broker dari URL.
+    - kosong/None   -> LocalBroker (per proses)
+    - redis://...   -> RedisBroker (dibagi antar worker)
+    """
+    if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError:
+            print("⚠️ redis module not installed, memakai broker lokal")
+            return LocalBroker(queue_size=queue_size)
+        return RedisBroker(redis.Redis.from_url(url), queue_size=queue_size)
+    return LocalBroker(queue_size=queue_size)
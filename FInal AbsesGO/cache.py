@@ -0,0 +1,136 @@
+# cache.py
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+# ========================================
+# BACKEND CACHE (LOKAL / SHARED)
+# ========================================
+
+class LocalBackend:
+    """Cache key-value in-process dengan TTL per entri dan batas jumlah entri (LRU)"""
+
+    def __init__(self, max_entries=10000):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl):
+        if ttl <= 0:
+            self.delete(key)
+            return
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl)
+            self._data.move_to_end(key)
+            if len(self._data) > self.max_entries:
+                self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def _evict(self):
+        # Buang entri kadaluarsa dulu, baru entri paling lama jika masih penuh
+        now = time.time()
+        for key in [k for k, (_, exp) in self._data.items() if exp <= now]:
+            del self._data[key]
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+
+class RedisBackend:
+    """Cache bersama antar worker (Redis); nilai disimpan sebagai JSON"""
+
+    def __init__(self, client, prefix='absesgo:'):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        raw = self.client.get(self.prefix + key)
+        if raw is None:
+            return None
+        return json.loads(raw)
+
+    def set(self, key, value, ttl):
+        ttl_ms = int(ttl * 1000)
+        if ttl_ms <= 0:
+            self.delete(key)
+            return
+        self.client.set(self.prefix + key, json.dumps(value), px=ttl_ms)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+
+def create_backend(url=None, max_entries=10000):
+    """
+    Buat backend cache dari URL.
+    - kosong/None   -> LocalBackend (per proses)
+    - redis://...   -> RedisBackend (dibagi antar worker)
+    """
+    if url and url.startswith(('redis://', 'rediss://', 'unix://')):
+        try:
+            import redis
+        except ImportError:
+            print("⚠️ redis module not installed, memakai cache lokal")
+            return LocalBackend(max_entries=max_entries)
+        return RedisBackend(redis.Redis.from_url(url))
+    return LocalBackend(max_entries=max_entries)
+
+
+# ========================================
+# CACHE TOKEN QR AKTIF
+# ========================================
+
+class TokenCache:
+    """
+    Cache status token QR agar /scan_token tidak perlu SELECT qr_token.
+
+    Entri aktif berlaku sampai waktu_expired token; lookup negatif (token
+    tidak dikenal / sudah di-expire) di-cache singkat untuk meredam token
+    sampah atau replay.
+    """
+
+    AKTIF = 'aktif'
+    INVALID = 'invalid'
+
+    def __init__(self, backend, negative_ttl=60):
+        self.backend = backend
+        self.negative_ttl = negative_ttl
+
+    @staticmethod
+    def _key(token):
+        return 'token:' + token
+
+    def get(self, token):
+        """Mengembalikan dict {'status', 'expires_at', 'kelas'} atau None jika belum di-cache"""
+        return self.backend.get(self._key(token))
+
+    def put_active(self, token, expires_at, kelas=None):
+        """Cache token aktif sampai expires_at (epoch detik); kelas = batas kelas sesi (None = semua)"""
+        ttl = expires_at - time.time()
+        if ttl <= 0:
+            self.put_invalid(token)
+            return
+        self.backend.set(self._key(token), {'status': self.AKTIF, 'expires_at': expires_at, 'kelas': kelas}, ttl)
+
+    def put_invalid(self, token):
+        self.backend.set(self._key(token), {'status': self.INVALID, 'expires_at': None}, self.negative_ttl)
+
+    def invalidate(self, token):
+        """Tandai token tidak berlaku (dipakai saat token di-expire)"""
+        self.put_invalid(token)
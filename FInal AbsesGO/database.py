@@ -1,129 +1,377 @@
 # database.py
-import mysql.connector
-from datetime import datetime
-from mysql.connector import pooling
+"""
+Lapisan akses data AbsesGO: konfigurasi database, pool koneksi bersama,
+dan semua fungsi query. Route di app.py / asgi.py hanya memanggil fungsi di sini.
+
+Query panas (verifikasi token, lookup login/profil, riwayat siswa) memakai
+server-side prepared statement yang di-cache per koneksi pool.
+"""
+import base64
+import os
+import secrets
+from datetime import datetime, timedelta
+
+import pytz
+
+from db_pool import ConnectionPool
+from signed_token import SignedTokenSigner
+
+# ========================================
+# TIMEZONE CONFIGURATION - WIB
+# ========================================
+WIB = pytz.timezone('Asia/Jakarta')
+
+def get_current_time_wib():
+    """Fungsi untuk mendapatkan waktu sekarang dalam timezone WIB"""
+    return datetime.now(WIB)
+
+def to_epoch_wib(dt):
+    """Konversi datetime (naive = WIB) ke epoch detik"""
+    if dt.tzinfo is None:
+        dt = WIB.localize(dt)
+    return dt.timestamp()
+
+# ========================================
+# DATABASE CONFIGURATION
+# ========================================
 
 DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': '',
-    'database': 'absensi_qr',
-    'auth_plugin': 'mysql_native_password'
+    'host': os.environ.get('DB_HOST', 'absesgo.mysql.pythonanywhere-services.com'),
+    'user': os.environ.get('DB_USER', 'absesgo'),
+    'password': os.environ.get('DB_PASSWORD', 'passwordapa'),
+    'database': os.environ.get('DB_NAME', 'absesgo$absensi_qr')
 }
 
-connection_pool = pooling.MySQLConnectionPool(pool_name="mypool",
-                                              pool_size=10,)
+# Ukuran & perilaku pool koneksi (bisa diatur lewat environment)
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', '10'))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', '5'))
+DB_POOL_PING_INTERVAL = float(os.environ.get('DB_POOL_PING_INTERVAL', '30'))
+# 1 = reset session setiap koneksi kembali ke pool (mematikan cache prepared statement)
+DB_POOL_RESET_SESSION = os.environ.get('DB_POOL_RESET_SESSION', '0') == '1'
+# Jumlah prepared statement yang di-cache per koneksi; 0 = nonaktif (semua query teks biasa)
+DB_PREPARED_STATEMENTS = int(os.environ.get('DB_PREPARED_STATEMENTS', '32'))
+
+# on_query dipasang app.py (instrumentasi metrics)
+db_pool = ConnectionPool(
+    DB_CONFIG,
+    pool_name='absesgo_pool',
+    pool_size=DB_POOL_SIZE,
+    timeout=DB_POOL_TIMEOUT,
+    ping_interval=DB_POOL_PING_INTERVAL,
+    reset_session=DB_POOL_RESET_SESSION,
+    max_prepared_statements=DB_PREPARED_STATEMENTS,
+)
 
-def connect_db():
-    return mysql.connector.connect(**DB_CONFIG)
+def db_cursor(dictionary=False, commit=False, prepared=False):
+    """Context manager cursor dari pool koneksi bersama (prepared=True: prepared statement per koneksi)"""
+    return db_pool.cursor(dictionary=dictionary, commit=commit, prepared=prepared)
 
+# ========================================
 # GURU
+# ========================================
+
 def get_guru_by_username(username):
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT * FROM guru WHERE username=%s LIMIT 1", (username,))
-    r = cur.fetchone()
-    cur.close(); conn.close()
-    return r
+    """Ambil data guru berdasarkan username"""
+    with db_cursor(dictionary=True, prepared=True) as cur:
+        cur.execute("SELECT * FROM guru WHERE username=%s LIMIT 1", (username,))
+        return cur.fetchone()
+
+def update_guru_password(username, password_hash):
+    """Simpan hash password baru guru (rehash saat login)"""
+    with db_cursor(commit=True) as cur:
+        cur.execute("UPDATE guru SET password=%s WHERE username=%s", (password_hash, username))
 
+# ========================================
 # SISWA
+# ========================================
+
 def get_siswa_by_username(username):
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT * FROM siswa WHERE username=%s LIMIT 1", (username,))
-    r = cur.fetchone()
-    cur.close(); conn.close()
-    return r
+    """Ambil data siswa berdasarkan username"""
+    with db_cursor(dictionary=True, prepared=True) as cur:
+        cur.execute("SELECT * FROM siswa WHERE username=%s LIMIT 1", (username,))
+        return cur.fetchone()
+
+def update_siswa_password(id_siswa, password_hash):
+    """Simpan hash password baru siswa (rehash saat login)"""
+    with db_cursor(commit=True) as cur:
+        cur.execute("UPDATE siswa SET password=%s WHERE id_siswa=%s", (password_hash, id_siswa))
 
 def get_siswa_by_id(id_siswa):
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT * FROM siswa WHERE id_siswa=%s LIMIT 1", (id_siswa,))
-    r = cur.fetchone()
-    cur.close(); conn.close()
-    return r
-
-# TOKEN QR
-def insert_qr_token(token, expires_dt):
-    conn = connect_db()
-    cur = conn.cursor()
-    cur.execute(
-        "INSERT INTO qr_token (token, waktu_buat, waktu_expired, status) VALUES (%s, %s, %s, 'aktif')",
-        (token, datetime.now(), expires_dt)
-    )
-    conn.commit()
-    cur.close(); conn.close()
+    """Ambil data siswa berdasarkan ID"""
+    with db_cursor(dictionary=True, prepared=True) as cur:
+        cur.execute("SELECT * FROM siswa WHERE id_siswa=%s LIMIT 1", (id_siswa,))
+        return cur.fetchone()
 
-def verify_token(token):
+# ========================================
+# SESI ABSENSI
+# ========================================
+
+def new_sesi_token(id_sesi):
+    """Token sesi ringkas "<id_sesi>.<acak>" (id numerik dipakai untuk lookup via index)"""
+    return f"{id_sesi}.{secrets.token_urlsafe(16)}"
+
+def parse_sesi_token(token):
+    """id_sesi dari token sesi, None jika token lama (tanpa sesi)"""
+    id_sesi, sep, secret = token.partition('.')
+    if not sep or not secret or not (id_sesi.isascii() and id_sesi.isdigit()) or len(id_sesi) > 10:
+        return None
+    return int(id_sesi)
+
+# Rotasi token sesi: baris qr_token milik sesi diperbarui di tempat
+ROTATE_SESI_TOKEN_SQL = (
+    "UPDATE qr_token SET token=%s, waktu_buat=%s, waktu_expired=%s, status='aktif' WHERE id_sesi=%s"
+)
+INSERT_SESI_TOKEN_SQL = (
+    "INSERT INTO qr_token (id_sesi, token, waktu_buat, waktu_expired, status) VALUES (%s, %s, %s, %s, 'aktif')"
+)
+
+def start_sesi(guru, kelas):
+    """Mulai sesi absensi baru, mengembalikan id_sesi"""
+    with db_cursor(commit=True) as cur:
+        cur.execute(
+            "INSERT INTO sesi_absensi (guru, kelas, waktu_mulai, status) VALUES (%s, %s, %s, 'aktif')",
+            (guru, kelas, get_current_time_wib())
+        )
+        return cur.lastrowid
+
+def end_sesi(id_sesi, guru):
+    """Akhiri sesi milik guru dan expire token QR-nya"""
+    with db_cursor(commit=True) as cur:
+        cur.execute(
+            "UPDATE sesi_absensi SET status='selesai', waktu_selesai=%s "
+            "WHERE id_sesi=%s AND guru=%s AND status='aktif'",
+            (get_current_time_wib(), id_sesi, guru)
+        )
+        cur.execute("UPDATE qr_token SET status='expired' WHERE id_sesi=%s", (id_sesi,))
+
+def rotate_sesi_token(id_sesi, token, expires_dt):
+    """Ganti token sesi di tempat; baris baru hanya jika sesi belum punya token (atau sudah diarsip sweeper)"""
+    waktu_buat_wib = get_current_time_wib()
+    with db_cursor(commit=True) as cur:
+        cur.execute(ROTATE_SESI_TOKEN_SQL, (token, waktu_buat_wib, expires_dt, id_sesi))
+        if cur.rowcount == 0:
+            cur.execute(INSERT_SESI_TOKEN_SQL, (id_sesi, token, waktu_buat_wib, expires_dt))
+
+def get_sesi_aktif():
+    """Semua sesi absensi yang sedang berjalan"""
+    with db_cursor(dictionary=True) as cur:
+        cur.execute(
+            "SELECT id_sesi, guru, kelas, waktu_mulai FROM sesi_absensi "
+            "WHERE status='aktif' ORDER BY id_sesi"
+        )
+        rows = cur.fetchall()
+    for row in rows:
+        row['waktu_mulai'] = row['waktu_mulai'].strftime('%Y-%m-%d %H:%M:%S')
+    return rows
+
+# ========================================
+# QR TOKEN
+# ========================================
+
+def verify_token_query(token):
     """
-    Mengembalikan baris token jika aktif. Caller harus memeriksa waktu_expired.
+    (query, params) verifikasi token.
+    Token sesi dicari lewat id_sesi (index id_sesi, status, waktu_expired), token lama lewat string token.
     """
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("SELECT * FROM qr_token WHERE token=%s AND status='aktif' LIMIT 1", (token,))
-    row = cur.fetchone()
-    cur.close(); conn.close()
-    return row
+    id_sesi = parse_sesi_token(token)
+    if id_sesi is not None:
+        return (
+            "SELECT t.*, s.kelas FROM qr_token t JOIN sesi_absensi s ON s.id_sesi = t.id_sesi "
+            "WHERE t.id_sesi=%s AND t.status='aktif' AND t.token=%s LIMIT 1",
+            (id_sesi, token)
+        )
+    return "SELECT * FROM qr_token WHERE token=%s AND status='aktif' LIMIT 1", (token,)
 
-def expire_token(token):
-    conn = connect_db()
-    cur = conn.cursor()
-    cur.execute("UPDATE qr_token SET status='expired' WHERE token=%s", (token,))
-    conn.commit()
-    cur.close(); conn.close()
+def verify_token(token):
+    """Verifikasi token QR, mengembalikan baris token jika aktif"""
+    with db_cursor(dictionary=True, prepared=True) as cur:
+        cur.execute(*verify_token_query(token))
+        return cur.fetchone()
 
+# ========================================
 # ABSENSI
-def insert_absen_by_id(id_siswa, token_qr):
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-
-    # Cek duplikat hari ini
-    cur.execute("SELECT id_absen FROM absensi WHERE id_siswa=%s AND DATE(waktu_absen)=CURDATE()", (id_siswa,))
-    if cur.fetchone():
-        cur.close(); conn.close()
-        return False
-
-    # Ambil data siswa (nama, jurusan, kelas)
-    cur.execute("SELECT nama_siswa, jurusan, kelas FROM siswa WHERE id_siswa=%s", (id_siswa,))
-    siswa = cur.fetchone()
-    if not siswa:
-        cur.close(); conn.close()
-        return False
-
-    # Insert data absensi
-    now = datetime.now()
-    cur.execute("""
-        INSERT INTO absensi (id_siswa, waktu_absen, token_qr, status, nama_siswa, jurusan, kelas)
-        VALUES (%s, %s, %s, 'hadir', %s, %s, %s)
-    """, (id_siswa, now, token_qr, siswa['nama_siswa'], siswa['jurusan'], siswa['kelas']))
-
-    conn.commit()
-    cur.close(); conn.close()
-    return True
-
-def get_absensi_by_id_siswa(id_siswa):
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("""
-        SELECT a.*, s.nama_siswa, s.nis
-        FROM absensi a
-        JOIN siswa s ON a.id_siswa = s.id_siswa
-        WHERE a.id_siswa=%s
-        ORDER BY a.waktu_absen DESC
-    """, (id_siswa,))
-    rows = cur.fetchall()
-    cur.close(); conn.close()
+# ========================================
+
+# Hasil check-in dari sp_checkin
+CHECKIN_HADIR = 'hadir'
+CHECKIN_SUDAH_ABSEN = 'sudah_absen'
+CHECKIN_EXPIRED = 'expired'
+CHECKIN_INVALID = 'invalid'
+
+def checkin_call(id_siswa, token_qr, waktu_absen, profil=None):
+    """
+    Statement + parameter CALL check-in.
+    Dengan profil dari cache dipakai sp_checkin_profil (tanpa baca tabel siswa).
+    Token bertanda tangan memakai sp_checkin_sesi (tanpa baca qr_token).
+    """
+    if SignedTokenSigner.is_signed(token_qr):
+        profil = profil or {}
+        return "CALL sp_checkin_sesi(%s, %s, %s, %s, %s, %s, %s, %s)", (
+            id_siswa, SignedTokenSigner.session_id(token_qr), token_qr, waktu_absen,
+            profil.get('nis'), profil.get('nama_siswa'), profil.get('jurusan'), profil.get('kelas'),
+        )
+    if profil:
+        return "CALL sp_checkin_profil(%s, %s, %s, %s, %s, %s, %s)", (
+            id_siswa, token_qr, waktu_absen,
+            profil.get('nis'), profil.get('nama_siswa'), profil.get('jurusan'), profil.get('kelas'),
+        )
+    return "CALL sp_checkin(%s, %s, %s)", (id_siswa, token_qr, waktu_absen)
+
+def call_checkin(id_siswa, token_qr, waktu_absen, profil=None):
+    """
+    Jalankan CALL check-in (satu round-trip), mengembalikan baris hasil sp_checkin.
+    CALL tetap lewat protokol teks: statement di dalam prosedur sudah di-cache server per koneksi.
+    """
+    row = None
+    query, params = checkin_call(id_siswa, token_qr, waktu_absen, profil)
+    with db_cursor(dictionary=True) as cur:
+        for result in cur.execute(query, params, multi=True):
+            if result.with_rows:
+                row = result.fetchone()
+    return row
+
+def fetch_riwayat_siswa(id_siswa):
+    """
+    Riwayat absensi satu siswa, terbaru dulu (waktu_absen sudah berupa string).
+    Tanpa JOIN siswa: nama/kelas/jurusan sudah tersalin di tabel absensi.
+    """
+    with db_cursor(dictionary=True, prepared=True) as cur:
+        cur.execute("""
+            SELECT id_absen, nama_siswa, kelas, jurusan, waktu_absen, status
+            FROM absensi
+            WHERE id_siswa=%s
+            ORDER BY id_absen DESC
+        """, (id_siswa,))
+        rows = cur.fetchall()
+    for row in rows:
+        if isinstance(row['waktu_absen'], datetime):
+            row['waktu_absen'] = row['waktu_absen'].strftime('%Y-%m-%d %H:%M:%S')
     return rows
 
-def get_all_absensi():
-    conn = connect_db()
-    cur = conn.cursor(dictionary=True)
-    cur.execute("""
+# Ukuran halaman riwayat absensi (dashboard guru & /api/absensi)
+ABSENSI_PAGE_SIZE = int(os.environ.get('ABSENSI_PAGE_SIZE', '50'))
+ABSENSI_MAX_PAGE_SIZE = 500
+
+def encode_absensi_cursor(row):
+    """Cursor keyset (waktu_absen, id_absen) dari baris terakhir satu halaman"""
+    raw = f"{row['waktu_absen']:%Y-%m-%d %H:%M:%S}|{row['id_absen']}"
+    return base64.urlsafe_b64encode(raw.encode('ascii')).decode('ascii')
+
+def decode_absensi_cursor(cursor):
+    """Kebalikan encode_absensi_cursor; ValueError jika cursor rusak"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('ascii')
+        waktu, id_absen = raw.split('|')
+        return datetime.strptime(waktu, '%Y-%m-%d %H:%M:%S'), int(id_absen)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError('Cursor tidak valid') from e
+
+def bulan_range(bulan):
+    """'YYYY-MM' (atau 'MM' untuk tahun ini) -> (awal bulan, awal bulan berikutnya)"""
+    if '-' in bulan:
+        awal = datetime.strptime(bulan, '%Y-%m')
+    else:
+        awal = datetime(get_current_time_wib().year, int(bulan), 1)
+    if awal.month == 12:
+        return awal, awal.replace(year=awal.year + 1, month=1)
+    return awal, awal.replace(month=awal.month + 1)
+
+def absensi_filter_clause(kelas=None, jurusan=None, dari=None, sampai=None, bulan=None):
+    """
+    Bangun predikat WHERE untuk filter absensi (kelas, jurusan, rentang tanggal, bulan).
+    Semua filter waktu berupa rentang waktu_absen agar bisa memakai index.
+    Mengembalikan (list predikat, list params).
+    """
+    where = []
+    params = []
+    if kelas:
+        where.append("a.kelas = %s")
+        params.append(kelas)
+    if jurusan:
+        where.append("a.jurusan = %s")
+        params.append(jurusan)
+    if dari:
+        where.append("a.waktu_absen >= %s")
+        params.append(datetime.combine(dari, datetime.min.time()))
+    if sampai:
+        where.append("a.waktu_absen < %s")
+        params.append(datetime.combine(sampai + timedelta(days=1), datetime.min.time()))
+    if bulan:
+        awal, akhir = bulan_range(bulan)
+        where.append("a.waktu_absen >= %s AND a.waktu_absen < %s")
+        params.extend([awal, akhir])
+    return where, params
+
+def get_absensi_page(limit=ABSENSI_PAGE_SIZE, cursor=None, **filters):
+    """
+    Ambil satu halaman absensi, terbaru dulu (keyset pada waktu_absen, id_absen).
+    filters: lihat absensi_filter_clause. Mengembalikan (rows, next_cursor).
+    """
+    where, params = absensi_filter_clause(**filters)
+    if cursor:
+        waktu, id_absen = decode_absensi_cursor(cursor)
+        where.append("(a.waktu_absen < %s OR (a.waktu_absen = %s AND a.id_absen < %s))")
+        params.extend([waktu, waktu, id_absen])
+
+    query = """
         SELECT a.*, s.nama_siswa, s.nis
         FROM absensi a
         JOIN siswa s ON a.id_siswa = s.id_siswa
-        ORDER BY a.waktu_absen DESC
-    """)
-    rows = cur.fetchall()
-    cur.close(); conn.close()
-    return rows
\ No newline at end of file
+    """
+    if where:
+        query += " WHERE " + " AND ".join(where)
+    query += " ORDER BY a.waktu_absen DESC, a.id_absen DESC LIMIT %s"
+    params.append(limit + 1)
+
+    with db_cursor(dictionary=True) as cur:
+        cur.execute(query, params)
+        rows = cur.fetchall()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_absensi_cursor(rows[-1])
+    return rows, next_cursor
+
+# ========================================
+# REKAP
+# ========================================
+
+def get_rekap(awal, akhir, group='kelas', kelas=None, jurusan=None):
+    """
+    Rekap kehadiran dari tabel rekap_harian untuk tanggal awal <= t < akhir.
+    group='kelas' -> per kelas/jurusan; group='hari' -> per tanggal.
+    """
+    where = ["tanggal >= %s", "tanggal < %s"]
+    params = [awal, akhir]
+    if kelas:
+        where.append("kelas = %s")
+        params.append(kelas)
+    if jurusan:
+        where.append("jurusan = %s")
+        params.append(jurusan)
+
+    if group == 'hari':
+        columns = "tanggal"
+    else:
+        columns = "kelas, jurusan"
+
+    query = f"""
+        SELECT {columns},
+               SUM(jumlah_hadir) AS jumlah_hadir,
+               SUM(jumlah_siswa) AS jumlah_siswa,
+               ROUND(100 * SUM(jumlah_hadir) / NULLIF(SUM(jumlah_siswa), 0), 2) AS persen_hadir
+        FROM rekap_harian
+        WHERE {' AND '.join(where)}
+        GROUP BY {columns}
+        ORDER BY {columns}
+    """
+    with db_cursor(dictionary=True) as cur:
+        cur.execute(query, params)
+        return cur.fetchall()
+
+def rollup_rekap(tanggal):
+    """Hitung ulang rekap_harian untuk satu tanggal (sp_rollup_rekap)"""
+    with db_cursor() as cur:
+        for result in cur.execute("CALL sp_rollup_rekap(%s)", (tanggal,), multi=True):
+            pass
@@ -0,0 +1,282 @@
+# db_pool.py
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from mysql.connector import pooling, errors
+
+
+class _TimedCursor:
+    """Proxy cursor yang melaporkan durasi setiap execute/executemany ke on_query(statement, detik)"""
+
+    def __init__(self, cursor, on_query):
+        self._cursor = cursor
+        self._on_query = on_query
+
+    def execute(self, operation, params=None, multi=False, **kwargs):
+        started = time.perf_counter()
+        if multi:
+            return self._timed_results(self._cursor.execute(operation, params, multi=True, **kwargs),
+                                       operation, started)
+        try:
+            return self._cursor.execute(operation, params, **kwargs)
+        finally:
+            self._on_query(operation, time.perf_counter() - started)
+
+    def _timed_results(self, results, operation, started):
+        # multi=True: statement baru selesai setelah semua result set dibaca
+        try:
+            yield from results
+        finally:
+            self._on_query(operation, time.perf_counter() - started)
+
+    def executemany(self, operation, seq_params, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._cursor.executemany(operation, seq_params, **kwargs)
+        finally:
+            self._on_query(operation, time.perf_counter() - started)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class _TimedConnection:
+    """Proxy koneksi yang membuat cursor ber-timing"""
+
+    def __init__(self, conn, on_query):
+        self._conn = conn
+        self._on_query = on_query
+
+    def cursor(self, *args, **kwargs):
+        return _TimedCursor(self._conn.cursor(*args, **kwargs), self._on_query)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+class _PreparedCursor:
+    """
+    Cursor yang mengeksekusi lewat server-side prepared statement.
+
+    Satu cursor prepared per teks SQL di-cache per koneksi fisik, sehingga
+    statement yang sama hanya di-parse (COM_STMT_PREPARE) sekali per koneksi;
+    eksekusi berikutnya cukup COM_STMT_EXECUTE dengan parameter biner.
+    """
+
+    def __init__(self, conn, statements, dictionary, max_statements, on_prepare):
+        self._conn = conn
+        self._statements = statements
+        self._dictionary = dictionary
+        self._max_statements = max_statements
+        self._on_prepare = on_prepare
+        self._current = None
+
+    def execute(self, operation, params=()):
+        key = (operation, self._dictionary)
+        cur = self._statements.get(key)
+        if cur is None:
+            cur = self._conn.cursor(prepared=True, dictionary=self._dictionary)
+            self._statements[key] = cur
+            self._on_prepare()
+            if len(self._statements) > self._max_statements:
+                # Statement paling lama tidak dipakai di-DEALLOCATE
+                _, oldest = self._statements.popitem(last=False)
+                oldest.close()
+        else:
+            self._statements.move_to_end(key)
+        self._current = cur
+        return cur.execute(operation, params)
+
+    def close(self):
+        # Cursor tetap di cache (statement tetap ter-prepare); cukup habiskan sisa hasil
+        if self._current is not None and self._conn.unread_result:
+            self._current.fetchall()
+        self._current = None
+
+    def __iter__(self):
+        return iter(self._current)
+
+    def __getattr__(self, name):
+        return getattr(self._current, name)
+
+
+class ConnectionPool:
+    """
+    Pool koneksi MySQL bersama untuk seluruh fungsi data.
+
+    Membungkus pooling.MySQLConnectionPool dengan:
+    - checkout lewat context manager (koneksi selalu dikembalikan ke pool)
+    - antrean tunggu dengan timeout saat pool penuh (bawaan mysql-connector langsung error)
+    - health check (ping) untuk koneksi yang lama menganggur
+    - statistik pemakaian: checkouts, waits, timeouts, reconnects, in_use
+    - opsional on_query(statement, detik) untuk setiap statement (instrumentasi)
+    - cursor(prepared=True): server-side prepared statement yang di-cache per koneksi.
+      Hanya aktif jika reset_session=False, karena reset session (COM_RESET_CONNECTION)
+      saat koneksi kembali ke pool ikut membuang semua prepared statement; sebagai
+      gantinya transaksi yang masih terbuka di-rollback saat koneksi dikembalikan.
+    """
+
+    def __init__(self, config, pool_name='absesgo_pool', pool_size=10,
+                 timeout=5.0, ping_interval=30.0, reset_session=True, on_query=None,
+                 max_prepared_statements=32):
+        self.config = dict(config)
+        self.pool_name = pool_name
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self.reset_session = reset_session
+        self.on_query = on_query
+        self.max_prepared_statements = max_prepared_statements
+        # connection_id -> OrderedDict((sql, dictionary) -> cursor prepared)
+        self._statements = {}
+
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._stats_lock = threading.Lock()
+        self._last_used = {}
+        self._stats = {
+            'checkouts': 0,
+            'waits': 0,
+            'timeouts': 0,
+            'reconnects': 0,
+            'errors': 0,
+            'in_use': 0,
+            'wait_seconds_total': 0.0,
+            'statements_prepared': 0,
+        }
+
+    def _get_pool(self):
+        # Pool dibuat saat pertama dipakai agar import modul tidak langsung konek ke MySQL
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    self._pool = pooling.MySQLConnectionPool(
+                        pool_name=self.pool_name,
+                        pool_size=self.pool_size,
+                        pool_reset_session=self.reset_session,
+                        **self.config
+                    )
+        return self._pool
+
+    def _bump(self, key, amount=1):
+        with self._stats_lock:
+            self._stats[key] += amount
+
+    def _acquire_slot(self):
+        if self._slots.acquire(blocking=False):
+            return
+        self._bump('waits')
+        started = time.monotonic()
+        acquired = self._slots.acquire(timeout=self.timeout)
+        self._bump('wait_seconds_total', time.monotonic() - started)
+        if not acquired:
+            self._bump('timeouts')
+            raise errors.PoolError(
+                f"Pool '{self.pool_name}' penuh: tidak ada koneksi dalam {self.timeout} detik"
+            )
+
+    def _health_check(self, conn):
+        # Ping hanya jika koneksi sudah lama menganggur, agar checkout biasa tidak menambah round-trip
+        conn_id = conn.connection_id
+        last_used = self._last_used.get(conn_id)
+        if last_used is not None and time.monotonic() - last_used < self.ping_interval:
+            return conn
+        try:
+            conn.ping(reconnect=False)
+        except errors.Error:
+            # Session baru: prepared statement koneksi lama tidak berlaku lagi
+            self._drop_statements(conn_id)
+            conn.reconnect(attempts=2, delay=0)
+            self._bump('reconnects')
+        return conn
+
+    @property
+    def prepared_enabled(self):
+        return not self.reset_session and self.max_prepared_statements > 0
+
+    @contextmanager
+    def connection(self):
+        """Checkout satu koneksi dari pool, otomatis dikembalikan setelah selesai"""
+        self._acquire_slot()
+        conn = None
+        try:
+            conn = self._health_check(self._get_pool().get_connection())
+            with self._stats_lock:
+                self._stats['checkouts'] += 1
+                self._stats['in_use'] += 1
+            try:
+                yield _TimedConnection(conn, self.on_query) if self.on_query else conn
+            except Exception:
+                self._bump('errors')
+                try:
+                    # Prepared statement koneksi ini bisa dalam keadaan setengah jalan
+                    self._drop_statements(conn.connection_id)
+                    conn.rollback()
+                except errors.Error:
+                    pass
+                raise
+            finally:
+                self._bump('in_use', -1)
+        finally:
+            if conn is not None:
+                try:
+                    self._last_used[conn.connection_id] = time.monotonic()
+                    if not self.reset_session and conn.in_transaction:
+                        # Tanpa reset session, snapshot baca/transaksi tidak boleh terbawa ke checkout berikutnya
+                        conn.rollback()
+                except errors.Error:
+                    pass
+                conn.close()
+            self._slots.release()
+
+    def _drop_statements(self, conn_id):
+        """Buang cache prepared statement koneksi; cursor ditutup (DEALLOCATE) agar tidak bocor di server"""
+        statements = self._statements.pop(conn_id, None)
+        for cur in (statements or {}).values():
+            try:
+                cur.close()
+            except errors.Error:
+                pass
+
+    def _prepared_cursor(self, conn, dictionary):
+        statements = self._statements.get(conn.connection_id)
+        if statements is None:
+            statements = self._statements[conn.connection_id] = OrderedDict()
+        return _PreparedCursor(conn, statements, dictionary, self.max_prepared_statements,
+                               lambda: self._bump('statements_prepared'))
+
+    @contextmanager
+    def cursor(self, dictionary=False, commit=False, prepared=False):
+        """
+        Checkout koneksi + cursor; commit otomatis jika commit=True.
+        prepared=True: eksekusi lewat prepared statement yang di-cache per koneksi
+        (jatuh ke cursor teks biasa jika prepared statement tidak aktif).
+        """
+        with self.connection() as conn:
+            if prepared and self.prepared_enabled:
+                cur = self._prepared_cursor(conn, dictionary)
+            else:
+                cur = conn.cursor(dictionary=dictionary)
+            try:
+                yield cur
+                if commit:
+                    conn.commit()
+            finally:
+                cur.close()
+
+    def stats(self):
+        """Snapshot statistik pool"""
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        snapshot['pool_name'] = self.pool_name
+        snapshot['pool_size'] = self.pool_size
+        snapshot['timeout'] = self.timeout
+        snapshot['reset_session'] = self.reset_session
+        snapshot['prepared_statements'] = self.prepared_enabled
+        return snapshot
@@ -0,0 +1,214 @@
+# metrics.py
+import bisect
+import threading
+import time
+
+from flask import Response, g, has_request_context, request, before_render_template, template_rendered
+
+# Bucket default (detik), sama dengan default client Prometheus
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 4, 5, 8, 13, 21, 50, 100)
+
+SQL_OPERATIONS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'CALL', 'SHOW', 'REPLACE')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ========================================
+# TIPE METRIK (FORMAT TEKS PROMETHEUS)
+# ========================================
+
+class Histogram:
+    """Histogram Prometheus dengan label; thread-safe"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(key, list(counts), total, count) for key, (counts, total, count) in self._series.items()]
+        for key, counts, total, count in sorted(items):
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Counter:
+    """Counter Prometheus dengan label; thread-safe"""
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+# ========================================
+# INSTRUMENTASI APLIKASI
+# ========================================
+
+class Metrics:
+    """
+    Instrumentasi hot path per proses:
+    - durasi request per route (+ jumlah & total waktu query DB per request)
+    - durasi tiap statement SQL lewat pool (on_query dari ConnectionPool) + log query lambat
+    - durasi render template Jinja
+    Semua sampel berlabel route (pola URL Flask, mis. /api/siswa/<int:id_siswa>).
+    """
+
+    def __init__(self, slow_query_seconds=0.5, prefix='absesgo'):
+        self.slow_query_seconds = slow_query_seconds
+        self.request_duration = Histogram(
+            f'{prefix}_http_request_duration_seconds', 'Durasi request HTTP',
+            ('route', 'method', 'status'))
+        self.request_db_queries = Histogram(
+            f'{prefix}_http_request_db_queries', 'Jumlah query DB per request',
+            ('route',), COUNT_BUCKETS)
+        self.request_db_seconds = Histogram(
+            f'{prefix}_http_request_db_seconds', 'Total waktu query DB per request',
+            ('route',), QUERY_BUCKETS)
+        self.query_duration = Histogram(
+            f'{prefix}_db_query_duration_seconds', 'Durasi statement SQL',
+            ('route', 'operation'), QUERY_BUCKETS)
+        self.slow_queries = Counter(
+            f'{prefix}_db_slow_queries_total', 'Statement SQL di atas ambang query lambat',
+            ('route', 'operation'))
+        self.template_duration = Histogram(
+            f'{prefix}_template_render_duration_seconds', 'Durasi render template Jinja',
+            ('route', 'template'), QUERY_BUCKETS)
+        self._metrics = [self.request_duration, self.request_db_queries, self.request_db_seconds,
+                         self.query_duration, self.slow_queries, self.template_duration]
+
+    @staticmethod
+    def current_route():
+        """Label route untuk sampel saat ini ('background' di luar request)"""
+        if not has_request_context():
+            return 'background'
+        rule = request.url_rule
+        return rule.rule if rule is not None else 'unmatched'
+
+    @staticmethod
+    def sql_operation(statement):
+        words = statement.lstrip().split(None, 1)
+        operation = words[0].upper() if words else ''
+        return operation if operation in SQL_OPERATIONS else 'OTHER'
+
+    def observe_query(self, statement, seconds):
+        """Callback ConnectionPool(on_query=...) untuk setiap execute/executemany"""
+        if isinstance(statement, (bytes, bytearray)):
+            statement = statement.decode('utf-8', 'replace')
+        route = self.current_route()
+        operation = self.sql_operation(statement)
+        self.query_duration.observe(seconds, route=route, operation=operation)
+        if has_request_context() and hasattr(g, '_metrics_started'):
+            g._metrics_queries += 1
+            g._metrics_db_seconds += seconds
+        if self.slow_query_seconds and seconds >= self.slow_query_seconds:
+            self.slow_queries.inc(route=route, operation=operation)
+            sql = ' '.join(statement.split())
+            print(f"[SLOW QUERY] {seconds:.3f}s route={route} {sql[:300]}")
+
+    def observe_request(self, route, method, status, seconds, queries=None, db_seconds=None):
+        self.request_duration.observe(seconds, route=route, method=method, status=str(status))
+        if queries is not None:
+            self.request_db_queries.observe(queries, route=route)
+            self.request_db_seconds.observe(db_seconds, route=route)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    # ----------------------------------------
+    # Integrasi Flask
+    # ----------------------------------------
+
+    def _before_request(self):
+        g._metrics_started = time.perf_counter()
+        g._metrics_queries = 0
+        g._metrics_db_seconds = 0.0
+
+    def _after_request(self, response):
+        started = g.pop('_metrics_started', None)
+        if started is not None:
+            self.observe_request(
+                self.current_route(), request.method, response.status_code,
+                time.perf_counter() - started, g._metrics_queries, g._metrics_db_seconds,
+            )
+        return response
+
+    def _before_render(self, sender, template, context, **extra):
+        g.setdefault('_metrics_templates', []).append(time.perf_counter())
+
+    def _rendered(self, sender, template, context, **extra):
+        stack = g.get('_metrics_templates')
+        if stack:
+            self.template_duration.observe(time.perf_counter() - stack.pop(),
+                                           route=self.current_route(), template=template.name or '')
+
+    def init_app(self, app, endpoint='/metrics'):
+        """Pasang hook request, sinyal render template, dan endpoint /metrics"""
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._rendered, app)
+
+        def metrics_endpoint():
+            return Response(self.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+        app.add_url_rule(endpoint, 'metrics', metrics_endpoint)
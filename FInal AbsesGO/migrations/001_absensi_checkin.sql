@@ -0,0 +1,65 @@
+-- 001_absensi_checkin.sql
+-- Check-in atomik: satu siswa hanya bisa absen sekali per hari (dijaga oleh UNIQUE KEY),
+-- validasi token + insert absensi dilakukan dalam satu CALL sp_checkin.
+
+-- Kolom tanggal diturunkan otomatis dari waktu_absen, sehingga INSERT lama tetap berjalan
+ALTER TABLE absensi
+    ADD COLUMN tanggal DATE AS (DATE(waktu_absen)) STORED;
+
+-- Hapus duplikat lama (sisakan absen paling awal) sebelum UNIQUE KEY dipasang
+DELETE a1 FROM absensi a1
+JOIN absensi a2
+  ON a1.id_siswa = a2.id_siswa
+ AND a1.tanggal = a2.tanggal
+ AND a1.id_absen > a2.id_absen;
+
+ALTER TABLE absensi
+    ADD UNIQUE KEY uq_absensi_siswa_tanggal (id_siswa, tanggal);
+
+-- Lookup token harus lewat index (lewati jika token sudah UNIQUE/ber-index)
+CREATE INDEX idx_qr_token_token ON qr_token (token);
+
+DROP PROCEDURE IF EXISTS sp_checkin;
+
+DELIMITER $$
+CREATE PROCEDURE sp_checkin(IN p_id_siswa INT, IN p_token VARCHAR(255), IN p_now DATETIME)
+BEGIN
+    DECLARE v_inserted INT DEFAULT 0;
+    DECLARE v_expired DATETIME;
+    DECLARE v_siswa INT DEFAULT 0;
+
+    START TRANSACTION;
+
+    -- Token valid + siswa ada -> insert; duplikat hari ini ditolak oleh uq_absensi_siswa_tanggal
+    INSERT INTO absensi (id_siswa, waktu_absen, token_qr, status, nama_siswa, jurusan, kelas)
+    SELECT s.id_siswa, p_now, t.token, 'hadir', s.nama_siswa, s.jurusan, s.kelas
+    FROM qr_token t
+    JOIN siswa s ON s.id_siswa = p_id_siswa
+    WHERE t.token = p_token
+      AND t.status = 'aktif'
+      AND t.waktu_expired >= p_now
+    LIMIT 1
+    ON DUPLICATE KEY UPDATE id_absen = id_absen;
+
+    SET v_inserted = ROW_COUNT();
+
+    COMMIT;
+
+    IF v_inserted = 1 THEN
+        SELECT 'hadir' AS hasil;
+    ELSE
+        -- Jalur gagal saja: bedakan token invalid/expired dari sudah absen
+        SET v_expired = (SELECT waktu_expired FROM qr_token
+                         WHERE token = p_token AND status = 'aktif' LIMIT 1);
+        SET v_siswa = (SELECT COUNT(*) FROM siswa WHERE id_siswa = p_id_siswa);
+
+        IF v_expired IS NULL OR v_siswa = 0 THEN
+            SELECT 'invalid' AS hasil;
+        ELSEIF v_expired < p_now THEN
+            SELECT 'expired' AS hasil;
+        ELSE
+            SELECT 'sudah_absen' AS hasil;
+        END IF;
+    END IF;
+END$$
+DELIMITER ;
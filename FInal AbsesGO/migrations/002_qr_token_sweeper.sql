@@ -0,0 +1,11 @@
+-- 002_qr_token_sweeper.sql
+-- Index untuk sweeper token (bulk expire & retensi) dan tabel arsip token lama.
+
+-- UPDATE ... WHERE status='aktif' AND waktu_expired < ? (bulk expire)
+CREATE INDEX idx_qr_token_status_expired ON qr_token (status, waktu_expired);
+
+-- SELECT/DELETE ... WHERE waktu_expired < ? ORDER BY waktu_expired (retensi per batch)
+CREATE INDEX idx_qr_token_expired ON qr_token (waktu_expired);
+
+-- Arsip token yang melewati masa retensi (TOKEN_RETENTION_MODE=archive)
+CREATE TABLE IF NOT EXISTS qr_token_arsip LIKE qr_token;
@@ -0,0 +1,11 @@
+-- 003_absensi_keyset_index.sql
+-- Index komposit untuk pagination keyset (waktu_absen DESC, id_absen DESC) + filter.
+
+-- Halaman tanpa filter
+CREATE INDEX idx_absensi_waktu_id ON absensi (waktu_absen, id_absen);
+
+-- Filter kelas (+ jurusan) dengan rentang tanggal
+CREATE INDEX idx_absensi_kelas_jurusan_waktu ON absensi (kelas, jurusan, waktu_absen, id_absen);
+
+-- Filter jurusan saja dengan rentang tanggal
+CREATE INDEX idx_absensi_jurusan_waktu ON absensi (jurusan, waktu_absen, id_absen);
@@ -0,0 +1,5 @@
+-- 004_absensi_filter_index.sql
+-- Filter export/API "kelas saja + bulan/rentang tanggal": index (kelas, jurusan, ...) dari 003
+-- tidak bisa dipakai untuk rentang waktu_absen jika jurusan tidak difilter.
+
+CREATE INDEX idx_absensi_kelas_waktu ON absensi (kelas, waktu_absen, id_absen);
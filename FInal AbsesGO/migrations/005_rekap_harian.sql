@@ -0,0 +1,108 @@
+-- 005_rekap_harian.sql
+-- Ringkasan harian per tanggal x kelas x jurusan (hadir vs jumlah siswa terdaftar).
+-- Diperbarui oleh sp_checkin di transaksi yang sama dengan insert absensi;
+-- sp_rollup_rekap menghitung ulang satu tanggal penuh (backfill / koreksi).
+
+CREATE TABLE IF NOT EXISTS rekap_harian (
+    tanggal DATE NOT NULL,
+    kelas VARCHAR(50) NOT NULL DEFAULT '',
+    jurusan VARCHAR(50) NOT NULL DEFAULT '',
+    jumlah_hadir INT NOT NULL DEFAULT 0,
+    jumlah_siswa INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (tanggal, kelas, jurusan),
+    KEY idx_rekap_kelas_tanggal (kelas, jurusan, tanggal)
+);
+
+-- Hitung jumlah siswa per kelas/jurusan lewat index
+CREATE INDEX idx_siswa_kelas_jurusan ON siswa (kelas, jurusan);
+
+DROP PROCEDURE IF EXISTS sp_checkin;
+DROP PROCEDURE IF EXISTS sp_rollup_rekap;
+
+DELIMITER $$
+CREATE PROCEDURE sp_checkin(IN p_id_siswa INT, IN p_token VARCHAR(255), IN p_now DATETIME)
+BEGIN
+    DECLARE v_inserted INT DEFAULT 0;
+    DECLARE v_expired DATETIME;
+    DECLARE v_siswa INT DEFAULT 0;
+
+    START TRANSACTION;
+
+    -- Token valid + siswa ada -> insert; duplikat hari ini ditolak oleh uq_absensi_siswa_tanggal
+    INSERT INTO absensi (id_siswa, waktu_absen, token_qr, status, nama_siswa, jurusan, kelas)
+    SELECT s.id_siswa, p_now, t.token, 'hadir', s.nama_siswa, s.jurusan, s.kelas
+    FROM qr_token t
+    JOIN siswa s ON s.id_siswa = p_id_siswa
+    WHERE t.token = p_token
+      AND t.status = 'aktif'
+      AND t.waktu_expired >= p_now
+    LIMIT 1
+    ON DUPLICATE KEY UPDATE id_absen = id_absen;
+
+    SET v_inserted = ROW_COUNT();
+
+    -- Rekap harian ikut diperbarui di transaksi yang sama
+    IF v_inserted = 1 THEN
+        INSERT INTO rekap_harian (tanggal, kelas, jurusan, jumlah_hadir, jumlah_siswa)
+        SELECT DATE(p_now), COALESCE(s.kelas, ''), COALESCE(s.jurusan, ''), 1,
+               (SELECT COUNT(*) FROM siswa s2
+                WHERE s2.kelas <=> s.kelas AND s2.jurusan <=> s.jurusan)
+        FROM siswa s
+        WHERE s.id_siswa = p_id_siswa
+        ON DUPLICATE KEY UPDATE jumlah_hadir = jumlah_hadir + 1;
+    END IF;
+
+    COMMIT;
+
+    IF v_inserted = 1 THEN
+        SELECT 'hadir' AS hasil;
+    ELSE
+        -- Jalur gagal saja: bedakan token invalid/expired dari sudah absen
+        SET v_expired = (SELECT waktu_expired FROM qr_token
+                         WHERE token = p_token AND status = 'aktif' LIMIT 1);
+        SET v_siswa = (SELECT COUNT(*) FROM siswa WHERE id_siswa = p_id_siswa);
+
+        IF v_expired IS NULL OR v_siswa = 0 THEN
+            SELECT 'invalid' AS hasil;
+        ELSEIF v_expired < p_now THEN
+            SELECT 'expired' AS hasil;
+        ELSE
+            SELECT 'sudah_absen' AS hasil;
+        END IF;
+    END IF;
+END$$
+
+CREATE PROCEDURE sp_rollup_rekap(IN p_tanggal DATE)
+BEGIN
+    START TRANSACTION;
+
+    DELETE FROM rekap_harian WHERE tanggal = p_tanggal;
+
+    INSERT INTO rekap_harian (tanggal, kelas, jurusan, jumlah_hadir, jumlah_siswa)
+    SELECT p_tanggal, k.kelas, k.jurusan, COALESCE(h.jumlah_hadir, 0), k.jumlah_siswa
+    FROM (
+        SELECT COALESCE(kelas, '') AS kelas, COALESCE(jurusan, '') AS jurusan, COUNT(*) AS jumlah_siswa
+        FROM siswa
+        GROUP BY COALESCE(kelas, ''), COALESCE(jurusan, '')
+    ) k
+    LEFT JOIN (
+        SELECT COALESCE(kelas, '') AS kelas, COALESCE(jurusan, '') AS jurusan, COUNT(*) AS jumlah_hadir
+        FROM absensi
+        WHERE tanggal = p_tanggal AND status = 'hadir'
+        GROUP BY COALESCE(kelas, ''), COALESCE(jurusan, '')
+    ) h ON h.kelas = k.kelas AND h.jurusan = k.jurusan;
+
+    COMMIT;
+END$$
+DELIMITER ;
+
+-- Backfill rekap dari riwayat absensi yang sudah ada
+INSERT INTO rekap_harian (tanggal, kelas, jurusan, jumlah_hadir, jumlah_siswa)
+SELECT a.tanggal, COALESCE(a.kelas, ''), COALESCE(a.jurusan, ''), COUNT(*),
+       (SELECT COUNT(*) FROM siswa s
+        WHERE COALESCE(s.kelas, '') = COALESCE(a.kelas, '')
+          AND COALESCE(s.jurusan, '') = COALESCE(a.jurusan, ''))
+FROM absensi a
+WHERE a.status = 'hadir'
+GROUP BY a.tanggal, COALESCE(a.kelas, ''), COALESCE(a.jurusan, '')
+ON DUPLICATE KEY UPDATE jumlah_hadir = VALUES(jumlah_hadir), jumlah_siswa = VALUES(jumlah_siswa);
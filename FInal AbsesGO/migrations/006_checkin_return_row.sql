@@ -0,0 +1,64 @@
+-- 006_checkin_return_row.sql
+-- sp_checkin mengembalikan data absen yang baru tercatat (untuk push live ke dashboard guru),
+-- tetap dalam satu CALL.
+
+DROP PROCEDURE IF EXISTS sp_checkin;
+
+DELIMITER $$
+CREATE PROCEDURE sp_checkin(IN p_id_siswa INT, IN p_token VARCHAR(255), IN p_now DATETIME)
+BEGIN
+    DECLARE v_inserted INT DEFAULT 0;
+    DECLARE v_expired DATETIME;
+    DECLARE v_siswa INT DEFAULT 0;
+    DECLARE v_id_absen INT DEFAULT NULL;
+
+    START TRANSACTION;
+
+    -- Token valid + siswa ada -> insert; duplikat hari ini ditolak oleh uq_absensi_siswa_tanggal
+    INSERT INTO absensi (id_siswa, waktu_absen, token_qr, status, nama_siswa, jurusan, kelas)
+    SELECT s.id_siswa, p_now, t.token, 'hadir', s.nama_siswa, s.jurusan, s.kelas
+    FROM qr_token t
+    JOIN siswa s ON s.id_siswa = p_id_siswa
+    WHERE t.token = p_token
+      AND t.status = 'aktif'
+      AND t.waktu_expired >= p_now
+    LIMIT 1
+    ON DUPLICATE KEY UPDATE id_absen = id_absen;
+
+    SET v_inserted = ROW_COUNT();
+    SET v_id_absen = LAST_INSERT_ID();
+
+    -- Rekap harian ikut diperbarui di transaksi yang sama
+    IF v_inserted = 1 THEN
+        INSERT INTO rekap_harian (tanggal, kelas, jurusan, jumlah_hadir, jumlah_siswa)
+        SELECT DATE(p_now), COALESCE(s.kelas, ''), COALESCE(s.jurusan, ''), 1,
+               (SELECT COUNT(*) FROM siswa s2
+                WHERE s2.kelas <=> s.kelas AND s2.jurusan <=> s.jurusan)
+        FROM siswa s
+        WHERE s.id_siswa = p_id_siswa
+        ON DUPLICATE KEY UPDATE jumlah_hadir = jumlah_hadir + 1;
+    END IF;
+
+    COMMIT;
+
+    IF v_inserted = 1 THEN
+        SELECT 'hadir' AS hasil, v_id_absen AS id_absen, s.nis, s.nama_siswa,
+               s.kelas, s.jurusan, p_now AS waktu_absen
+        FROM siswa s
+        WHERE s.id_siswa = p_id_siswa;
+    ELSE
+        -- Jalur gagal saja: bedakan token invalid/expired dari sudah absen
+        SET v_expired = (SELECT waktu_expired FROM qr_token
+                         WHERE token = p_token AND status = 'aktif' LIMIT 1);
+        SET v_siswa = (SELECT COUNT(*) FROM siswa WHERE id_siswa = p_id_siswa);
+
+        IF v_expired IS NULL OR v_siswa = 0 THEN
+            SELECT 'invalid' AS hasil;
+        ELSEIF v_expired < p_now THEN
+            SELECT 'expired' AS hasil;
+        ELSE
+            SELECT 'sudah_absen' AS hasil;
+        END IF;
+    END IF;
+END$$
+DELIMITER ;
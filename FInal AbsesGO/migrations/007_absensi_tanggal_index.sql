@@ -0,0 +1,5 @@
+-- 007_absensi_tanggal_index.sql
+-- Write-behind absensi: dedupe set harian diisi dengan "SELECT id_siswa FROM absensi WHERE tanggal = ?".
+-- UNIQUE (id_siswa, tanggal) diawali id_siswa sehingga tidak bisa dipakai; index ini covering.
+
+CREATE INDEX idx_absensi_tanggal ON absensi (tanggal, id_siswa);
@@ -0,0 +1,6 @@
+-- 008_password_hash.sql
+-- Password disimpan sebagai hash Werkzeug ("metode$salt$hash", ~100-180 karakter).
+-- Password plaintext lama tetap bisa login dan di-hash ulang otomatis saat login pertama.
+
+ALTER TABLE guru MODIFY password VARCHAR(255) NOT NULL;
+ALTER TABLE siswa MODIFY password VARCHAR(255) NOT NULL;
@@ -0,0 +1,58 @@
+-- 009_checkin_profil.sql
+-- sp_checkin_profil: sama dengan sp_checkin, tetapi nis/nama/jurusan/kelas dikirim dari profil siswa
+-- yang sudah di-cache saat login, sehingga jalur sukses tidak membaca tabel siswa.
+-- sp_checkin tetap dipakai saat profil tidak ada di cache.
+
+DROP PROCEDURE IF EXISTS sp_checkin_profil;
+
+DELIMITER $$
+CREATE PROCEDURE sp_checkin_profil(IN p_id_siswa INT, IN p_token VARCHAR(255), IN p_now DATETIME,
+                                   IN p_nis VARCHAR(255), IN p_nama VARCHAR(255),
+                                   IN p_jurusan VARCHAR(255), IN p_kelas VARCHAR(255))
+BEGIN
+    DECLARE v_inserted INT DEFAULT 0;
+    DECLARE v_expired DATETIME;
+    DECLARE v_id_absen INT DEFAULT NULL;
+
+    START TRANSACTION;
+
+    -- Token valid -> insert; duplikat hari ini ditolak oleh uq_absensi_siswa_tanggal
+    INSERT INTO absensi (id_siswa, waktu_absen, token_qr, status, nama_siswa, jurusan, kelas)
+    SELECT p_id_siswa, p_now, t.token, 'hadir', p_nama, p_jurusan, p_kelas
+    FROM qr_token t
+    WHERE t.token = p_token
+      AND t.status = 'aktif'
+      AND t.waktu_expired >= p_now
+    LIMIT 1
+    ON DUPLICATE KEY UPDATE id_absen = id_absen;
+
+    SET v_inserted = ROW_COUNT();
+    SET v_id_absen = LAST_INSERT_ID();
+
+    IF v_inserted = 1 THEN
+        INSERT INTO rekap_harian (tanggal, kelas, jurusan, jumlah_hadir, jumlah_siswa)
+        SELECT DATE(p_now), COALESCE(p_kelas, ''), COALESCE(p_jurusan, ''), 1,
+               (SELECT COUNT(*) FROM siswa s2
+                WHERE s2.kelas <=> p_kelas AND s2.jurusan <=> p_jurusan)
+        ON DUPLICATE KEY UPDATE jumlah_hadir = jumlah_hadir + 1;
+    END IF;
+
+    COMMIT;
+
+    IF v_inserted = 1 THEN
+        SELECT 'hadir' AS hasil, v_id_absen AS id_absen, p_nis AS nis, p_nama AS nama_siswa,
+               p_kelas AS kelas, p_jurusan AS jurusan, p_now AS waktu_absen;
+    ELSE
+        SET v_expired = (SELECT waktu_expired FROM qr_token
+                         WHERE token = p_token AND status = 'aktif' LIMIT 1);
+
+        IF v_expired IS NULL THEN
+            SELECT 'invalid' AS hasil;
+        ELSEIF v_expired < p_now THEN
+            SELECT 'expired' AS hasil;
+        ELSE
+            SELECT 'sudah_absen' AS hasil;
+        END IF;
+    END IF;
+END$$
+DELIMITER ;
@@ -0,0 +1,6 @@
+-- 010_siswa_username_unique.sql
+-- Import siswa massal meng-upsert berdasarkan username (INSERT ... ON DUPLICATE KEY UPDATE).
+-- Pastikan tidak ada username ganda sebelum menjalankan:
+--   SELECT username, COUNT(*) FROM siswa GROUP BY username HAVING COUNT(*) > 1;
+
+ALTER TABLE siswa ADD UNIQUE KEY uq_siswa_username (username);
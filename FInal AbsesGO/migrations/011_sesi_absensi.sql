@@ -0,0 +1,26 @@
+-- 011_sesi_absensi.sql
+-- Sesi absensi: satu sesi per guru × kelas (waktu mulai/selesai).
+-- Setiap sesi memiliki tepat satu baris qr_token yang dirotasi di tempat (UPDATE),
+-- sehingga auto-refresh dashboard tidak menambah baris baru.
+-- Token sesi berformat "<id_sesi>.<acak>" dan dicari lewat id_sesi, bukan string token.
+
+CREATE TABLE IF NOT EXISTS sesi_absensi (
+    id_sesi INT AUTO_INCREMENT PRIMARY KEY,
+    guru VARCHAR(255) NOT NULL,
+    kelas VARCHAR(255) NULL,
+    waktu_mulai DATETIME NOT NULL,
+    waktu_selesai DATETIME NULL,
+    status ENUM('aktif', 'selesai') NOT NULL DEFAULT 'aktif',
+    KEY idx_sesi_status_guru (status, guru)
+);
+
+ALTER TABLE qr_token ADD COLUMN id_sesi INT NULL;
+
+-- Satu baris token per sesi (token lama tanpa sesi tetap NULL)
+ALTER TABLE qr_token ADD UNIQUE KEY uq_qr_token_sesi (id_sesi);
+
+-- SELECT ... WHERE id_sesi=? AND status='aktif' (verifikasi token sesi saat cache miss)
+CREATE INDEX idx_qr_token_sesi_status_expired ON qr_token (id_sesi, status, waktu_expired);
+
+-- Arsip token mengikuti struktur qr_token (INSERT ... SELECT * di sweeper)
+ALTER TABLE qr_token_arsip ADD COLUMN id_sesi INT NULL;
@@ -0,0 +1,57 @@
+-- 012_checkin_sesi.sql
+-- sp_checkin_sesi: check-in dengan token QR bertanda tangan (QR_TOKEN_MODE=signed).
+-- Tanda tangan & kadaluarsa token sudah diverifikasi aplikasi, sehingga qr_token tidak dibaca;
+-- yang dicek hanya sesi masih aktif (primary key sesi_absensi) dan duplikat harian.
+-- Profil siswa dikirim dari cache; jika NULL dibaca dari tabel siswa.
+
+DROP PROCEDURE IF EXISTS sp_checkin_sesi;
+
+DELIMITER $$
+CREATE PROCEDURE sp_checkin_sesi(IN p_id_siswa INT, IN p_id_sesi INT, IN p_token VARCHAR(255), IN p_now DATETIME,
+                                 IN p_nis VARCHAR(255), IN p_nama VARCHAR(255),
+                                 IN p_jurusan VARCHAR(255), IN p_kelas VARCHAR(255))
+BEGIN
+    DECLARE v_inserted INT DEFAULT 0;
+    DECLARE v_id_absen INT DEFAULT NULL;
+
+    IF p_nis IS NULL THEN
+        SELECT nis, nama_siswa, jurusan, kelas INTO p_nis, p_nama, p_jurusan, p_kelas
+        FROM siswa WHERE id_siswa = p_id_siswa;
+    END IF;
+
+    START TRANSACTION;
+
+    -- Sesi aktif -> insert; duplikat hari ini ditolak oleh uq_absensi_siswa_tanggal
+    INSERT INTO absensi (id_siswa, waktu_absen, token_qr, status, nama_siswa, jurusan, kelas)
+    SELECT p_id_siswa, p_now, p_token, 'hadir', p_nama, p_jurusan, p_kelas
+    FROM sesi_absensi s
+    WHERE s.id_sesi = p_id_sesi
+      AND s.status = 'aktif'
+      AND p_nis IS NOT NULL
+    LIMIT 1
+    ON DUPLICATE KEY UPDATE id_absen = id_absen;
+
+    SET v_inserted = ROW_COUNT();
+    SET v_id_absen = LAST_INSERT_ID();
+
+    IF v_inserted = 1 THEN
+        INSERT INTO rekap_harian (tanggal, kelas, jurusan, jumlah_hadir, jumlah_siswa)
+        SELECT DATE(p_now), COALESCE(p_kelas, ''), COALESCE(p_jurusan, ''), 1,
+               (SELECT COUNT(*) FROM siswa s2
+                WHERE s2.kelas <=> p_kelas AND s2.jurusan <=> p_jurusan)
+        ON DUPLICATE KEY UPDATE jumlah_hadir = jumlah_hadir + 1;
+    END IF;
+
+    COMMIT;
+
+    IF v_inserted = 1 THEN
+        SELECT 'hadir' AS hasil, v_id_absen AS id_absen, p_nis AS nis, p_nama AS nama_siswa,
+               p_kelas AS kelas, p_jurusan AS jurusan, p_now AS waktu_absen;
+    ELSEIF p_nis IS NULL
+        OR NOT EXISTS (SELECT 1 FROM sesi_absensi WHERE id_sesi = p_id_sesi AND status = 'aktif') THEN
+        SELECT 'invalid' AS hasil;
+    ELSE
+        SELECT 'sudah_absen' AS hasil;
+    END IF;
+END$$
+DELIMITER ;
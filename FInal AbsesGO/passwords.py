@@ -0,0 +1,130 @@
+# passwords.py
+import hashlib
+import hmac
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from werkzeug.security import check_password_hash, generate_password_hash
+
+# Prefix metode hash Werkzeug ("metode$salt$hash")
+HASH_PREFIXES = ('pbkdf2:', 'scrypt:')
+
+
+class HasherBusy(Exception):
+    """Antrean hashing penuh / terlalu lama menunggu worker"""
+
+
+class PasswordHasher:
+    """
+    Hash & verifikasi password di worker pool terbatas.
+
+    - KDF (pbkdf2/scrypt lewat hashlib, GIL dilepas) dijalankan di ThreadPoolExecutor
+      berukuran `workers`, sehingga lonjakan login tidak memakan semua core
+    - paling banyak `max_pending` verifikasi antre; selebihnya HasherBusy (login dijawab 503)
+    - password lama yang masih plaintext tetap diterima dan di-hash ulang saat login,
+      begitu juga hash dengan parameter lama (method berbeda)
+    - verifikasi sukses di-cache (HMAC dari hash tersimpan + password, bukan password)
+      selama `cache_ttl` detik agar login ulang tidak menghitung KDF lagi
+    """
+
+    def __init__(self, method='pbkdf2:sha256:600000', workers=2, max_pending=64,
+                 timeout=10.0, cache=None, cache_ttl=600, secret=''):
+        self.method = method
+        self.timeout = timeout
+        self.cache = cache
+        self.cache_ttl = cache_ttl
+        self._secret = secret.encode('utf-8') if isinstance(secret, str) else secret
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hasher')
+        self._pending = threading.BoundedSemaphore(max_pending)
+        self.workers = workers
+        self.max_pending = max_pending
+        self.prefix = self.method_prefix(method)
+
+    @staticmethod
+    def is_hashed(stored):
+        return bool(stored) and stored.startswith(HASH_PREFIXES) and stored.count('$') >= 2
+
+    @staticmethod
+    def method_prefix(method):
+        """
+        Prefix lengkap "metode:parameter" yang ditulis Werkzeug untuk method ini
+        ('scrypt' -> 'scrypt:32768:8:1', 'pbkdf2:sha256' -> 'pbkdf2:sha256:<iterasi default>')
+        """
+        return generate_password_hash('', method).split('$', 1)[0]
+
+    def needs_rehash(self, stored):
+        return not self.is_hashed(stored) or stored.split('$', 1)[0] != self.prefix
+
+    def _run(self, fn, *args):
+        if not self._pending.acquire(timeout=self.timeout):
+            raise HasherBusy("Antrean verifikasi password penuh")
+        try:
+            return self._executor.submit(fn, *args).result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HasherBusy("Verifikasi password terlalu lama")
+        finally:
+            self._pending.release()
+
+    def hash(self, password):
+        """Hash password baru dengan metode yang dikonfigurasi"""
+        return self._run(generate_password_hash, password, self.method)
+
+    def hash_many(self, passwords):
+        """
+        Hash banyak password (import massal) lewat antrean terbatas yang sama dengan login;
+        paling banyak `workers` password import dalam antrean sekaligus agar login tetap kebagian slot.
+        """
+        in_flight = threading.BoundedSemaphore(self.workers)
+        futures = []
+
+        def release(_):
+            in_flight.release()
+            self._pending.release()
+
+        for password in passwords:
+            in_flight.acquire()
+            if not self._pending.acquire(timeout=self.timeout):
+                in_flight.release()
+                raise HasherBusy("Antrean hashing password penuh")
+            future = self._executor.submit(generate_password_hash, password, self.method)
+            future.add_done_callback(release)
+            futures.append(future)
+        return [f.result() for f in futures]
+
+    def _cache_key(self, stored, password):
+        digest = hmac.new(self._secret, f"{stored}\0{password}".encode('utf-8'), hashlib.sha256)
+        return 'pwd:' + digest.hexdigest()
+
+    def verify(self, stored, password):
+        """
+        Cek password terhadap nilai tersimpan.
+        Mengembalikan (cocok, hash_baru); hash_baru tidak None jika nilai tersimpan perlu diganti.
+        """
+        if not stored or password is None:
+            return False, None
+
+        if not self.is_hashed(stored):
+            # Migrasi: password lama masih plaintext
+            if not hmac.compare_digest(stored.encode('utf-8'), password.encode('utf-8')):
+                return False, None
+            return True, self.hash(password)
+
+        key = self._cache_key(stored, password) if self.cache is not None and self.cache_ttl > 0 else None
+        if key is not None and self.cache.get(key):
+            ok = True
+        else:
+            ok = self._run(check_password_hash, stored, password)
+            if ok and key is not None:
+                self.cache.set(key, True, self.cache_ttl)
+
+        if not ok:
+            return False, None
+        return True, self.hash(password) if self.needs_rehash(stored) else None
+
+    def stats(self):
+        return {
+            'method': self.prefix,
+            'workers': self.workers,
+            'max_pending': self.max_pending,
+            'cache_ttl': self.cache_ttl,
+        }
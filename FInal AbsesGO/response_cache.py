@@ -0,0 +1,103 @@
+# response_cache.py
+import gzip
+import hashlib
+import threading
+import uuid
+from functools import wraps
+
+from flask import current_app, request
+
+from cache import LocalBackend
+
+
+class ResponseCache:
+    """
+    Cache respons GET JSON berdasarkan versi data, dengan ETag & 304.
+
+    - setiap namespace data (mis. 'absensi', 'siswa') punya versi acak di backend
+      (lokal / Redis) yang diganti lewat bump() setiap kali datanya berubah
+    - ETag = hash(versi namespace + URL), jadi cek "sudah berubah?" tidak butuh query;
+      If-None-Match yang cocok langsung dijawab 304 tanpa query maupun serialisasi
+    - body 200 disimpan ter-gzip di LRU lokal dan dikirim apa adanya ke klien yang menerima gzip
+    """
+
+    def __init__(self, versions, max_entries=256, ttl=3600, version_ttl=86400, compress_level=6):
+        self.versions = versions
+        self.bodies = LocalBackend(max_entries=max_entries)
+        self.ttl = ttl
+        self.version_ttl = version_ttl
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._stats = {'not_modified': 0, 'hits': 0, 'misses': 0}
+
+    def _bump_stat(self, key):
+        with self._lock:
+            self._stats[key] += 1
+
+    @staticmethod
+    def _new_version():
+        return uuid.uuid4().hex[:12]
+
+    def version(self, namespace):
+        key = f"versi:{namespace}"
+        value = self.versions.get(key)
+        if value is None:
+            # Versi hilang (restart / evict): mulai versi baru, respons lama otomatis tidak terpakai
+            value = self._new_version()
+            self.versions.set(key, value, self.version_ttl)
+        return value
+
+    def bump(self, *namespaces):
+        """Tandai data namespace berubah; ETag & body cache lama tidak berlaku lagi"""
+        for namespace in namespaces:
+            self.versions.set(f"versi:{namespace}", self._new_version(), self.version_ttl)
+
+    def _etag(self, namespaces):
+        versions = '|'.join(self.version(ns) for ns in namespaces)
+        digest = hashlib.sha1(f"{versions}|{request.full_path}".encode('utf-8')).hexdigest()
+        return digest[:20]
+
+    def _response(self, etag, body=None):
+        if body is None:
+            response = current_app.response_class(status=304)
+        elif request.accept_encodings['gzip']:
+            response = current_app.response_class(body, status=200, mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+        else:
+            response = current_app.response_class(gzip.decompress(body), status=200,
+                                                  mimetype='application/json')
+        # ETag lemah: body gzip & tanpa gzip dianggap representasi yang sama
+        response.set_etag(etag, weak=True)
+        # Browser selalu revalidasi (If-None-Match), polling tanpa perubahan cukup 304
+        response.headers['Cache-Control'] = 'private, no-cache'
+        response.vary.add('Accept-Encoding')
+        return response
+
+    def cached(self, *namespaces):
+        """Decorator route GET; namespaces = data yang memengaruhi isi respons"""
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                etag = self._etag(namespaces)
+                if request.if_none_match.contains_weak(etag):
+                    self._bump_stat('not_modified')
+                    return self._response(etag)
+
+                body = self.bodies.get(etag)
+                if body is not None:
+                    self._bump_stat('hits')
+                    return self._response(etag, body)
+
+                self._bump_stat('misses')
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                body = gzip.compress(response.get_data(), self.compress_level)
+                self.bodies.set(etag, body, self.ttl)
+                return self._response(etag, body)
+            return wrapper
+        return decorator
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
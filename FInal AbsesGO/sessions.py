@@ -0,0 +1,95 @@
+# sessions.py
+import secrets
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+# Panjang maksimum session id dari cookie (token_urlsafe(32) = 43 karakter)
+MAX_SID_LENGTH = 64
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """Isi session disimpan di server; cookie hanya membawa session id acak"""
+
+    def __init__(self, initial=None, sid=None, new=False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.rotate = False
+
+    def clear(self):
+        # clear() dipakai saat login/logout: ganti session id (cegah session fixation)
+        super().clear()
+        self.rotate = True
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Session Flask di backend cache (LocalBackend in-memory atau Redis) dengan TTL.
+
+    Data session hanya ditulis ulang jika berubah, sehingga request biasa
+    cukup satu lookup backend tanpa Set-Cookie.
+    """
+
+    def __init__(self, backend, ttl=43200, prefix='session:'):
+        self.backend = backend
+        self.ttl = ttl
+        self.prefix = prefix
+
+    @staticmethod
+    def new_sid():
+        return secrets.token_urlsafe(32)
+
+    def load(self, sid):
+        """Muat session dari session id (cookie); session baru jika tidak ada / kadaluarsa"""
+        if sid and len(sid) <= MAX_SID_LENGTH:
+            data = self.backend.get(self.prefix + sid)
+            if data is not None:
+                return ServerSession(data, sid=sid)
+        return ServerSession(sid=self.new_sid(), new=True)
+
+    def store(self, session):
+        """Simpan session ke backend; mengembalikan session id (bisa baru jika dirotasi)"""
+        if session.rotate:
+            if not session.new:
+                self.backend.delete(self.prefix + session.sid)
+            session.sid = self.new_sid()
+            session.rotate = False
+        if session:
+            self.backend.set(self.prefix + session.sid, dict(session), self.ttl)
+        else:
+            self.backend.delete(self.prefix + session.sid)
+        session.modified = False
+        return session.sid
+
+    def open_session(self, app, request):
+        return self.load(request.cookies.get(self.get_cookie_name(app)))
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if not session:
+            if session.modified and not session.new:
+                self.backend.delete(self.prefix + session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not session.modified and not session.rotate:
+            return
+
+        sid = self.store(session)
+        response.set_cookie(
+            name,
+            sid,
+            expires=self.get_expiration_time(app, session),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app),
+        )
@@ -0,0 +1,77 @@
+# signed_token.py
+import base64
+import hashlib
+import hmac
+
+# Versi format token bertanda tangan
+PREFIX = 's1'
+# Tanda tangan = 16 byte pertama HMAC-SHA256 (22 karakter base64url)
+SIGNATURE_BYTES = 16
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _is_number(text):
+    # str.isdigit() juga menerima digit Unicode ('²') yang ditolak int()
+    return text.isascii() and text.isdigit()
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+class SignedTokenSigner:
+    """
+    Token QR stateless "s1.<id_sesi>.<expires>.<kelas>.<tanda tangan>".
+
+    - isi token (sesi, kelas base64url, epoch kadaluarsa) ditandatangani HMAC-SHA256
+      dengan secret aplikasi, sehingga /scan_token cukup memverifikasi di CPU
+      tanpa membaca qr_token maupun cache token
+    - token berumur pendek dan dirotasi dashboard guru setiap beberapa detik,
+      sehingga screenshot QR yang dibagikan cepat tidak berlaku
+    """
+
+    def __init__(self, secret):
+        self._secret = secret.encode('utf-8') if isinstance(secret, str) else secret
+
+    @staticmethod
+    def is_signed(token):
+        return token.startswith(PREFIX + '.')
+
+    def _signature(self, body):
+        digest = hmac.new(self._secret, body.encode('utf-8'), hashlib.sha256).digest()
+        return _b64encode(digest[:SIGNATURE_BYTES])
+
+    def sign(self, id_sesi, kelas, expires_at):
+        """Token untuk sesi (kelas None = semua kelas) yang berlaku sampai expires_at (epoch detik)"""
+        kelas_part = _b64encode(kelas.encode('utf-8')) if kelas else ''
+        body = f"{PREFIX}.{int(id_sesi)}.{int(expires_at)}.{kelas_part}"
+        return f"{body}.{self._signature(body)}"
+
+    def verify(self, token):
+        """
+        Isi token {'id_sesi', 'kelas', 'expires_at'} jika tanda tangan valid, None jika tidak.
+        Kadaluarsa tidak dicek di sini (dibandingkan pemanggil dengan expires_at).
+        """
+        parts = token.split('.')
+        if len(parts) != 5 or parts[0] != PREFIX:
+            return None
+        _, id_sesi, expires_at, kelas_part, signature = parts
+        if not _is_number(id_sesi) or not _is_number(expires_at):
+            return None
+        body = token[:-len(signature) - 1]
+        if not hmac.compare_digest(signature, self._signature(body)):
+            return None
+        try:
+            kelas = _b64decode(kelas_part).decode('utf-8') if kelas_part else None
+        except ValueError:
+            return None
+        return {'id_sesi': int(id_sesi), 'kelas': kelas, 'expires_at': int(expires_at)}
+
+    @staticmethod
+    def session_id(token):
+        """id_sesi dari token bertanda tangan (tanpa verifikasi), None jika bukan token s1"""
+        parts = token.split('.')
+        if len(parts) != 5 or parts[0] != PREFIX or not _is_number(parts[1]):
+            return None
+        return int(parts[1])
@@ -0,0 +1,196 @@
+# siswa_import.py
+import codecs
+import csv
+import io
+import re
+
+# Kolom siswa yang bisa diimport
+IMPORT_COLUMNS = ('username', 'password', 'nis', 'nama_siswa', 'jurusan', 'kelas')
+REQUIRED_COLUMNS = ('username', 'nis', 'nama_siswa')
+
+# Nama header alternatif (mis. layout AbsesGO_Normalisasi.xlsx: "nama", "jurusan ", "Username", "NIS (PK)")
+HEADER_ALIASES = {
+    'nama': 'nama_siswa',
+    'nama_lengkap': 'nama_siswa',
+    'user': 'username',
+    'kata_sandi': 'password',
+    'id': 'id_siswa',
+}
+
+# Batas panjang kolom teks (VARCHAR)
+MAX_LENGTH = 255
+
+# Header dicari di beberapa baris pertama (file bisa diawali judul)
+HEADER_SCAN_ROWS = 20
+
+# Nama kolom yang menandai header tabel lain setelah baris kosong (layout XLSX multi-tabel)
+SECTION_HEADER_NAMES = IMPORT_COLUMNS + ('role', 'id_siswa')
+
+# Encoding CSV dicoba berurutan pada awal file; Excel Windows menyimpan "CSV" sebagai ANSI (cp1252)
+CSV_ENCODINGS = ('utf-8-sig', 'cp1252', 'latin-1')
+CSV_SAMPLE_BYTES = 64 * 1024
+
+
+class ImportFormatError(ValueError):
+    """File tidak bisa dibaca / header kolom wajib tidak ditemukan"""
+
+
+def normalize_header(value):
+    """'NIS (PK)' -> 'nis', 'Nama Siswa' -> 'nama_siswa', 'jurusan ' -> 'jurusan'"""
+    name = re.sub(r'\(.*?\)', '', str(value or '')).strip().lower()
+    name = re.sub(r'[\s\-]+', '_', name)
+    return HEADER_ALIASES.get(name, name)
+
+
+def cell_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        # NIS numerik dari Excel terbaca sebagai float
+        value = int(value)
+    return str(value).strip()
+
+
+# ========================================
+# PEMBACA FILE (STREAMING)
+# ========================================
+
+def detect_csv_encoding(sample):
+    """Encoding pertama di CSV_ENCODINGS yang bisa membaca sampel byte awal file"""
+    for encoding in CSV_ENCODINGS:
+        try:
+            # final=False: karakter multi-byte yang terpotong di akhir sampel tidak dianggap error
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return CSV_ENCODINGS[-1]
+
+def iter_csv_rows(stream):
+    """Baris CSV satu per satu (UTF-8 / ANSI, BOM Excel diabaikan, delimiter ; atau , dideteksi)"""
+    try:
+        encoding = detect_csv_encoding(stream.read(CSV_SAMPLE_BYTES))
+        stream.seek(0)
+        text = io.TextIOWrapper(stream, encoding=encoding, newline='')
+        sample = text.read(4096)
+        text.seek(0)
+        # Excel berlocale Indonesia menyimpan CSV dengan ';'
+        delimiter = max(',;\t', key=sample.count)
+        yield from csv.reader(text, delimiter=delimiter)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ImportFormatError(f"CSV tidak valid: {e}")
+
+
+def iter_xlsx_rows(stream, load_workbook):
+    """Baris sheet pertama XLSX lewat workbook read-only (tidak memuat seluruh sheet)"""
+    try:
+        wb = load_workbook(stream, read_only=True, data_only=True)
+    except Exception as e:
+        raise ImportFormatError(f"XLSX tidak valid: {e}")
+    try:
+        ws = wb.worksheets[0]
+        for row in ws.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        wb.close()
+
+
+# ========================================
+# VALIDASI
+# ========================================
+
+def is_blank_row(row):
+    return not any(cell_text(v) for v in row)
+
+
+def is_section_row(row):
+    """Judul (satu sel) atau header tabel berikutnya (minimal dua nama kolom)"""
+    cells = [cell_text(v) for v in row if cell_text(v)]
+    if len(cells) == 1:
+        return True
+    return sum(normalize_header(v) in SECTION_HEADER_NAMES for v in cells) >= 2
+
+
+def header_mapping(row):
+    """{kolom: index} dan index kolom Role jika baris ini header, None jika bukan"""
+    names = [normalize_header(v) for v in row]
+    if not all(col in names for col in REQUIRED_COLUMNS):
+        return None
+    mapping = {}
+    for idx, name in enumerate(names):
+        if name in IMPORT_COLUMNS and name not in mapping:
+            mapping[name] = idx
+    return mapping, names.index('role') if 'role' in names else None
+
+
+def validate_record(record, seen_usernames):
+    """Pesan error untuk satu baris, None jika valid"""
+    missing = [col for col in REQUIRED_COLUMNS if not record[col]]
+    if missing:
+        return f"Kolom wajib kosong: {', '.join(missing)}"
+    for col in IMPORT_COLUMNS:
+        if len(record[col]) > MAX_LENGTH:
+            return f"Kolom {col} lebih dari {MAX_LENGTH} karakter"
+    if record['username'] in seen_usernames:
+        return f"Username '{record['username']}' duplikat di file"
+    return None
+
+
+def iter_siswa_records(rows):
+    """
+    Validasi baris secara streaming.
+    Menghasilkan (nomor_baris, record, error); record None jika baris tidak valid.
+    Baris kosong dilewati; tabel siswa berhenti jika baris kosong diikuti judul / header tabel lain,
+    dan setiap baris berisi setelahnya dilaporkan sebagai error (tidak diimport).
+    Jika ada kolom Role, hanya baris dengan role 'siswa' yang diimport.
+    """
+    rows = iter(rows)
+    header_line = mapping = role_idx = None
+    for line_no, row in enumerate(rows, start=1):
+        found = header_mapping(row)
+        if found:
+            header_line = line_no
+            mapping, role_idx = found
+            break
+        if line_no >= HEADER_SCAN_ROWS:
+            break
+    if mapping is None:
+        raise ImportFormatError("Header tidak ditemukan: kolom username, nis, dan nama wajib ada")
+
+    seen_usernames = set()
+    started = after_blank = False
+    for line_no, row in enumerate(rows, start=header_line + 1):
+        if is_blank_row(row):
+            after_blank = started
+            continue
+        if after_blank and is_section_row(row):
+            yield from iter_skipped_rows(rows, line_no)
+            return
+        started = True
+        after_blank = False
+
+        record = {}
+        for col in IMPORT_COLUMNS:
+            idx = mapping.get(col)
+            record[col] = cell_text(row[idx]) if idx is not None and idx < len(row) else ''
+
+        if role_idx is not None and role_idx < len(row):
+            role = cell_text(row[role_idx]).lower()
+            if role and role != 'siswa':
+                continue
+
+        error = validate_record(record, seen_usernames)
+        if error:
+            yield line_no, None, error
+            continue
+        seen_usernames.add(record['username'])
+        yield line_no, record, None
+
+
+def iter_skipped_rows(rows, section_line):
+    """Error untuk baris tabel lain mulai section_line (sisa rows), baris kosong diabaikan"""
+    message = f"Tidak diimport: di luar tabel siswa (tabel lain mulai baris {section_line})"
+    yield section_line, None, message
+    for line_no, row in enumerate(rows, start=section_line + 1):
+        if not is_blank_row(row):
+            yield line_no, None, message
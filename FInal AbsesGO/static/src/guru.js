@@ -0,0 +1,790 @@
+// ========================================
+// FUNGSI GENERATE QR TOKEN
+// ========================================
+document
+  .getElementById("btn-generate")
+  .addEventListener("click", async function () {
+    const btn = this;
+    const qrArea = document.getElementById("qr-area");
+
+    btn.disabled = true;
+    btn.innerHTML = '<span class="loading-icon">⏳</span> Generating...';
+
+    try {
+      // Kelas sama -> token sesi yang sama dirotasi; kelas lain -> sesi baru
+      const response = await fetch("/generate_token", {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+        },
+        body: JSON.stringify({
+          kelas: document.getElementById("sesiKelas").value.trim(),
+        }),
+      });
+
+      if (!response.ok) {
+        throw new Error(`HTTP error! status: ${response.status}`);
+      }
+
+      const data = await response.json();
+      console.log("QR Response:", data);
+
+      if (data.status === "success") {
+        let waktu = data.expires_in || 300;
+        // Mode token bertanda tangan: QR dirotasi setiap beberapa detik (screenshot cepat basi)
+        const validity = data.rotate_in
+          ? `<p>🔄 QR berganti otomatis setiap <strong>${data.rotate_in}</strong> detik</p>`
+          : `<p>Token valid: <span id="countdown" style="color: var(--primary); font-weight: 700; font-size: 1.2rem;">${waktu}</span> detik</p>`;
+
+        qrArea.innerHTML = `
+          <div style="text-align: center;">
+              <p style="color: var(--success); font-weight: 600; margin-bottom: 1rem;">
+                  ✅ Token berhasil digenerate!
+              </p>
+              ${validity}
+              <img src="${data.qr_data || data.qr_url}" alt="QR Code Absensi" style="margin: 1rem auto;">
+              <p style="font-size: 0.9rem; color: var(--text-muted); margin-top: 0.5rem;">
+                  Scan QR code ini untuk absensi
+              </p>
+          </div>
+      `;
+
+        stopSesiTimers();
+        if (data.rotate_in) {
+          rotateTimer = setTimeout(() => btn.click(), data.rotate_in * 1000);
+        } else {
+          countdownTimer = startCountdown(waktu, qrArea);
+        }
+
+        // Live push mengikuti sesi aktif guru (sambung ulang hanya jika sesi berganti)
+        const sesiBaru = data.id_sesi !== activeSesiId;
+        showSesiInfo(data.id_sesi, data.kelas);
+        if (sesiBaru) connectAbsensiStream();
+      } else {
+        throw new Error(data.message || "Gagal generate token");
+      }
+    } catch (error) {
+      console.error("Error generating QR:", error);
+      qrArea.innerHTML = `
+      <div style="text-align: center; color: var(--danger);">
+          <p style="font-weight: 600;">❌ Gagal generate token</p>
+          <p style="font-size: 0.9rem;">${error.message}</p>
+      </div>
+  `;
+    } finally {
+      btn.disabled = false;
+      btn.innerHTML = "<span>🔐</span> Generate QR Token (5 menit)";
+    }
+  });
+
+// ========================================
+// SESI ABSENSI
+// ========================================
+let countdownTimer = null;
+let rotateTimer = null;
+let activeSesiId = null;
+
+function stopSesiTimers() {
+  if (countdownTimer) clearInterval(countdownTimer);
+  if (rotateTimer) clearTimeout(rotateTimer);
+  countdownTimer = rotateTimer = null;
+}
+
+function showSesiInfo(idSesi, kelas) {
+  activeSesiId = idSesi || null;
+  const info = document.getElementById("sesi-info");
+  const btnEnd = document.getElementById("btn-end-sesi");
+  const inputKelas = document.getElementById("sesiKelas");
+  if (!idSesi) {
+    info.textContent = "";
+    btnEnd.style.display = "none";
+    inputKelas.disabled = false;
+    return;
+  }
+  // Kelas dikunci selama sesi berjalan agar auto-refresh merotasi sesi yang sama
+  info.textContent = `Sesi #${idSesi} · ${kelas ? "Kelas " + kelas : "Semua kelas"}`;
+  btnEnd.style.display = "inline-flex";
+  inputKelas.value = kelas || "";
+  inputKelas.disabled = true;
+}
+
+document
+  .getElementById("btn-end-sesi")
+  .addEventListener("click", async function () {
+    if (!confirm("Akhiri sesi absensi ini? QR code langsung tidak berlaku.")) return;
+    try {
+      const response = await fetch("/api/sesi/selesai", { method: "POST" });
+      const data = await response.json();
+      if (!data.success) throw new Error(data.message);
+      stopSesiTimers();
+      document.getElementById("qr-area").innerHTML = `
+        <p style="color: var(--text-muted)">
+          Sesi diakhiri. Klik tombol di atas untuk memulai sesi baru
+        </p>
+      `;
+      showSesiInfo(null);
+      connectAbsensiStream();
+      showAlert(data.message, "success");
+    } catch (error) {
+      showAlert("Gagal mengakhiri sesi: " + error.message, "error");
+    }
+  });
+
+// ========================================
+// FUNGSI COUNTDOWN TIMER
+// ========================================
+function startCountdown(duration, qrArea) {
+  let timer = duration;
+  const countdownElement = document.getElementById("countdown");
+
+  const countdownInterval = setInterval(() => {
+    countdownElement.textContent = timer;
+
+    if (timer <= 60) {
+      countdownElement.style.color = "var(--danger)";
+    } else if (timer <= 120) {
+      countdownElement.style.color = "var(--warning)";
+    }
+
+    if (timer <= 0) {
+      clearInterval(countdownInterval);
+      qrArea.innerHTML = `
+          <div style="text-align: center;">
+              <p style="color: var(--danger); font-weight: 600;">❌ Token sudah kedaluwarsa</p>
+              <p style="color: var(--text-muted); font-size: 0.9rem;">
+                  Klik tombol "Generate QR Token" untuk membuat token baru
+              </p>
+          </div>
+      `;
+    }
+
+    timer--;
+  }, 1000);
+
+  return countdownInterval;
+}
+
+// ========================================
+// AUTO-REFRESH TOKEN
+// ========================================
+function setupAutoRefresh() {
+  setInterval(() => {
+    const qrArea = document.getElementById("qr-area");
+    const hasActiveToken = qrArea.querySelector("img") !== null;
+
+    if (hasActiveToken) {
+      console.log("🔄 Auto-refreshing QR token (rotasi sesi)...");
+      document.getElementById("btn-generate").click();
+    }
+  }, 300000);
+}
+
+// ========================================
+// FUNGSI FORMAT WAKTU
+// ========================================
+function formatDate(dateInput) {
+  if (!dateInput) return "-";
+  if (
+    typeof dateInput === "string" &&
+    /^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$/.test(dateInput)
+  ) {
+    return dateInput;
+  }
+  try {
+    const d = new Date(dateInput);
+    if (isNaN(d)) return String(dateInput);
+    return `${d.getFullYear()}-${String(d.getMonth() + 1).padStart(
+      2,
+      "0"
+    )}-${String(d.getDate()).padStart(2, "0")} ${String(
+      d.getHours()
+    ).padStart(2, "0")}:${String(d.getMinutes()).padStart(
+      2,
+      "0"
+    )}:${String(d.getSeconds()).padStart(2, "0")}`;
+  } catch (e) {
+    return String(dateInput);
+  }
+}
+
+// Data siswa bisa berasal dari file import: selalu di-escape sebelum masuk HTML
+function escapeHtml(value) {
+  const div = document.createElement("div");
+  div.textContent = value == null ? "" : value;
+  return div.innerHTML;
+}
+
+// ========================================
+// Alert Function
+// ========================================
+function showAlert(message, type) {
+  const alertContainer = document.getElementById("alertContainer");
+  const alertClass = type === "success" ? "alert-success" : "alert-error";
+  const icon = type === "success" ? "✅" : "❌";
+
+  const alertDiv = document.createElement("div");
+  alertDiv.className = `alert ${alertClass}`;
+  alertDiv.innerHTML = `
+    <span>${icon}</span>
+    <span>${escapeHtml(message)}</span>
+`;
+
+  alertContainer.appendChild(alertDiv);
+
+  setTimeout(() => {
+    if (alertDiv.parentNode) {
+      alertDiv.remove();
+    }
+  }, 5000);
+}
+
+// ========================================
+// Refresh Absensi
+// ========================================
+function updateLastRefreshTime() {
+  const now = new Date();
+  const timeString = formatDate(now);
+  document.getElementById(
+    "lastUpdateTime"
+  ).textContent = `Terakhir diupdate: ${timeString}`;
+}
+
+// Cursor halaman berikutnya (keyset), null jika sudah halaman terakhir
+let absensiNextCursor = window.ABSENSI_NEXT_CURSOR;
+
+// Filter yang sama dipakai /api/absensi dan /export_absensi
+function getAbsensiFilterParams() {
+  const params = new URLSearchParams();
+  const form = document.getElementById("absensiFilter");
+  new FormData(form).forEach((value, key) => {
+    if (value) params.set(key, value);
+  });
+  return params;
+}
+
+function buildAbsensiUrl(cursor) {
+  const params = getAbsensiFilterParams();
+  if (cursor) params.set("cursor", cursor);
+  const qs = params.toString();
+  return "/api/absensi" + (qs ? "?" + qs : "");
+}
+
+function renderAbsensiRow(absen) {
+  return `
+          <tr>
+            <td>${escapeHtml(absen.nis || "-")}</td>
+            <td>${escapeHtml(absen.nama_siswa || "-")}</td>
+            <td>${escapeHtml(absen.kelas || "-")}</td>
+            <td>${escapeHtml(absen.jurusan || "-")}</td>
+            <td>${escapeHtml(formatDate(absen.waktu_absen))}</td>
+          </tr>
+        `;
+}
+
+function renderAbsensiRows(rows, append) {
+  const tbody = document.getElementById("absensiTableBody");
+
+  if (!append && rows.length === 0) {
+    tbody.innerHTML = `
+        <tr>
+          <td colspan="5">
+            <div class="empty-state">
+              <div class="empty-state-icon">📭</div>
+              <p>Belum ada data absensi</p>
+            </div>
+          </td>
+        </tr>
+      `;
+    return;
+  }
+
+  const html = rows.map(renderAbsensiRow).join("");
+
+  if (append) {
+    tbody.insertAdjacentHTML("beforeend", html);
+  } else {
+    tbody.innerHTML = html;
+  }
+}
+
+function setNextCursor(cursor) {
+  absensiNextCursor = cursor;
+  document.getElementById("loadMoreContainer").style.display = cursor
+    ? ""
+    : "none";
+}
+
+function refreshAbsensi() {
+  const btn = document.getElementById("btn-refresh-absensi");
+  const container = document.getElementById("absensiTableContainer");
+
+  btn.disabled = true;
+  btn.innerHTML = '<span class="loading-icon">⏳</span> Loading...';
+  container.classList.add("updating");
+
+  fetch(buildAbsensiUrl(null), {
+    method: "GET",
+    headers: {
+      "Content-Type": "application/json",
+    },
+  })
+    .then((response) => response.json())
+    .then((data) => {
+      if (data.success) {
+        renderAbsensiRows(data.data, false);
+        setNextCursor(data.next_cursor);
+
+        updateLastRefreshTime();
+        showAlert("Data absensi berhasil dimuat ulang", "success");
+      } else {
+        showAlert(
+          "Gagal memuat data absensi: " + (data.message || "unknown"),
+          "error"
+        );
+      }
+    })
+    .catch((error) => {
+      console.error("Error:", error);
+      showAlert("Error: Tidak dapat terhubung ke server", "error");
+    })
+    .finally(() => {
+      btn.disabled = false;
+      btn.innerHTML = '<span class="refresh-icon">🔄</span> Refresh Data';
+      container.classList.remove("updating");
+    });
+}
+
+function loadMoreAbsensi() {
+  if (!absensiNextCursor) return;
+  const btn = document.getElementById("btn-load-more");
+  btn.disabled = true;
+
+  fetch(buildAbsensiUrl(absensiNextCursor))
+    .then((response) => response.json())
+    .then((data) => {
+      if (data.success) {
+        renderAbsensiRows(data.data, true);
+        setNextCursor(data.next_cursor);
+      } else {
+        showAlert(
+          "Gagal memuat data absensi: " + (data.message || "unknown"),
+          "error"
+        );
+      }
+    })
+    .catch((error) => {
+      console.error("Error:", error);
+      showAlert("Error: Tidak dapat terhubung ke server", "error");
+    })
+    .finally(() => {
+      btn.disabled = false;
+    });
+}
+
+// ========================================
+// Live Push Absensi (SSE)
+// ========================================
+let absensiStream = null;
+
+function matchesAbsensiFilter(absen) {
+  const params = getAbsensiFilterParams();
+  const tanggal = (absen.waktu_absen || "").slice(0, 10);
+  if (params.get("kelas") && params.get("kelas") !== absen.kelas) return false;
+  if (params.get("jurusan") && params.get("jurusan") !== absen.jurusan) return false;
+  if (params.get("bulan") && !tanggal.startsWith(params.get("bulan"))) return false;
+  if (params.get("dari") && tanggal < params.get("dari")) return false;
+  if (params.get("sampai") && tanggal > params.get("sampai")) return false;
+  return true;
+}
+
+function connectAbsensiStream() {
+  if (absensiStream) absensiStream.close();
+  if (!window.EventSource) return;
+
+  // Scope: kelas yang difilter, token aktif guru, atau semua check-in
+  const params = new URLSearchParams();
+  const kelas = getAbsensiFilterParams().get("kelas");
+  if (kelas) {
+    params.set("kelas", kelas);
+  } else if (document.querySelector("#qr-area img")) {
+    params.set("scope", "token");
+  }
+
+  absensiStream = new EventSource("/api/absensi/stream?" + params.toString());
+  absensiStream.addEventListener("absen", (event) => {
+    const absen = JSON.parse(event.data);
+    if (!matchesAbsensiFilter(absen)) return;
+
+    const tbody = document.getElementById("absensiTableBody");
+    if (tbody.querySelector(".empty-state")) tbody.innerHTML = "";
+    tbody.insertAdjacentHTML("afterbegin", renderAbsensiRow(absen));
+    updateLastRefreshTime();
+  });
+}
+
+// ========================================
+// Rekap Kehadiran
+// ========================================
+function loadRekap() {
+  const tbody = document.getElementById("rekapTableBody");
+  const bulan = document.getElementById("rekapBulan").value;
+  const qs = bulan ? "?bulan=" + encodeURIComponent(bulan) : "";
+
+  fetch("/api/rekap" + qs)
+    .then((response) => response.json())
+    .then((data) => {
+      if (!data.success) {
+        showAlert("Gagal memuat rekap: " + (data.message || "unknown"), "error");
+        return;
+      }
+      if (data.data.length === 0) {
+        tbody.innerHTML = `
+          <tr>
+            <td colspan="5">
+              <div class="empty-state">
+                <div class="empty-state-icon">📭</div>
+                <p>Belum ada rekap untuk bulan ${data.bulan}</p>
+              </div>
+            </td>
+          </tr>
+        `;
+        return;
+      }
+      tbody.innerHTML = data.data
+        .map(
+          (r) => `
+          <tr>
+            <td>${escapeHtml(r.kelas || "-")}</td>
+            <td>${escapeHtml(r.jurusan || "-")}</td>
+            <td>${r.jumlah_hadir}</td>
+            <td>${r.jumlah_siswa}</td>
+            <td>${r.persen_hadir === null ? "-" : r.persen_hadir + "%"}</td>
+          </tr>
+        `
+        )
+        .join("");
+    })
+    .catch((error) => {
+      console.error("Error:", error);
+      showAlert("Error memuat rekap", "error");
+    });
+}
+
+// ========================================
+// Export Excel
+// ========================================
+function exportExcel() {
+  const params = getAbsensiFilterParams();
+  const qs = params.toString();
+  window.location.href = "/export_absensi" + (qs ? "?" + qs : "");
+}
+
+function exportCsv() {
+  const params = getAbsensiFilterParams();
+  params.set("format", "csv");
+  window.location.href = "/export_absensi?" + params.toString();
+}
+
+// ========================================
+// CRUD Siswa Functions
+// ========================================
+let siswaNextCursor = null;
+
+function renderSiswaRow(siswa) {
+  return `
+                          <tr>
+                              <td>${siswa.id_siswa}</td>
+                              <td>${escapeHtml(siswa.username)}</td>
+                              <td>${escapeHtml(siswa.nis)}</td>
+                              <td>${escapeHtml(siswa.nama_siswa)}</td>
+                              <td>${escapeHtml(siswa.jurusan || "-")}</td>
+                              <td>${escapeHtml(siswa.kelas || "-")}</td>
+                              <td>
+                                  <div class="action-buttons">
+                                      <button class="btn btn-warning" onclick="editSiswa(${
+                                        siswa.id_siswa
+                                      })">
+                                          <span>✏️</span> Edit
+                                      </button>
+                                      <button class="btn btn-danger" onclick="deleteSiswa(${
+                                        siswa.id_siswa
+                                      })">
+                                          <span>🗑️</span> Hapus
+                                      </button>
+                                  </div>
+                              </td>
+                          </tr>
+                      `;
+}
+
+// append=false: muat ulang dari halaman pertama; true: halaman berikutnya
+function loadSiswaData(append = false) {
+  const url = append && siswaNextCursor
+    ? "/api/siswa?cursor=" + encodeURIComponent(siswaNextCursor)
+    : "/api/siswa";
+  fetch(url)
+    .then((response) => response.json())
+    .then((data) => {
+      const tbody = document.getElementById("siswaTableBody");
+      if (data.success) {
+        if (!append && data.data.length === 0) {
+          tbody.innerHTML = `
+                      <tr>
+                          <td colspan="7">
+                              <div class="empty-state">
+                                  <div class="empty-state-icon">👥</div>
+                                  <p>Belum ada data siswa</p>
+                              </div>
+                          </td>
+                      </tr>
+                  `;
+        } else {
+          const rows = data.data.map(renderSiswaRow).join("");
+          if (append) {
+            tbody.insertAdjacentHTML("beforeend", rows);
+          } else {
+            tbody.innerHTML = rows;
+          }
+        }
+        siswaNextCursor = data.next_cursor;
+        document.getElementById("siswaLoadMoreContainer").style.display =
+          siswaNextCursor ? "" : "none";
+      } else {
+        showAlert("Gagal memuat data siswa: " + data.message, "error");
+      }
+    })
+    .catch((error) => {
+      console.error("Error:", error);
+      showAlert("Error memuat data siswa", "error");
+    });
+}
+
+function importSiswa(file) {
+  const formData = new FormData();
+  formData.append("file", file);
+  const errorsBox = document.getElementById("importSiswaErrors");
+  errorsBox.innerHTML = "";
+
+  fetch("/api/siswa/import", { method: "POST", body: formData })
+    .then((response) => response.json())
+    .then((data) => {
+      if (!data.success) {
+        showAlert("Import gagal: " + data.message, "error");
+        return;
+      }
+      showAlert(data.message, data.jumlah_error ? "error" : "success");
+      if (data.errors && data.errors.length) {
+        errorsBox.innerHTML =
+          '<div class="alert alert-error"><ul>' +
+          data.errors
+            .map((err) => `<li>Baris ${escapeHtml(err.baris)}: ${escapeHtml(err.message)}</li>`)
+            .join("") +
+          "</ul></div>";
+      }
+      loadSiswaData();
+    })
+    .catch((error) => {
+      console.error("Error:", error);
+      showAlert("Error: Tidak dapat terhubung ke server", "error");
+    });
+}
+
+function openModal(type, id = null) {
+  const modal = document.getElementById("siswaModal");
+  const title = document.getElementById("modalTitle");
+  const form = document.getElementById("siswaForm");
+  const passwordInput = document.getElementById("password");
+
+  if (type === "add") {
+    title.textContent = "Tambah Siswa";
+    form.reset();
+    document.getElementById("siswaId").value = "";
+    passwordInput.required = true;
+    passwordInput.placeholder = "Masukkan password";
+  } else {
+    title.textContent = "Edit Siswa";
+    // Password disimpan sebagai hash: kosongkan, isi hanya jika ingin diganti
+    form.reset();
+    passwordInput.required = false;
+    passwordInput.placeholder = "Kosongkan jika tidak diubah";
+    fetch(`/api/siswa/${id}`)
+      .then((response) => response.json())
+      .then((data) => {
+        if (data.success) {
+          document.getElementById("siswaId").value = data.data.id_siswa;
+          document.getElementById("username").value = data.data.username;
+          document.getElementById("nis").value = data.data.nis;
+          document.getElementById("nama_siswa").value =
+            data.data.nama_siswa;
+          document.getElementById("jurusan").value =
+            data.data.jurusan || "";
+          document.getElementById("kelas").value = data.data.kelas || "";
+        }
+      });
+  }
+
+  modal.style.display = "block";
+}
+
+function closeModal() {
+  document.getElementById("siswaModal").style.display = "none";
+}
+
+function editSiswa(id) {
+  openModal("edit", id);
+}
+
+function deleteSiswa(id) {
+  if (confirm("Apakah Anda yakin ingin menghapus siswa ini?")) {
+    fetch(`/api/siswa/${id}`, { method: "DELETE" })
+      .then((response) => response.json())
+      .then((data) => {
+        if (data.success) {
+          showAlert("Siswa berhasil dihapus", "success");
+          loadSiswaData();
+        } else {
+          showAlert("Gagal menghapus siswa: " + data.message, "error");
+        }
+      })
+      .catch((error) => {
+        console.error("Error:", error);
+        showAlert("Error menghapus siswa", "error");
+      });
+  }
+}
+
+// Handle form submission
+document
+  .getElementById("siswaForm")
+  .addEventListener("submit", function (e) {
+    e.preventDefault();
+
+    const id = document.getElementById("siswaId").value;
+    const method = id ? "PUT" : "POST";
+    const url = id ? `/api/siswa/${id}` : "/api/siswa";
+
+    const formData = {
+      username: document.getElementById("username").value,
+      password: document.getElementById("password").value,
+      nis: document.getElementById("nis").value,
+      nama_siswa: document.getElementById("nama_siswa").value,
+      jurusan: document.getElementById("jurusan").value,
+      kelas: document.getElementById("kelas").value,
+    };
+
+    fetch(url, {
+      method: method,
+      headers: {
+        "Content-Type": "application/json",
+      },
+      body: JSON.stringify(formData),
+    })
+      .then((response) => response.json())
+      .then((data) => {
+        if (data.success) {
+          showAlert(data.message, "success");
+          closeModal();
+          loadSiswaData();
+        } else {
+          showAlert(data.message, "error");
+        }
+      })
+      .catch((error) => {
+        console.error("Error:", error);
+        showAlert("Error menyimpan data", "error");
+      });
+  });
+
+// ========================================
+// Event Listeners
+// ========================================
+document.addEventListener("DOMContentLoaded", function () {
+  console.log("🚀 Initializing dashboard...");
+
+  // Event listener untuk tombol export excel
+  const btnExportExcel = document.getElementById("btnExportExcel");
+  if (btnExportExcel) {
+    btnExportExcel.addEventListener("click", exportExcel);
+    console.log("✅ Export button event listener added");
+  }
+
+  const btnExportCsv = document.getElementById("btnExportCsv");
+  if (btnExportCsv) {
+    btnExportCsv.addEventListener("click", exportCsv);
+  }
+
+  // Event listener untuk tombol refresh
+  const btnRefresh = document.getElementById("btn-refresh-absensi");
+  if (btnRefresh) {
+    btnRefresh.addEventListener("click", refreshAbsensi);
+    console.log("✅ Refresh button event listener added");
+  }
+
+  // Terapkan filter absensi tanpa reload halaman
+  document
+    .getElementById("absensiFilter")
+    .addEventListener("submit", function (e) {
+      e.preventDefault();
+      refreshAbsensi();
+      connectAbsensiStream();
+    });
+
+  // Rekap kehadiran per bulan
+  document
+    .getElementById("rekapFilter")
+    .addEventListener("submit", function (e) {
+      e.preventDefault();
+      loadRekap();
+    });
+
+  // Event listener untuk tombol muat lebih banyak
+  const btnLoadMore = document.getElementById("btn-load-more");
+  if (btnLoadMore) {
+    btnLoadMore.addEventListener("click", loadMoreAbsensi);
+  }
+
+  // Muat data siswa saat halaman dimuat
+  loadSiswaData();
+  document
+    .getElementById("btn-load-more-siswa")
+    .addEventListener("click", () => loadSiswaData(true));
+
+  // Import / export siswa massal
+  const importInput = document.getElementById("importSiswaFile");
+  document
+    .getElementById("btnImportSiswa")
+    .addEventListener("click", () => importInput.click());
+  importInput.addEventListener("change", function () {
+    if (this.files.length) {
+      importSiswa(this.files[0]);
+      this.value = "";
+    }
+  });
+  document
+    .getElementById("btnExportSiswa")
+    .addEventListener("click", () => (window.location.href = "/api/siswa/export"));
+  document
+    .getElementById("btnExportSiswaCsv")
+    .addEventListener("click", () => (window.location.href = "/api/siswa/export?format=csv"));
+
+  // Halaman pertama absensi sudah dirender server, tidak perlu fetch ulang
+
+  // Inisialisasi waktu update
+  updateLastRefreshTime();
+
+  // Setup auto-refresh untuk QR token
+  setupAutoRefresh();
+
+  // Terima absensi baru secara live
+  connectAbsensiStream();
+
+  console.log("✅ Dashboard initialized successfully");
+});
+
+// Close modal when clicking outside
+window.onclick = function (event) {
+  const modal = document.getElementById("siswaModal");
+  if (event.target == modal) {
+    closeModal();
+  }
+};
@@ -0,0 +1,275 @@
+const video = document.getElementById("video");
+const canvas = document.getElementById("canvas");
+const ctx = canvas.getContext("2d");
+const statusEl = document.getElementById("status");
+let currentStream = null;
+let usingFrontCamera = false;
+
+function stopCamera() {
+  if (currentStream) {
+    currentStream.getTracks().forEach((track) => track.stop());
+    currentStream = null;
+  }
+}
+
+function startCamera(facingMode = "environment") {
+  stopCamera();
+
+  navigator.mediaDevices
+    .getUserMedia({
+      video: {
+        facingMode: facingMode,
+        width: { ideal: 1280 },
+        height: { ideal: 720 },
+      },
+    })
+    .then((stream) => {
+      video.srcObject = stream;
+      currentStream = stream;
+      usingFrontCamera = facingMode === "user";
+      video.setAttribute("playsinline", true);
+      statusEl.textContent = "Status: menunggu scan...";
+      statusEl.style.color = "var(--primary)";
+    })
+    .catch((err) => {
+      statusEl.textContent = "Gagal akses kamera: " + err.message;
+      statusEl.style.color = "red";
+    });
+}
+
+function switchCamera() {
+  const newFacingMode = usingFrontCamera ? "environment" : "user";
+  startCamera(newFacingMode);
+}
+
+// Debounce scan: jeda setelah token terbaca, abaikan token yang sama
+const SCAN_COOLDOWN_MS = 3000;
+const SAME_TOKEN_IGNORE_MS = 10000;
+let scanPaused = false;
+let scanDone = false;
+let lastToken = null;
+let lastTokenAt = 0;
+
+// Antrean scan offline: token disimpan di localStorage lalu dikirim lewat
+// /scan_token/batch; saat Wi-Fi penuh dikirim ulang dengan backoff + jitter.
+// Kunci antrean per siswa agar di HP bersama scan tidak tercatat atas nama siswa lain
+const SCAN_QUEUE_PREFIX = "absesgo_scan_queue";
+const SCAN_QUEUE_KEY = SCAN_QUEUE_PREFIX + ":" + document.body.dataset.idSiswa;
+const SCAN_QUEUE_MAX = 20;
+const RETRY_BASE_MS = 2000;
+const RETRY_MAX_MS = 60000;
+let retryDelay = RETRY_BASE_MS;
+let retryTimer = null;
+let flushing = false;
+
+function loadQueue() {
+  try {
+    return JSON.parse(localStorage.getItem(SCAN_QUEUE_KEY)) || [];
+  } catch (e) {
+    return [];
+  }
+}
+
+function clearQueues(keepKey) {
+  // Hapus antrean milik siswa lain (dan format lama tanpa id siswa)
+  try {
+    for (let i = localStorage.length - 1; i >= 0; i--) {
+      const key = localStorage.key(i);
+      if (key && key.startsWith(SCAN_QUEUE_PREFIX) && key !== keepKey) {
+        localStorage.removeItem(key);
+      }
+    }
+  } catch (e) {
+    console.error("Gagal menghapus antrean scan:", e);
+  }
+}
+
+function saveQueue(queue) {
+  try {
+    localStorage.setItem(SCAN_QUEUE_KEY, JSON.stringify(queue));
+  } catch (e) {
+    console.error("Gagal menyimpan antrean scan:", e);
+  }
+}
+
+function queueScan(token) {
+  const queue = loadQueue().filter((s) => s.token !== token);
+  queue.push({ token: token });
+  saveQueue(queue.slice(-SCAN_QUEUE_MAX));
+}
+
+function scheduleFlush() {
+  if (retryTimer) return;
+  // Jitter: HP satu kelas tidak mengirim ulang di detik yang sama
+  const delay = retryDelay / 2 + Math.random() * (retryDelay / 2);
+  retryDelay = Math.min(retryDelay * 2, RETRY_MAX_MS);
+  retryTimer = setTimeout(() => {
+    retryTimer = null;
+    flushQueue();
+  }, delay);
+}
+
+function showScanResult(j) {
+  statusEl.textContent = j.message || JSON.stringify(j);
+  statusEl.style.color = j.status === "success" ? "green" : "red";
+
+  if (j.status === "success" || j.status === "warning") {
+    // Absen hari ini sudah tercatat, scanner tidak perlu jalan lagi
+    scanDone = true;
+  }
+
+  if (j.status === "success") {
+    // Ambil baris riwayat baru setelah scan berhasil
+    setTimeout(loadNewHistory, 1500);
+  }
+}
+
+function flushQueue() {
+  const queue = loadQueue();
+  if (flushing || !queue.length) return;
+  flushing = true;
+
+  fetch("/scan_token/batch", {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ scans: queue }),
+  })
+    .then((r) => {
+      // Server sibuk / gangguan: scan tetap di antrean untuk dikirim ulang
+      if (r.status >= 500 || r.status === 429) throw new Error("HTTP " + r.status);
+      return r.json().then((j) => ({ code: r.status, body: j }));
+    })
+    .then(({ code, body }) => {
+      if (code === 401) {
+        // Antrean dipertahankan, dikirim setelah login ulang
+        showScanResult(body);
+        return;
+      }
+      // Hasil per scan final: buang dari antrean (scan baru selama request tetap antre)
+      const sent = new Set(queue.map((s) => s.token));
+      saveQueue(loadQueue().filter((s) => !sent.has(s.token)));
+      retryDelay = RETRY_BASE_MS;
+
+      const results = body.results || [body];
+      const best =
+        results.find((res) => res && res.status === "success") ||
+        results.find((res) => res && res.status === "warning") ||
+        results[results.length - 1];
+      showScanResult(best);
+      if (loadQueue().length && !scanDone) setTimeout(flushQueue, 0);
+    })
+    .catch((e) => {
+      statusEl.textContent = "Jaringan sibuk, scan tersimpan dan akan dikirim ulang otomatis...";
+      statusEl.style.color = "orange";
+      console.error("Gagal kirim scan:", e);
+      scheduleFlush();
+    })
+    .finally(() => {
+      flushing = false;
+    });
+}
+
+function resumeScan() {
+  if (scanDone) return;
+  scanPaused = false;
+  const pending = loadQueue().length;
+  statusEl.textContent = pending
+    ? `Menunggu scan... (${pending} scan menunggu dikirim)`
+    : "Menunggu scan...";
+  statusEl.style.color = pending ? "orange" : "var(--primary)";
+}
+
+function submitToken(token) {
+  scanPaused = true;
+  lastToken = token;
+  lastTokenAt = Date.now();
+  statusEl.textContent = "Token ditemukan: " + token.slice(0, 20) + "...";
+
+  // Simpan dulu, baru kirim
+  queueScan(token);
+  flushQueue();
+  setTimeout(resumeScan, SCAN_COOLDOWN_MS);
+}
+
+function scanLoop() {
+  if (scanDone) return;
+  if (!scanPaused && video.readyState === video.HAVE_ENOUGH_DATA) {
+    canvas.width = video.videoWidth;
+    canvas.height = video.videoHeight;
+    ctx.drawImage(video, 0, 0, canvas.width, canvas.height);
+    const imageData = ctx.getImageData(0, 0, canvas.width, canvas.height);
+    const code = jsQR(imageData.data, canvas.width, canvas.height);
+    const isRepeat =
+      code &&
+      code.data === lastToken &&
+      Date.now() - lastTokenAt < SAME_TOKEN_IGNORE_MS;
+    if (code && !isRepeat) {
+      submitToken(code.data);
+    }
+  }
+  requestAnimationFrame(scanLoop);
+}
+
+// Riwayat incremental: hanya baris dengan id_absen > since yang diambil
+const absensiTable = document.getElementById("absensiTable");
+let historySince = absensiTable.dataset.since || "";
+
+function escapeHtml(value) {
+  const div = document.createElement("div");
+  div.textContent = value == null ? "" : value;
+  return div.innerHTML;
+}
+
+function loadNewHistory() {
+  const url = "/api/riwayat" + (historySince ? "?since=" + encodeURIComponent(historySince) : "");
+  return fetch(url)
+    .then((r) => r.json())
+    .then((j) => {
+      if (!j.success) return;
+      const headerRow = absensiTable.rows[0];
+      // data terbaru dulu: sisipkan dari yang terlama agar urutan tetap
+      j.data
+        .slice()
+        .reverse()
+        .forEach((h) => {
+          if (absensiTable.querySelector(`tr[data-id="${h.id_absen}"]`)) return;
+          const tr = document.createElement("tr");
+          tr.dataset.id = h.id_absen;
+          tr.innerHTML =
+            `<td>${escapeHtml(h.nama_siswa)}</td><td>${escapeHtml(h.kelas)}</td>` +
+            `<td>${escapeHtml(h.jurusan)}</td><td>${escapeHtml(h.waktu_absen)}</td>`;
+          headerRow.after(tr);
+        });
+      if (j.since) historySince = j.since;
+    })
+    .catch((e) => console.error("Gagal memuat riwayat:", e));
+}
+
+document
+  .getElementById("btn-refresh-absensi")
+  .addEventListener("click", loadNewHistory);
+
+document
+  .getElementById("btn-switch-camera")
+  .addEventListener("click", switchCamera);
+
+// Logout: antrean yang belum terkirim tidak boleh terbawa ke siswa berikutnya
+document
+  .querySelector(".btn-logout")
+  .addEventListener("click", () => clearQueues(null));
+
+// Koneksi kembali: kirim antrean tanpa menunggu backoff
+window.addEventListener("online", () => {
+  clearTimeout(retryTimer);
+  retryTimer = null;
+  retryDelay = RETRY_BASE_MS;
+  flushQueue();
+});
+
+// Inisialisasi halaman
+startCamera();
+requestAnimationFrame(scanLoop);
+// Sisa antrean dari kunjungan sebelumnya (mis. halaman ditutup saat offline);
+// antrean siswa lain yang sempat login di HP ini dibuang
+clearQueues(SCAN_QUEUE_KEY);
+flushQueue();
@@ -0,0 +1,50 @@
+# tests/test_siswa_import.py
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from siswa_import import iter_csv_rows, iter_siswa_records  # noqa: E402
+
+
+def import_csv(text):
+    rows = iter_csv_rows(io.BytesIO(text.encode('utf-8')))
+    return list(iter_siswa_records(rows))
+
+
+def test_csv_baris_kosong_di_tengah_tidak_memotong_data():
+    hasil = import_csv(
+        "username,nis,nama\n"
+        "u1,1,Satu\n"
+        "\n"
+        "u2,2,Dua\n"
+        "u3,3,Tiga\n"
+    )
+    assert [record['username'] for _, record, _ in hasil] == ['u1', 'u2', 'u3']
+    assert [line_no for line_no, _, _ in hasil] == [2, 4, 5]
+
+
+def test_tabel_lain_setelah_baris_kosong_dilaporkan():
+    hasil = import_csv(
+        "username,nis,nama\n"
+        "u1,1,Satu\n"
+        "\n"
+        "Data Guru\n"
+        "username,nama,password\n"
+        "g1,Guru Satu,rahasia\n"
+    )
+    assert hasil[0][1]['username'] == 'u1'
+    assert [(line_no, record) for line_no, record, _ in hasil[1:]] == [(4, None), (5, None), (6, None)]
+    assert all('Tidak diimport' in error for _, _, error in hasil[1:])
+
+
+def test_baris_kolom_wajib_kosong_dilaporkan():
+    hasil = import_csv(
+        "username,nis,nama,kelas\n"
+        "u1,1,Satu,X\n"
+        ",,,X\n"
+        "u2,2,Dua,X\n"
+    )
+    assert hasil[1] == (3, None, "Kolom wajib kosong: username, nis, nama_siswa")
+    assert hasil[2][1]['username'] == 'u2'
@@ -0,0 +1,185 @@
+# token_sweeper.py
+import glob
+import os
+import threading
+import time
+from datetime import timedelta
+
+from mysql.connector import Error
+
+
+class TokenSweeper:
+    """
+    Job latar belakang untuk tabel qr_token.
+
+    Setiap putaran:
+    1. bulk-expire token 'aktif' yang sudah lewat waktu_expired (per batch)
+    2. arsipkan (qr_token_arsip) atau hapus token yang lebih tua dari masa retensi (per batch)
+    3. hapus file QR lama di folder qrcodes yang lebih tua dari masa retensi
+
+    Hanya satu worker yang menjalankan putaran pada satu waktu (MySQL GET_LOCK).
+    """
+
+    LOCK_NAME = 'absesgo_token_sweeper'
+
+    def __init__(self, pool, now_fn, batch_size=500, retention_days=30,
+                 mode='archive', interval=300, qr_dir=None):
+        if mode not in ('archive', 'delete'):
+            raise ValueError("mode harus 'archive' atau 'delete'")
+        self.pool = pool
+        self.now_fn = now_fn
+        self.batch_size = batch_size
+        self.retention_days = retention_days
+        self.mode = mode
+        self.interval = interval
+        self.qr_dir = qr_dir
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'runs': 0,
+            'skipped': 0,
+            'errors': 0,
+            'expired_total': 0,
+            'retained_total': 0,
+            'files_removed_total': 0,
+            'last_run_at': None,
+            'last_duration': None,
+            'last_expired': 0,
+            'last_retained': 0,
+            'last_files_removed': 0,
+            'last_error': None,
+        }
+
+    # ----------------------------------------
+    # Langkah-langkah sweep
+    # ----------------------------------------
+
+    def _expire_batch(self, cur, now):
+        cur.execute(
+            "UPDATE qr_token SET status='expired' "
+            "WHERE status='aktif' AND waktu_expired < %s LIMIT %s",
+            (now, self.batch_size)
+        )
+        return cur.rowcount
+
+    def _retention_batch(self, cur, cutoff):
+        # Batas atas batch diambil dari baris ke-N agar arsip & hapus memakai predikat yang sama
+        cur.execute(
+            "SELECT waktu_expired FROM qr_token WHERE waktu_expired < %s "
+            "ORDER BY waktu_expired LIMIT 1 OFFSET %s",
+            (cutoff, self.batch_size - 1)
+        )
+        row = cur.fetchone()
+        if row:
+            where, params = "waktu_expired <= %s", (row[0],)
+        else:
+            where, params = "waktu_expired < %s", (cutoff,)
+
+        if self.mode == 'archive':
+            cur.execute(f"INSERT IGNORE INTO qr_token_arsip SELECT * FROM qr_token WHERE {where}", params)
+        cur.execute(f"DELETE FROM qr_token WHERE {where}", params)
+        return cur.rowcount
+
+    def _remove_qr_files(self, cutoff_ts):
+        if not self.qr_dir or not os.path.isdir(self.qr_dir):
+            return 0
+        removed = 0
+        for path in glob.glob(os.path.join(self.qr_dir, 'token_*.png')):
+            if removed >= self.batch_size:
+                break
+            try:
+                if os.path.getmtime(path) < cutoff_ts:
+                    os.remove(path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+    def run_once(self):
+        """Jalankan satu putaran sweep; mengembalikan statistik putaran"""
+        started = time.monotonic()
+        now = self.now_fn()
+        cutoff = now - timedelta(days=self.retention_days)
+        expired = retained = 0
+
+        try:
+            with self.pool.connection() as conn:
+                cur = conn.cursor()
+                try:
+                    cur.execute("SELECT GET_LOCK(%s, 0)", (self.LOCK_NAME,))
+                    if not cur.fetchone()[0]:
+                        with self._stats_lock:
+                            self._stats['skipped'] += 1
+                        return None
+                    try:
+                        while True:
+                            n = self._expire_batch(cur, now)
+                            conn.commit()
+                            expired += n
+                            if n < self.batch_size:
+                                break
+
+                        while True:
+                            n = self._retention_batch(cur, cutoff)
+                            conn.commit()
+                            retained += n
+                            if n < self.batch_size:
+                                break
+                    finally:
+                        cur.execute("SELECT RELEASE_LOCK(%s)", (self.LOCK_NAME,))
+                        cur.fetchone()
+                finally:
+                    cur.close()
+
+            files_removed = self._remove_qr_files(cutoff.timestamp())
+        except Error as e:
+            with self._stats_lock:
+                self._stats['errors'] += 1
+                self._stats['last_error'] = str(e)
+            print(f"[ERROR] Token sweeper: {e}")
+            return None
+
+        with self._stats_lock:
+            self._stats['runs'] += 1
+            self._stats['expired_total'] += expired
+            self._stats['retained_total'] += retained
+            self._stats['files_removed_total'] += files_removed
+            self._stats['last_run_at'] = now.strftime('%Y-%m-%d %H:%M:%S')
+            self._stats['last_duration'] = round(time.monotonic() - started, 4)
+            self._stats['last_expired'] = expired
+            self._stats['last_retained'] = retained
+            self._stats['last_files_removed'] = files_removed
+            self._stats['last_error'] = None
+        return {'expired': expired, 'retained': retained, 'files_removed': files_removed}
+
+    # ----------------------------------------
+    # Thread latar belakang
+    # ----------------------------------------
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self.run_once()
+
+    def start(self):
+        """Mulai thread sweeper (daemon); aman dipanggil berulang"""
+        if self.interval <= 0 or (self._thread and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='token-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self):
+        with self._stats_lock:
+            snapshot = dict(self._stats)
+        snapshot.update({
+            'batch_size': self.batch_size,
+            'retention_days': self.retention_days,
+            'mode': self.mode,
+            'interval': self.interval,
+        })
+        return snapshot
@@ -0,0 +1,369 @@
+# write_behind.py
+import atexit
+import glob
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from mysql.connector import Error
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: tanpa kunci file, journal dipakai satu proses saja
+    fcntl = None
+
+# Jumlah tanggal yang dedupe set-nya disimpan (scan offline bisa membawa tanggal lain)
+SEEN_DATES = 7
+
+
+class AbsenWriteBehind:
+    """
+    Antrean write-behind untuk insert absensi saat jam sibuk.
+
+    Scan yang sudah tervalidasi (cache token) langsung di-ack setelah:
+    1. lolos dedupe harian in-memory (id_siswa per tanggal)
+    2. tercatat di journal append-only lokal (fsync), sehingga selamat jika proses crash
+    Baris lalu di-flush ke tabel absensi sebagai INSERT multi-baris per batch
+    (pemicu: jumlah antrean >= batch_size atau tiap flush_interval detik).
+    UNIQUE (id_siswa, tanggal) tetap menjadi penjaga terakhir terhadap duplikat.
+
+    Setiap proses (worker) memakai slot journal sendiri "<journal_path>.<n>" yang dikunci
+    fcntl selama proses hidup; saat start, slot yang kuncinya bebas (worker mati) di-replay
+    oleh proses yang mengambilnya, sehingga worker tidak pernah mengganti nama journal aktif milik worker lain.
+    """
+
+    def __init__(self, pool, journal_path, batch_size=200, flush_interval=1.0,
+                 fsync=True, on_flushed=None):
+        self.pool = pool
+        self.base_path = journal_path
+        self.journal_path = journal_path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.on_flushed = on_flushed
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._buffer = []
+        self._journal_lock = None
+        # {tanggal: set id_siswa} untuk beberapa tanggal terakhir (LRU)
+        self._seen = OrderedDict()
+        self._segment = 0
+        self._segments = []
+        self._journal = None
+        self._thread = None
+        self._stats = {
+            'accepted': 0,
+            'duplicates': 0,
+            'flushes': 0,
+            'rows_flushed': 0,
+            'flush_errors': 0,
+            'last_flush_rows': 0,
+            'last_flush_duration': None,
+            'last_error': None,
+        }
+
+        os.makedirs(os.path.dirname(journal_path) or '.', exist_ok=True)
+
+    # ----------------------------------------
+    # Journal
+    # ----------------------------------------
+
+    def _open_journal(self):
+        self._journal = open(self.journal_path, 'a', encoding='utf-8')
+
+    def _rotate_journal(self):
+        """Pindahkan journal aktif ke segmen flush (dihapus setelah batch tersimpan)"""
+        self._journal.close()
+        self._segment += 1
+        segment = f"{self.journal_path}.{int(time.time())}.{self._segment}.flushing"
+        os.replace(self.journal_path, segment)
+        self._segments.append(segment)
+        self._open_journal()
+
+    def _lock_slot(self, path):
+        """Kunci eksklusif non-blocking untuk journal path; file kunci (tetap terbuka) atau None jika dipegang proses lain"""
+        lock = open(path + '.lock', 'a')
+        try:
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock.close()
+            return None
+        return lock
+
+    def _claim_journal(self):
+        """Pakai slot journal pertama yang tidak dikunci proses lain"""
+        if fcntl is None:
+            return
+        slot = 0
+        while self._journal_lock is None:
+            path = f"{self.base_path}.{slot}"
+            self._journal_lock = self._lock_slot(path)
+            if self._journal_lock is not None:
+                self.journal_path = path
+            slot += 1
+
+    def _orphan_journals(self):
+        """Slot journal lain yang kuncinya bebas (pemiliknya sudah mati), beserta kuncinya"""
+        if fcntl is None:
+            return []
+        pattern = re.compile(re.escape(self.base_path) + r'\.\d+\.lock')
+        paths = {p[:-len('.lock')] for p in glob.glob(glob.escape(self.base_path) + '.*.lock')
+                 if pattern.fullmatch(p)}
+        # Journal lama tanpa slot (versi sebelumnya)
+        paths.add(self.base_path)
+        paths.discard(self.journal_path)
+        orphans = []
+        for path in sorted(paths):
+            lock = self._lock_slot(path)
+            if lock is not None:
+                orphans.append((path, lock))
+        return orphans
+
+    def _replay_journal(self, journal_path):
+        """Muat ulang entri journal yang belum sempat di-flush (setelah crash / restart)"""
+        entries = []
+        # Hanya segmen milik journal ini ("<path>.<waktu>.<n>.flushing"), bukan milik slot lain
+        segment = re.compile(re.escape(journal_path) + r'\.\d+\.\d+\.flushing')
+        paths = sorted(p for p in glob.glob(glob.escape(journal_path) + '.*.flushing') if segment.fullmatch(p))
+        for path in (journal_path + '.replay', journal_path):
+            if os.path.exists(path):
+                paths.append(path)
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # Baris terakhir bisa terpotong saat crash
+                        continue
+        return entries, paths
+
+    # ----------------------------------------
+    # Dedupe harian
+    # ----------------------------------------
+
+    def _load_seen(self, tanggal):
+        """Absensi yang sudah tersimpan untuk tanggal ini (dipanggil tanpa memegang _lock)"""
+        with self.pool.cursor() as cur:
+            cur.execute("SELECT id_siswa FROM absensi WHERE tanggal = %s", (tanggal,))
+            return {row[0] for row in cur.fetchall()}
+
+    def _seen_for(self, tanggal, loaded):
+        """Dedupe set tanggal dari cache; loaded = hasil _load_seen jika belum ada (dipanggil dengan _lock)"""
+        seen = self._seen.get(tanggal)
+        if seen is None:
+            seen = set(loaded)
+            seen.update(e['id_siswa'] for e in self._buffer if e['waktu'][:10] == tanggal)
+            self._seen[tanggal] = seen
+            while len(self._seen) > SEEN_DATES:
+                self._seen.popitem(last=False)
+        self._seen.move_to_end(tanggal)
+        return seen
+
+    # ----------------------------------------
+    # API publik
+    # ----------------------------------------
+
+    def enqueue(self, id_siswa, token_qr, waktu_absen):
+        """
+        Terima satu check-in. Mengembalikan True jika diterima (hadir),
+        False jika siswa sudah absen pada tanggal tersebut.
+        """
+        waktu = waktu_absen.strftime('%Y-%m-%d %H:%M:%S')
+        tanggal = waktu[:10]
+
+        with self._lock:
+            cached = tanggal in self._seen
+        # Query dedupe hanya sekali per tanggal dan tidak menahan enqueue lain
+        loaded = () if cached else self._load_seen(tanggal)
+
+        with self._lock:
+            seen = self._seen_for(tanggal, loaded)
+            if id_siswa in seen:
+                self._stats['duplicates'] += 1
+                return False
+
+            entry = {'id_siswa': id_siswa, 'token_qr': token_qr, 'waktu': waktu}
+            self._journal.write(json.dumps(entry) + '\n')
+            self._journal.flush()
+            if self.fsync:
+                os.fsync(self._journal.fileno())
+
+            seen.add(id_siswa)
+            self._buffer.append(entry)
+            self._stats['accepted'] += 1
+            if len(self._buffer) >= self.batch_size:
+                self._wakeup.set()
+        return True
+
+    def flush(self):
+        """Tulis semua entri yang antre ke database; mengembalikan jumlah baris yang dikirim"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._buffer:
+                    return 0
+                entries = self._buffer
+                self._buffer = []
+                self._rotate_journal()
+                segments = self._segments
+                self._segments = []
+
+            started = time.monotonic()
+            try:
+                rows = self._write_batch(entries)
+            except Error as e:
+                # Gagal: kembalikan entri ke antrean, segmen journal tetap disimpan untuk replay
+                with self._lock:
+                    self._buffer = entries + self._buffer
+                    self._segments = segments + self._segments
+                    self._stats['flush_errors'] += 1
+                    self._stats['last_error'] = str(e)
+                print(f"[ERROR] Flush write-behind absensi: {e}")
+                return 0
+
+            for segment in segments:
+                try:
+                    os.remove(segment)
+                except FileNotFoundError:
+                    pass
+            with self._lock:
+                self._stats['flushes'] += 1
+                self._stats['rows_flushed'] += len(entries)
+                self._stats['last_flush_rows'] = len(entries)
+                self._stats['last_flush_duration'] = round(time.monotonic() - started, 4)
+                self._stats['last_error'] = None
+
+        if self.on_flushed and rows:
+            try:
+                self.on_flushed(rows)
+            except Exception as e:
+                print(f"[ERROR] Callback write-behind: {e}")
+        return len(entries)
+
+    def _write_batch(self, entries):
+        """INSERT multi-baris + perbarui rekap_harian dalam satu transaksi"""
+        values_sql = " UNION ALL ".join(
+            ["SELECT %s AS id_siswa, %s AS waktu_absen, %s AS token_qr"] * len(entries)
+        )
+        params = []
+        for e in entries:
+            params.extend([e['id_siswa'], datetime.strptime(e['waktu'], '%Y-%m-%d %H:%M:%S'), e['token_qr']])
+
+        id_list = sorted({e['id_siswa'] for e in entries})
+        tanggal_list = sorted({e['waktu'][:10] for e in entries})
+        id_marks = ", ".join(["%s"] * len(id_list))
+        tanggal_marks = ", ".join(["%s"] * len(tanggal_list))
+
+        with self.pool.connection() as conn:
+            cur = conn.cursor(dictionary=True)
+            try:
+                cur.execute(f"""
+                    INSERT INTO absensi (id_siswa, waktu_absen, token_qr, status, nama_siswa, jurusan, kelas)
+                    SELECT s.id_siswa, v.waktu_absen, v.token_qr, 'hadir', s.nama_siswa, s.jurusan, s.kelas
+                    FROM ({values_sql}) v
+                    JOIN siswa s ON s.id_siswa = v.id_siswa
+                    ON DUPLICATE KEY UPDATE id_absen = id_absen
+                """, params)
+
+                # Hitung ulang rekap untuk kelas/jurusan yang tersentuh batch ini
+                cur.execute(f"""
+                    INSERT INTO rekap_harian (tanggal, kelas, jurusan, jumlah_hadir, jumlah_siswa)
+                    SELECT a.tanggal, COALESCE(a.kelas, ''), COALESCE(a.jurusan, ''), COUNT(*),
+                           (SELECT COUNT(*) FROM siswa s2
+                            WHERE s2.kelas <=> a.kelas AND s2.jurusan <=> a.jurusan)
+                    FROM absensi a
+                    WHERE a.tanggal IN ({tanggal_marks})
+                      AND a.status = 'hadir'
+                      AND (a.kelas, a.jurusan) IN (SELECT kelas, jurusan FROM siswa WHERE id_siswa IN ({id_marks}))
+                    GROUP BY a.tanggal, a.kelas, a.jurusan
+                    ON DUPLICATE KEY UPDATE jumlah_hadir = VALUES(jumlah_hadir)
+                """, tanggal_list + id_list)
+                conn.commit()
+
+                # Baris yang disisipkan batch ini saja, untuk push live: absensi lama di tanggal
+                # yang sama (dilewati ON DUPLICATE KEY) waktu/token-nya berbeda sehingga tidak ikut
+                entry_marks = ", ".join(["(%s, %s, %s)"] * len(entries))
+                cur.execute(f"""
+                    SELECT a.id_absen, a.id_siswa, s.nis, a.nama_siswa, a.kelas, a.jurusan, a.waktu_absen, a.token_qr
+                    FROM absensi a
+                    JOIN siswa s ON a.id_siswa = s.id_siswa
+                    WHERE a.tanggal IN ({tanggal_marks}) AND a.id_siswa IN ({id_marks})
+                      AND (a.id_siswa, a.waktu_absen, a.token_qr) IN ({entry_marks})
+                """, tanggal_list + id_list + params)
+                return cur.fetchall()
+            finally:
+                cur.close()
+
+    # ----------------------------------------
+    # Thread flusher
+    # ----------------------------------------
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[ERROR] Thread write-behind: {e}")
+
+    def start(self):
+        """Replay journal lama, lalu mulai thread flusher"""
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            self._claim_journal()
+            entries, paths = self._replay_journal(self.journal_path)
+            orphans = self._orphan_journals()
+            for path, _ in orphans:
+                orphan_entries, orphan_paths = self._replay_journal(path)
+                entries += orphan_entries
+                paths += orphan_paths
+            if entries:
+                # Gabungkan entri lama ke journal aktif baru (tulis + fsync dulu, baru hapus yang lama)
+                replay = self.journal_path + '.replay'
+                with open(replay + '.tmp', 'w', encoding='utf-8') as f:
+                    for e in entries:
+                        f.write(json.dumps(e) + '\n')
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(replay + '.tmp', replay)
+                for path in paths:
+                    if path != replay:
+                        os.remove(path)
+                os.replace(replay, self.journal_path)
+                self._buffer = entries + self._buffer
+            # Journal yatim sudah pindah ke journal proses ini: lepas kuncinya
+            for _, lock in orphans:
+                lock.close()
+            self._open_journal()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name='absen-write-behind', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Hentikan flusher dan flush sisa antrean"""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join(timeout=self.flush_interval + 5)
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['pending'] = len(self._buffer)
+        snapshot.update({'batch_size': self.batch_size, 'flush_interval': self.flush_interval})
+        return snapshot